@@ -0,0 +1,267 @@
+"""Many-body gravity.
+
+With gravity between every pair of PhysicsObjects, each object is pulled by every other one, which costs
+:math:`O(n^2)` per update. The Barnes-Hut method groups far away objects together: the world is split into a
+quadtree, each quadtree cell knows its total mass and center of mass, and a cell that is small compared to its
+distance from an object pulls on it as one mass. That brings the cost down to :math:`O(n \\log n)`.
+
+How far away a cell has to be is set by the opening angle :math:`\\theta`: a cell of size :math:`s` at distance
+:math:`d` is treated as one mass when :math:`s/d < \\theta`. A :math:`\\theta` of 0 is exact, larger values are faster
+and less accurate; 0.5 is the usual choice.
+
+Both the tree and the walk through it are done with NumPy arrays - all objects descend the tree together, one level
+at a time - so there is no per-object Python loop.
+
+There are no UI components in this module.
+"""
+
+import time
+
+import numpy
+
+from Options import Options
+
+MAX_DEPTH = 16
+"""Levels below the root. Bodies closer than world size / 2^16 share a cell and pull on each other as one mass"""
+
+
+def _spread_bits(values):
+    """
+    Puts a zero bit between each of the low 16 bits of each value, for building Morton keys.
+    """
+    values = values & numpy.uint64(0x0000FFFF)
+    values = (values | (values << numpy.uint64(8))) & numpy.uint64(0x00FF00FF)
+    values = (values | (values << numpy.uint64(4))) & numpy.uint64(0x0F0F0F0F)
+    values = (values | (values << numpy.uint64(2))) & numpy.uint64(0x33333333)
+    values = (values | (values << numpy.uint64(1))) & numpy.uint64(0x55555555)
+    return values
+
+
+class QuadtreeLevel:
+    """
+    All the cells of one level of a :class:`BarnesHut.Quadtree` that contain at least one body.
+
+    Every attribute is an array with one entry per cell, in Morton order.
+    """
+    def __init__(self, prefixes, counts, masses, centers, first_child, child_counts, size):
+        self.prefixes = prefixes
+        """Morton key prefix identifying the cell"""
+        self.counts = counts
+        """Number of bodies in the cell"""
+        self.masses = masses
+        """Total mass in the cell"""
+        self.centers = centers
+        """Center of mass of the cell"""
+        self.first_child = first_child
+        """Index of the cell's first child in the next level"""
+        self.child_counts = child_counts
+        """Number of non-empty children"""
+        self.size = size
+        """Side length of every cell on this level"""
+
+
+class Quadtree:
+    """
+    A linear quadtree over a set of bodies, built by sorting the bodies by Morton key.
+
+    The root is the smallest square holding every body. Each level stores only its non-empty cells, with the total
+    mass and center of mass of each.
+
+    :param positions: One (x, y) row per body
+    :type positions: numpy.ndarray
+    :param masses: Mass of each body
+    :type masses: numpy.ndarray
+    """
+    def __init__(self, positions, masses):
+        start = time.perf_counter()
+        n = len(positions)
+        low = positions.min(axis=0)
+        size = float((positions.max(axis=0) - low).max())
+        if size <= 0:
+            size = 1.0
+        self.size = size
+        """Side length of the root cell"""
+        cells = 1 << MAX_DEPTH
+        grid = numpy.minimum(((positions - low) * (cells / size)).astype(numpy.int64), cells - 1)
+        self.keys = _spread_bits(grid[:, 0].astype(numpy.uint64)) | (_spread_bits(grid[:, 1].astype(numpy.uint64)) << numpy.uint64(1))
+        """Morton key of each body, in body order"""
+        order = numpy.argsort(self.keys, kind='stable')
+        sorted_keys = self.keys[order]
+        sorted_masses = masses[order]
+        weighted = positions[order] * sorted_masses[:, None]
+
+        self.levels = []
+        """One :class:`BarnesHut.QuadtreeLevel` per level, root first"""
+        for level in range(MAX_DEPTH + 1):
+            prefix = sorted_keys >> numpy.uint64(2 * (MAX_DEPTH - level))
+            starts = numpy.flatnonzero(numpy.concatenate(([True], prefix[1:] != prefix[:-1])))
+            level_masses = numpy.add.reduceat(sorted_masses, starts)
+            centers = numpy.add.reduceat(weighted, starts, axis=0)
+            with numpy.errstate(invalid='ignore', divide='ignore'):
+                centers /= level_masses[:, None]
+            empty = level_masses == 0  # massless bodies only; use their plain position
+            if empty.any():
+                centers[empty] = positions[order][starts[empty]]
+            counts = numpy.diff(numpy.append(starts, n))
+            self.levels.append(QuadtreeLevel(prefix[starts], counts, level_masses, centers, None, None,
+                                             size / (1 << level)))
+        for level, child_level in zip(self.levels, self.levels[1:]):
+            parents = child_level.prefixes >> numpy.uint64(2)
+            level.first_child = numpy.searchsorted(parents, level.prefixes, 'left')
+            level.child_counts = numpy.searchsorted(parents, level.prefixes, 'right') - level.first_child
+        self.build_time = time.perf_counter() - start
+        """Seconds spent building"""
+
+    @property
+    def cell_count(self):
+        """Number of non-empty cells on every level"""
+        return sum(len(level.prefixes) for level in self.levels)
+
+
+class NBodyGravity:
+    """
+    Gravity between every pair of bodies in a world: :math:`F = \\frac{Gm_1m_2}{r^2+\\epsilon^2}`.
+
+    The softening length :math:`\\epsilon` stops the force blowing up when two bodies get very close. Worlds with no
+    more than `exact_threshold` bodies are summed pair by pair; bigger ones use a :class:`BarnesHut.Quadtree`.
+
+    :param theta: Opening angle; 0 is exact
+    :type theta: number
+    :param gravitational_constant: G
+    :type gravitational_constant: number
+    :param softening: Softening length, m
+    :type softening: number
+    :param exact_threshold: Largest number of bodies summed exactly
+    :type exact_threshold: int
+    """
+    def __init__(self, theta=Options['barnes hut theta'], gravitational_constant=Options['n-body gravitational constant'],
+                 softening=Options['n-body softening'], exact_threshold=Options['n-body exact threshold']):
+        self.theta = theta
+        self.gravitational_constant = gravitational_constant
+        self.softening = softening
+        self.exact_threshold = exact_threshold
+        self.interactions = 0
+        """Body-body or body-cell interactions in the last call to :meth:`forces`"""
+        self.tree = None
+        """The quadtree from the last call to :meth:`forces`, or None if it was summed exactly"""
+
+    def _pull(self, positions, masses, bodies, centers, other_masses):
+        """
+        Force on each of `bodies` from a mass at the matching row of centers, summed per body.
+        """
+        offsets = centers - positions[bodies]
+        distance2 = numpy.einsum('ij,ij->i', offsets, offsets) + self.softening * self.softening
+        scale = self.gravitational_constant * masses[bodies] * other_masses / (distance2 * numpy.sqrt(distance2))
+        n = len(positions)
+        result = numpy.empty((n, 2))
+        result[:, 0] = numpy.bincount(bodies, offsets[:, 0] * scale, n)
+        result[:, 1] = numpy.bincount(bodies, offsets[:, 1] * scale, n)
+        self.interactions += len(bodies)
+        return result
+
+    def exact_forces(self, positions, masses):
+        """
+        Sums the pull of every other body on each body directly.
+
+        :param positions: One (x, y) row per body
+        :type positions: numpy.ndarray
+        :param masses: Mass of each body
+        :type masses: numpy.ndarray
+        :return: One (x, y) force row per body, Newtons
+        :rtype: numpy.ndarray
+        """
+        n = len(positions)
+        a, b = numpy.nonzero(~numpy.eye(n, dtype=bool))
+        self.interactions = 0
+        return self._pull(positions, masses, a, positions[b], masses[b])
+
+    def tree_forces(self, positions, masses):
+        """
+        Approximates the pull of every other body on each body with a Barnes-Hut walk.
+
+        Every body starts at the root. On each level, a cell is accepted as one mass if it doesn't hold the body and
+        is either a single body or far enough away (:math:`s < \\theta d`). The other cells are opened and the
+        body moves on to their children. On the deepest level every cell is accepted; one holding the body pulls
+        with the mass of the other bodies in it.
+
+        :param positions: One (x, y) row per body
+        :type positions: numpy.ndarray
+        :param masses: Mass of each body
+        :type masses: numpy.ndarray
+        :return: One (x, y) force row per body, Newtons
+        :rtype: numpy.ndarray
+        """
+        n = len(positions)
+        tree = Quadtree(positions, masses)
+        self.tree = tree
+        self.interactions = 0
+        theta2 = self.theta * self.theta
+        result = numpy.zeros((n, 2))
+        bodies = numpy.arange(n)
+        cells = numpy.zeros(n, dtype=numpy.int64)
+        for depth, level in enumerate(tree.levels):
+            if len(bodies) == 0:
+                break
+            shift = numpy.uint64(2 * (MAX_DEPTH - depth))
+            contains = (tree.keys[bodies] >> shift) == level.prefixes[cells]
+            centers = level.centers[cells]
+            cell_masses = level.masses[cells]
+            if depth == MAX_DEPTH:
+                # the rest of the cell pulls as one mass, without the body itself
+                own = masses[bodies]
+                others = cell_masses - own
+                keep = ~contains | (others > 0)
+                rest = numpy.where(others > 0, others, 1)
+                centers = numpy.where(contains[:, None],
+                                      (centers * cell_masses[:, None] - positions[bodies] * own[:, None]) / rest[:, None],
+                                      centers)
+                cell_masses = numpy.where(contains, others, cell_masses)
+                result += self._pull(positions, masses, bodies[keep], centers[keep], cell_masses[keep])
+                break
+            offsets = centers - positions[bodies]
+            distance2 = numpy.einsum('ij,ij->i', offsets, offsets)
+            accept = ~contains & ((level.counts[cells] == 1) | (level.size * level.size < theta2 * distance2))
+            if accept.any():
+                result += self._pull(positions, masses, bodies[accept], centers[accept], cell_masses[accept])
+            opened = ~accept
+            bodies = bodies[opened]
+            cells = cells[opened]
+            counts = level.child_counts[cells]
+            total = int(counts.sum())
+            run_starts = numpy.repeat(numpy.cumsum(counts) - counts, counts)
+            cells = numpy.repeat(level.first_child[cells], counts) + numpy.arange(total) - run_starts
+            bodies = numpy.repeat(bodies, counts)
+        return result
+
+    def forces(self, positions, masses):
+        """
+        Gravitational force on each body from all the others, exact for small worlds and Barnes-Hut otherwise.
+
+        :param positions: One (x, y) row per body
+        :type positions: numpy.ndarray
+        :param masses: Mass of each body
+        :type masses: numpy.ndarray
+        :return: One (x, y) force row per body, Newtons
+        :rtype: numpy.ndarray
+        """
+        if len(positions) < 2:
+            self.tree = None
+            self.interactions = 0
+            return numpy.zeros((len(positions), 2))
+        if len(positions) <= self.exact_threshold:
+            self.tree = None
+            return self.exact_forces(positions, masses)
+        return self.tree_forces(positions, masses)
+
+    def stats(self):
+        """
+        :return: Counters from the last call to :meth:`forces`, for logging and benchmarks
+        :rtype: dict
+        """
+        tree = self.tree
+        return {
+            'theta': self.theta,
+            'interactions': self.interactions,
+            'cells': tree.cell_count if tree is not None else 0,
+            'build time': tree.build_time if tree is not None else 0
+        }
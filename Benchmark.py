@@ -0,0 +1,567 @@
+"""Headless benchmarks for the physics code.
+
+Run from the repository root::
+
+    python Benchmark.py                          # every benchmark, writes benchmark_results.json
+    python Benchmark.py --counts 10 100 --out before.json
+    python Benchmark.py --baseline before.json   # also prints how each result changed
+    python Benchmark.py --integrators            # accuracy against cost of each integrator on an orbit
+    python Benchmark.py --parallel 1 2 4 8       # steps per second of a 100000 body world on worker processes
+    python Benchmark.py --bounce                 # checks a lone body never bounces higher with each narrow phase
+
+Each benchmark builds its scenario from a fixed seed, so two runs of the same code simulate exactly the same bodies
+and their timings can be compared. For every benchmark and body count the results record calls per second and
+the memory allocated per call (peak traced by tracemalloc, and the change in live Python blocks).
+
+Results are stored as JSON together with the git revision, so a file from an older version can be passed as
+`--baseline` to spot regressions.
+
+:func:`integrator_accuracy` is different from the rest: it runs the same orbit with each integrator at several step
+lengths and records how far each run ends up from a very fine reference run, against how long it took.
+
+There are no UI components in this module.
+"""
+
+import argparse
+import datetime
+import json
+import math
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import numpy
+
+from Options import Options
+import Substance
+import Physics
+import Engine
+import World
+import BarnesHut
+import Parallel
+import Integrators
+import Collision
+
+DEFAULT_COUNTS = (10, 100, 1000, 10000)
+"""Body counts every scenario is run at"""
+
+
+def make_engine(count, seed=0, speed=5, area=None):
+    """
+    Builds an Engine holding `count` bodies of random materials at random places on the canvas, moving in random
+    directions at up to `speed` m per update.
+
+    :param count: Number of bodies
+    :type count: int
+    :param seed: Seed for the random number generator
+    :type seed: int
+    :param speed: Largest starting speed
+    :type speed: number
+    :param area: If given, the world is a square with this many m^2 per body instead of the canvas, so large counts
+        aren't packed solid
+    :type area: number
+    :rtype: :class:`Engine.Engine`
+    """
+    rng = numpy.random.default_rng(seed)
+    if area is None:
+        engine = Engine.Engine()
+    else:
+        side = math.sqrt(count * area)
+        engine = Engine.Engine(side, side)
+    materials = [Substance.MATERIALS[name] for name in sorted(Substance.MATERIALS)]
+    for i in range(count):
+        body = Physics.PhysicsObject(materials[int(rng.integers(len(materials)))], Options['default mass'])
+        body.displacement = Physics.Vector.make_vector_from_components(rng.uniform(engine.min_x, engine.max_x),
+                                                                       rng.uniform(engine.min_y, engine.max_y))
+        body.velocity = Physics.Vector.make_vector_from_components(*rng.uniform(-speed, speed, 2))
+        engine.add(body)
+    return engine
+
+
+def measure(function, min_time=0.2, max_calls=1000):
+    """
+    Calls `function` repeatedly and reports how fast it ran and how much it allocated.
+
+    One untimed call warms up caches first. Allocation is measured on a separate traced call, so tracing doesn't
+    slow down the timed ones.
+
+    :param function: Called with no arguments
+    :type function: function
+    :param min_time: Keep calling until this many seconds have passed
+    :type min_time: number
+    :param max_calls: ... or until it has been called this many times
+    :type max_calls: int
+    :return: calls, seconds, calls per second, peak bytes allocated per call and live blocks added per call
+    :rtype: dict
+    """
+    function()
+    calls = 0
+    start = time.perf_counter()
+    elapsed = 0
+    while elapsed < min_time and calls < max_calls:
+        function()
+        calls += 1
+        elapsed = time.perf_counter() - start
+
+    blocks = sys.getallocatedblocks()
+    tracemalloc.start()
+    function()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        'calls': calls,
+        'seconds': elapsed,
+        'calls per second': calls / elapsed if elapsed else math.inf,
+        'peak bytes per call': peak,
+        'blocks per call': sys.getallocatedblocks() - blocks
+    }
+
+
+def bench_vector(count, seed):
+    """Vector arithmetic on `count` random vectors: add, scale, subtract, normal, rotate, and reading the angle."""
+    rng = numpy.random.default_rng(seed)
+    vectors = [Physics.Vector.make_vector_from_components(x, y) for x, y in rng.uniform(-100, 100, (count, 2))]
+    out = Physics.Vector(0, 0)
+
+    def run():
+        previous = vectors[-1]
+        for v in vectors:
+            v.add_make(previous, out)
+            v.scale_make(0.5, out)
+            v.subtract_make(previous, out)
+            v.normal_make(out)
+            out.rotate(0.1)
+            out.angle
+            previous = v
+    return run
+
+
+def bench_step(count, seed):
+    """One :meth:`Engine.Engine.step` with every body moving; this replaces the old per-object update."""
+    engine = make_engine(count, seed)
+    return lambda: engine.step(Options['update interval'])
+
+
+def bench_check_collision(count, seed):
+    """:meth:`Physics.PhysicsObject.check_collision` for every body, after a broad phase rebuild."""
+    engine = make_engine(count, seed)
+    world = engine.world
+    positions = world.positions[:world.count].copy()
+    velocities = world.velocities[:world.count].copy()
+
+    def run():
+        world.positions[:world.count] = positions  # collisions change velocities; start from the same state
+        world.velocities[:world.count] = velocities
+        engine.broad_phase.rebuild(world)
+        for body in world.bodies:
+            body.check_collision(Options['update interval'])
+    return run
+
+
+def bench_narrow_phase(count, seed):
+    """:meth:`Collision.SweptNarrowPhase.resolve` for the whole world, after a broad phase rebuild."""
+    engine = make_engine(count, seed)
+    world = engine.world
+    positions = world.positions[:world.count].copy()
+    velocities = world.velocities[:world.count].copy()
+
+    def run():
+        world.positions[:world.count] = positions
+        world.velocities[:world.count] = velocities
+        engine.broad_phase.rebuild(world)
+        engine.narrow_phase.resolve(world, engine.broad_phase.pairs, Options['update interval'])
+    return run
+
+
+def bench_collide(count, seed):
+    """:meth:`Physics.PhysicsObject.collide` on `count` random pairs of bodies."""
+    engine = make_engine(count, seed)
+    rng = numpy.random.default_rng(seed)
+    bodies = engine.physics_objects
+    pairs = [(bodies[a], bodies[b]) for a, b in rng.integers(len(bodies), size=(count, 2)) if a != b]
+    velocities = engine.world.velocities[:engine.world.count].copy()
+
+    def run():
+        engine.world.velocities[:engine.world.count] = velocities
+        for a, b in pairs:
+            a.collide(b, a.displacement.add_make(a.velocity), b.displacement.add_make(b.velocity),
+                      Options['update interval'])
+    return run
+
+
+def _clear_forces(world):
+    world.forces.keep(numpy.zeros(world.forces.count, dtype=bool))
+
+
+def bench_gravitational_generator(count, seed):
+    """:meth:`Physics.GravitationalForceGenerator.update` for `count` generators between random pairs of bodies."""
+    engine = make_engine(count, seed)
+    rng = numpy.random.default_rng(seed)
+    bodies = engine.physics_objects
+    generators = [Physics.GravitationalForceGenerator(bodies[a], bodies[b])
+                  for a, b in rng.integers(len(bodies), size=(count, 2)) if a != b]
+
+    def run():
+        for generator in generators:
+            generator.update(Options['update interval'])
+        _clear_forces(engine.world)
+    return run
+
+
+def bench_drag_force(count, seed):
+    """:meth:`Physics.DragForce.update` for one DragForce per body."""
+    engine = make_engine(count, seed)
+    forces = [Physics.DragForce(body) for body in engine.physics_objects]
+
+    def run():
+        for force in forces:
+            force.update(Options['update interval'])
+    return run
+
+
+def bench_world_forces(count, seed):
+    """:meth:`World.WorldState.sum_forces` with gravity and air resistance, the whole-world version of the above."""
+    engine = make_engine(count, seed)
+    return lambda: engine.world.sum_forces(Options['update interval'], 9.8, Options['air density'])
+
+
+def bench_n_body_gravity(count, seed):
+    """:meth:`BarnesHut.NBodyGravity.forces` with the default opening angle."""
+    engine = make_engine(count, seed)
+    world = engine.world
+    gravity = BarnesHut.NBodyGravity()
+    return lambda: gravity.forces(world.positions[:world.count], world.masses[:world.count])
+
+
+BENCHMARKS = {
+    'vector': bench_vector,
+    'engine step': bench_step,
+    'check collision': bench_check_collision,
+    'narrow phase': bench_narrow_phase,
+    'collide': bench_collide,
+    'gravitational generator': bench_gravitational_generator,
+    'drag force': bench_drag_force,
+    'world forces': bench_world_forces,
+    'n-body gravity': bench_n_body_gravity
+}
+"""Benchmark name to a function taking (count, seed) and returning the function to time"""
+
+
+def make_orbit(integrator, radius=100, moon_ratio=100):
+    """
+    Builds an Engine holding a planet and a moon like :meth:`PhysicsWindow.InspectorRow.orbiter_button` makes, pulled
+    together by n-body gravity instead of a :class:`Physics.GravitationalForceGenerator` and with the moon moving at
+    the speed of a circular orbit. The planet moves the other way so the pair doesn't drift. Nothing else acts on
+    them, and sleeping is off.
+
+    :param integrator: Set as `engine.integrator`
+    :type integrator: :class:`Integrators.Integrator`
+    :param radius: Starting distance, m
+    :type radius: number
+    :param moon_ratio: Planet mass over moon mass
+    :type moon_ratio: number
+    :rtype: :class:`Engine.Engine`
+    """
+    engine = Engine.Engine()
+    engine.integrator = integrator
+    engine.sleeping = False
+    engine.n_body_gravity = BarnesHut.NBodyGravity()
+    material = Substance.MATERIALS['silver']
+    planet = Physics.PhysicsObject(material, Options['default mass'])
+    moon = Physics.PhysicsObject(material, Options['default mass'] / moon_ratio)
+    pull = (engine.n_body_gravity.gravitational_constant * planet.mass
+            * World.delivered_fraction(Options['update interval'], 1.0))
+    speed = math.sqrt(pull / radius)
+    moon.displacement = Physics.Vector.make_vector_from_components(0, -radius)
+    moon.velocity = Physics.Vector.make_directional_vector('W', speed)
+    planet.velocity = Physics.Vector.make_directional_vector('E', speed / moon_ratio)
+    engine.add(planet)
+    engine.add(moon)
+    return engine
+
+
+def integrator_accuracy(names=None, step_ticks=(0.5, 1, 2, 5, 10, 20), tolerances=(1e-2, 1e-3, 1e-4), duration=640,
+                        reference_ticks=0.1, log=print):
+    """
+    Accuracy against cost: runs the orbit from :func:`make_orbit` for `duration` ticks (about one orbit) with each
+    integrator and step length, and compares where the bodies end up with a :class:`Integrators.RungeKutta4` run
+    taking steps of `reference_ticks`. Each integrator is also run with a :class:`Integrators.StepController` at each
+    of `tolerances`, choosing its own step lengths; the evaluations of those runs include the ones spent estimating
+    the error.
+
+    The Euler integrator is run with `fixed_tick` off here so it can take longer steps like the others.
+
+    :param names: Keys of :data:`Integrators.INTEGRATORS`; all of them if None
+    :type names: list
+    :param step_ticks: Step lengths to try, in ticks
+    :type step_ticks: list
+    :param tolerances: Tolerances to try adaptive steps with, m
+    :type tolerances: list
+    :param duration: Ticks to simulate
+    :type duration: number
+    :param reference_ticks: Step length of the reference run
+    :type reference_ticks: number
+    :param log: Called with a line of text after each result
+    :type log: function
+    :return: One dict per integrator and step length or tolerance
+    :rtype: list
+    """
+    interval = Options['update interval']
+
+    def run(integrator, ticks=None, tolerance=None):
+        engine = make_orbit(integrator)
+        start = time.perf_counter()
+        if tolerance is None:
+            steps = round(duration / ticks)
+            engine.run(steps, ticks * interval)
+        else:
+            engine.step_controller = Integrators.StepController(tolerance)
+            steps = engine.advance(duration * interval)
+            if engine.owed_time > 0:  # finish at the same time as the reference
+                engine.step(engine.owed_time)
+                steps += 1
+        seconds = time.perf_counter() - start
+        evaluations = steps * integrator.evaluations
+        if tolerance is not None:
+            tries = engine.step_controller.accepted + engine.step_controller.rejected
+            evaluations += tries * 3 * integrator.evaluations
+        return engine.world.positions[:2].copy(), seconds, steps, evaluations
+
+    reference = run(Integrators.RungeKutta4(), reference_ticks)[0]
+    rows = []
+    for name in names or Integrators.INTEGRATORS:
+        runs = [(ticks, None) for ticks in step_ticks] + [('adaptive', tolerance) for tolerance in tolerances]
+        for ticks, tolerance in runs:
+            integrator = Integrators.INTEGRATORS[name]()
+            integrator.fixed_tick = False
+            if tolerance is None:
+                positions, seconds, steps, evaluations = run(integrator, ticks)
+            else:
+                positions, seconds, steps, evaluations = run(integrator, tolerance=tolerance)
+            error = float(numpy.hypot(*(positions - reference).T).max())
+            rows.append({
+                'integrator': name,
+                'ticks per step': ticks,
+                'tolerance': tolerance,
+                'steps': steps,
+                'evaluations': evaluations,
+                'seconds': seconds,
+                'error': error
+            })
+            label = '%g ticks/step' % ticks if tolerance is None else 'adaptive, %g m' % tolerance
+            log('%-10s %-18s %6d steps  %8.4f s  %12.6g m' % (name, label, steps, seconds, error))
+    return rows
+
+
+def parallel_scaling(count=100000, workers=(1, 2, 4, 8), steps=10, seed=0, log=print):
+    """
+    Throughput against worker processes: steps a world of `count` bodies spread out over 10000 m^2 each, with
+    gravity, in the main process and then with a :class:`Parallel.TiledExecutor` of each number of `workers`, and
+    checks every tiled run ends where the main process run does.
+
+    :param count: Number of bodies
+    :type count: int
+    :param workers: Worker counts to try
+    :type workers: list
+    :param steps: Steps timed for each
+    :type steps: int
+    :param seed: Seed for the scenario
+    :type seed: int
+    :param log: Called with a line of text after each result
+    :type log: function
+    :return: One dict per worker count; 0 workers is the main process
+    :rtype: list
+    """
+    rows = []
+    reference = None
+    for k in (0,) + tuple(workers):
+        engine = make_engine(count, seed, area=10000)
+        engine.gravity = 9.8
+        if k:
+            engine.tiles = Parallel.TiledExecutor(k, min_bodies=0)
+        try:
+            engine.step(Options['update interval'])  # starts the workers
+            start = time.perf_counter()
+            engine.run(steps)
+            seconds = time.perf_counter() - start
+        finally:
+            if engine.tiles is not None:
+                engine.tiles.close()
+        positions = engine.world.positions[:engine.world.count]
+        if reference is None:
+            reference = positions.copy()
+        rows.append({
+            'workers': k,
+            'steps per second': steps / seconds,
+            'speedup': steps / seconds / rows[0]['steps per second'] if rows else 1.0,
+            'matches': bool(numpy.array_equal(positions, reference))
+        })
+        log('%2d workers  %8.2f steps/s  %5.2fx  %s' % (k, rows[-1]['steps per second'], rows[-1]['speedup'],
+                                                         'same' if rows[-1]['matches'] else 'DIFFERENT'))
+    return rows
+
+
+def bounce_heights(narrow_phases=None, bounces=20, max_steps=20000, log=print):
+    """
+    Energy check for the narrow phases: drops one body of each material from the middle of the canvas with gravity
+    and no air, and records the highest point it reaches after each bounce off the floor. A bounce never adds
+    energy, so no bounce should go higher than the body was dropped from, give or take one update's travel at its
+    fastest, since a bounce can fall anywhere inside an update.
+
+    :param narrow_phases: Keys of :data:`Collision.NARROW_PHASES`; all of them if None
+    :type narrow_phases: list
+    :param bounces: Bounces recorded for each body
+    :type bounces: int
+    :param max_steps: Most steps run for each body
+    :type max_steps: int
+    :param log: Called with a line of text after each result
+    :type log: function
+    :return: One dict per narrow phase and material
+    :rtype: list
+    """
+    rows = []
+    for name in narrow_phases or Collision.NARROW_PHASES:
+        for material in sorted(Substance.MATERIALS):
+            engine = Engine.Engine()
+            engine.narrow_phase = Collision.NARROW_PHASES[name]()
+            engine.gravity = 9.8
+            dropped = (engine.min_y + engine.max_y) / 2
+            body = Physics.PhysicsObject(Substance.MATERIALS[material], Options['default mass'])
+            body.displacement = Physics.Vector.make_vector_from_components((engine.min_x + engine.max_x) / 2, dropped)
+            engine.add(body)
+            world = engine.world
+            heights = []
+            top_speed = 0
+            for _ in range(max_steps):
+                falling = world.velocities[0, 1] < 0
+                engine.step(Options['update interval'])
+                top_speed = max(top_speed, float(numpy.abs(world.velocities[0]).max()))
+                if falling and world.velocities[0, 1] > 0:
+                    if len(heights) == bounces:
+                        break
+                    heights.append(-math.inf)
+                if heights:
+                    heights[-1] = max(heights[-1], float(world.positions[0, 1]))
+            rising = max(heights, default=-math.inf) > dropped + top_speed
+            rows.append({
+                'narrow phase': name,
+                'material': material,
+                'dropped from': dropped,
+                'heights': heights,
+                'rising': rising
+            })
+            log('%-8s %-8s %3d bounces  highest %8.1f m  %s' % (name, material, len(heights),
+                                                               max(heights, default=math.nan),
+                                                               'RISING' if rising else 'ok'))
+    return rows
+
+
+def git_revision():
+    """
+    :return: The commit the working tree is at, or None outside a git checkout
+    :rtype: str
+    """
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(names=None, counts=DEFAULT_COUNTS, seed=0, min_time=0.2, log=print):
+    """
+    Runs benchmarks and collects their results.
+
+    :param names: Keys of :data:`BENCHMARKS` to run; all of them if None
+    :type names: list
+    :param counts: Body counts to run each benchmark at
+    :type counts: list
+    :param seed: Seed for every scenario
+    :type seed: int
+    :param min_time: Seconds to spend timing each benchmark at each count
+    :type min_time: number
+    :param log: Called with a line of text after each result
+    :type log: function
+    :return: Run information and a 'results' dict of benchmark name -> body count -> measurement
+    :rtype: dict
+    """
+    results = {}
+    for name in names or BENCHMARKS:
+        results[name] = {}
+        for count in counts:
+            result = measure(BENCHMARKS[name](count, seed), min_time)
+            results[name][str(count)] = result
+            log('%-24s %6d  %12.1f calls/s  %10d peak bytes' % (name, count, result['calls per second'],
+                                                               result['peak bytes per call']))
+    return {
+        'revision': git_revision(),
+        'date': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'numpy': numpy.__version__,
+        'machine': platform.machine(),
+        'seed': seed,
+        'results': results
+    }
+
+
+def compare(baseline, current, threshold=0.1):
+    """
+    Lines describing how each result in `current` changed from `baseline`.
+
+    :param baseline: Output of :func:`run_benchmarks` from an earlier version
+    :type baseline: dict
+    :param current: Output of :func:`run_benchmarks`
+    :type current: dict
+    :param threshold: Fractional slow down flagged as a regression
+    :type threshold: number
+    :rtype: list
+    """
+    lines = []
+    for name, by_count in current['results'].items():
+        for count, result in by_count.items():
+            old = baseline['results'].get(name, {}).get(count)
+            if old is None:
+                continue
+            ratio = result['calls per second'] / old['calls per second']
+            flag = 'REGRESSION' if ratio < 1 - threshold else ''
+            lines.append('%-24s %6s  %6.2fx  %s' % (name, count, ratio, flag))
+    return lines
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description='Time the physics code without the UI.')
+    parser.add_argument('--counts', type=int, nargs='+', default=DEFAULT_COUNTS, help='body counts')
+    parser.add_argument('--only', nargs='+', choices=sorted(BENCHMARKS), help='benchmarks to run')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--min-time', type=float, default=0.2, help='seconds to time each result for')
+    parser.add_argument('--out', default='benchmark_results.json', help='JSON file to write')
+    parser.add_argument('--baseline', help='JSON file from an earlier run to compare against')
+    parser.add_argument('--integrators', action='store_true',
+                        help='also measure the accuracy against cost of each integrator')
+    parser.add_argument('--parallel', type=int, nargs='*', metavar='WORKERS',
+                        help='also measure steps per second of a 100000 body world on worker processes')
+    parser.add_argument('--bounce', action='store_true',
+                        help='also check a lone body never bounces higher with each narrow phase')
+    args = parser.parse_args(arguments)
+
+    current = run_benchmarks(args.only, args.counts, args.seed, args.min_time)
+    if args.integrators:
+        current['integrator accuracy'] = integrator_accuracy()
+    if args.parallel is not None:
+        current['parallel scaling'] = parallel_scaling(workers=args.parallel or (1, 2, 4, 8))
+    if args.bounce:
+        current['bounce heights'] = bounce_heights()
+    with open(args.out, 'w') as f:
+        json.dump(current, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        print('\nchange since %s:' % baseline.get('revision'))
+        for line in compare(baseline, current):
+            print(line)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,201 @@
+"""Broad-phase collision culling.
+
+Testing every PhysicsObject against every other one costs :math:`O(n^2)` per update. The broad phase is rebuilt once
+per update from the :class:`World.WorldState` arrays and hands out, for each body, the short list of other bodies
+whose boxes could touch it during the update. Only those candidates are passed to the narrow phase,
+:class:`Collision.SweptNarrowPhase`.
+
+There are no UI components in this module.
+"""
+
+import time
+
+import numpy
+
+
+class SpatialHashGrid:
+    """
+    A uniform grid broad phase.
+
+    Each body gets a swept box covering its current and next displacement (displacement plus its motion over the
+    update, which is its velocity for a one tick update), grown by its side. Each box is hashed into the grid cell holding its center. The cell size is the widest box no wider than
+    :attr:`CELL_GROWTH` times the :attr:`CELL_PERCENTILE` percentile of the box sizes. Two boxes no bigger than a cell
+    can only overlap if their cells are neighbours; the grid therefore only compares bodies in the same or adjacent
+    cells, and keeps the pairs whose boxes really overlap. The few boxes bigger than a cell - e.g. of a body moving much faster than the rest -
+    are left out of the grid and compared with every other box instead, so they don't coarsen the grid for everyone.
+
+    Sleeping bodies (see :meth:`World.WorldState.update_sleep`) are only searched from: when some bodies are
+    asleep, the grid looks around each awake body and pairs of sleeping bodies are never made, so a settled pile
+    costs little more than sorting it.
+
+    The whole rebuild is done with array operations - the only per-body Python loop is over the oversized boxes.
+
+    :param cell_size: Minimum cell size in m. If 0, the cell size comes from the swept boxes alone.
+    :type cell_size: number
+    """
+    NEIGHBOUR_OFFSETS = ((0, 0), (1, -1), (1, 0), (1, 1), (0, 1))
+    """Half of the 3x3 neighbourhood; together with symmetry this visits every adjacent pair of cells once"""
+    ALL_OFFSETS = tuple((dx, dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1))
+    """The whole 3x3 neighbourhood, searched around awake bodies only when some bodies are asleep"""
+    CELL_PERCENTILE = 99
+    """Percentile of the swept box sizes that bounds the cell size"""
+    CELL_GROWTH = 4
+    """How many times that percentile a box may be and still set the cell size; bigger boxes are compared with every
+    box"""
+
+    def __init__(self, cell_size=0):
+        self.cell_size = cell_size
+        """Requested minimum cell size"""
+        self.used_cell_size = 0
+        """Cell size chosen on the last rebuild"""
+        self.oversized_count = 0
+        """Number of boxes bigger than a cell on the last rebuild"""
+        self.body_count = 0
+        """Number of bodies on the last rebuild"""
+        self.pair_count = 0
+        """Number of candidate pairs found on the last rebuild"""
+        self.rebuild_time = 0
+        """Seconds spent in the last rebuild"""
+        self.pairs = numpy.zeros((0, 2), dtype=numpy.int64)
+        """Candidate pairs as rows (a, b) with a < b"""
+        self._offsets = numpy.zeros(1, dtype=numpy.int64)
+        self._partners = numpy.zeros(0, dtype=numpy.int64)
+
+    def rebuild(self, world, motions=None):
+        """
+        Rebuilds the grid and candidate pairs from the current state of `world`.
+
+        :param world: The world to index
+        :type world: :class:`World.WorldState`
+        :param motions: How far each body moves during the update, from :meth:`World.WorldState.integrate`; one tick
+            of velocity if None
+        :type motions: numpy.ndarray
+        """
+        start = time.perf_counter()
+        n = world.count
+        positions = world.positions[:n]
+        next_positions = positions + (world.velocities[:n] if motions is None else motions[:n])
+        sides = world.sides[:n, None]
+        lows = numpy.minimum(positions, next_positions) - sides
+        highs = numpy.maximum(positions, next_positions) + sides
+
+        pair_a = []
+        pair_b = []
+        cell_size = 0
+        oversized_count = 0
+        if n > 1:
+            extents = (highs - lows).max(axis=1)
+            typical = self.CELL_GROWTH * float(numpy.percentile(extents, self.CELL_PERCENTILE))
+            cell_size = max(self.cell_size, float(extents[extents <= typical].max()))
+            if cell_size <= 0:
+                cell_size = 1
+            awake = world.awake[:n]
+            oversized = extents > cell_size
+            rows = numpy.flatnonzero(~oversized)
+            cells = numpy.floor((lows[rows] + highs[rows]) / (2 * cell_size)).astype(numpy.int64)
+            cells -= cells.min(axis=0) - 1  # keep a border of empty cells so neighbour keys never wrap
+            stride = int(cells[:, 1].max()) + 2
+            keys = cells[:, 0] * stride + cells[:, 1]
+            by_key = numpy.argsort(keys, kind='stable')
+            order = rows[by_key]
+            sorted_keys = keys[by_key]
+            if awake.all():
+                offsets = self.NEIGHBOUR_OFFSETS
+                searched = order
+                searched_keys = sorted_keys
+            else:
+                offsets = self.ALL_OFFSETS
+                searched = order[awake[order]]
+                searched_keys = sorted_keys[awake[order]]
+            for dx, dy in offsets:
+                target = searched_keys + (dx * stride + dy)  # searching in sorted order is much more cache friendly
+                first = numpy.searchsorted(sorted_keys, target, 'left')
+                counts = numpy.searchsorted(sorted_keys, target, 'right') - first
+                total = int(counts.sum())
+                if total == 0:
+                    continue
+                a = numpy.repeat(searched, counts)
+                run_starts = numpy.repeat(numpy.cumsum(counts) - counts, counts)
+                b = order[numpy.repeat(first, counts) + numpy.arange(total) - run_starts]
+                if offsets is not self.NEIGHBOUR_OFFSETS:
+                    keep = (a < b) | ~awake[b]  # pairs of awake bodies are found from both ends
+                    a = a[keep]
+                    b = b[keep]
+                elif dx == 0 and dy == 0:
+                    keep = a < b
+                    a = a[keep]
+                    b = b[keep]
+                touching = numpy.all((lows[a] <= highs[b]) & (lows[b] <= highs[a]), axis=1)
+                pair_a.append(a[touching])
+                pair_b.append(b[touching])
+
+            big = numpy.flatnonzero(oversized)
+            oversized_count = len(big)
+            for a in big.tolist():
+                touching = numpy.all((lows[a] <= highs) & (lows <= highs[a]), axis=1)
+                touching[a] = False
+                if not awake[a]:
+                    touching &= awake
+                touching &= ~oversized | (numpy.arange(n) > a)  # pairs of oversized boxes are found once
+                b = numpy.flatnonzero(touching)
+                pair_a.append(numpy.full(len(b), a, dtype=numpy.int64))
+                pair_b.append(b)
+
+        if pair_a:
+            a = numpy.concatenate(pair_a)
+            b = numpy.concatenate(pair_b)
+            pairs = numpy.stack((numpy.minimum(a, b), numpy.maximum(a, b)), axis=1)
+        else:
+            pairs = numpy.zeros((0, 2), dtype=numpy.int64)
+        self.used_cell_size = cell_size
+        self.oversized_count = oversized_count
+        self.use_pairs(pairs, n)
+        self.rebuild_time = time.perf_counter() - start
+
+    def use_pairs(self, pairs, n):
+        """
+        Takes candidate pairs found elsewhere, e.g. merged from the tiles of a :class:`Parallel.TiledExecutor`, as
+        if a rebuild had found them.
+
+        :param pairs: Candidate pairs as rows (a, b) with a < b
+        :type pairs: numpy.ndarray
+        :param n: Number of bodies in the world
+        :type n: int
+        """
+        self.pairs = pairs
+        self.body_count = n
+        self.pair_count = len(self.pairs)
+        self._offsets = None
+
+    def candidates(self, index):
+        """
+        Rows of the bodies that may collide with the body in row `index` during this update, in ascending order.
+
+        :param index: A row of the world passed to the last :meth:`rebuild`
+        :type index: int
+        :rtype: list
+        """
+        if index >= self.body_count:
+            return []
+        if self._offsets is None:
+            # per-body partner lists, sorted by row so they are visited in the same order as the physics_objects
+            # list; only made when first asked for, since the narrow phases work from self.pairs
+            source = numpy.concatenate((self.pairs[:, 0], self.pairs[:, 1]))
+            partner = numpy.concatenate((self.pairs[:, 1], self.pairs[:, 0]))
+            order = numpy.lexsort((partner, source))
+            self._partners = partner[order]
+            self._offsets = numpy.searchsorted(source[order], numpy.arange(self.body_count + 1))
+        return self._partners[self._offsets[index]:self._offsets[index + 1]].tolist()
+
+    def stats(self):
+        """
+        :return: Counters from the last rebuild, for logging and benchmarks
+        :rtype: dict
+        """
+        return {
+            'bodies': self.body_count,
+            'pairs': self.pair_count,
+            'cell size': self.used_cell_size,
+            'oversized': self.oversized_count,
+            'rebuild time': self.rebuild_time
+        }
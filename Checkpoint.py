@@ -0,0 +1,284 @@
+"""Saving and loading the state of an :class:`Engine.Engine`.
+
+A checkpoint file holds every body, the material of each body, the forces acting on them, the
+:class:`Physics.GravitationalForceGenerator` links between them, the engine's environment (gravity, air, n-body
+gravity, time) and the Options in effect when it was saved.
+
+Layout of a file:
+
+- 8 bytes: ``PHYSCKPT``
+- 4 bytes: format version, little-endian
+- 4 bytes: unused
+- 8 bytes: length of the header, little-endian
+- the header, JSON: everything that isn't an array, plus the dtype, shape and offset of each array
+- the arrays, raw, each starting on a 64 byte boundary
+
+Because the arrays are stored raw, :func:`read` can memory-map them instead of reading them, and :func:`load` copies
+them into a world with one bulk copy per column - there is no per-body parsing. The values are exact, so a loaded
+checkpoint carries on exactly as the saved engine would have.
+
+There are no UI components in this module.
+"""
+
+import json
+import struct
+
+import numpy
+
+from Options import Options
+import World
+import Physics
+import Substance
+import BarnesHut
+import Integrators
+
+MAGIC = b'PHYSCKPT'
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+_PREFIX = struct.Struct('<8sIIQ')
+
+
+def _aligned(offset):
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def _table(layout):
+    """Offsets of arrays laid out one after another, each aligned; layout is name to (dtype, shape)"""
+    table = []
+    offset = 0
+    for name, (dtype, shape) in layout.items():
+        dtype = numpy.dtype(dtype)
+        table.append({'name': name, 'dtype': dtype.str, 'shape': list(shape), 'offset': offset})
+        offset = _aligned(offset + dtype.itemsize * int(numpy.prod(shape)))
+    return table, offset
+
+
+def _write_header(f, header, table):
+    encoded = json.dumps(dict(header, arrays=table)).encode('utf-8')
+    f.write(_PREFIX.pack(MAGIC, FORMAT_VERSION, 0, len(encoded)))
+    f.write(encoded)
+    return _aligned(_PREFIX.size + len(encoded))
+
+
+def write(path, header, arrays):
+    """
+    Writes a header and named arrays in the checkpoint layout.
+
+    :param path: File to write
+    :type path: str
+    :param header: Anything JSON can store
+    :type header: dict
+    :param arrays: Name to array
+    :type arrays: dict
+    """
+    arrays = {name: numpy.ascontiguousarray(array) for name, array in arrays.items()}
+    table, size = _table({name: (array.dtype, array.shape) for name, array in arrays.items()})
+    with open(path, 'wb') as f:
+        data_start = _write_header(f, header, table)
+        for entry, array in zip(table, arrays.values()):
+            f.seek(data_start + entry['offset'])
+            f.write(array.tobytes())
+        f.truncate(data_start + size)
+
+
+def create(path, header, layout):
+    """
+    Writes a header for arrays that haven't been filled in yet and sizes the file to hold them, then memory-maps
+    them for writing. The arrays start out zeroed.
+
+    :param path: File to write
+    :type path: str
+    :param header: Anything JSON can store
+    :type header: dict
+    :param layout: Name to (dtype, shape)
+    :type layout: dict
+    :return: Name to writable numpy.memmap
+    :rtype: dict
+    """
+    table, size = _table(layout)
+    with open(path, 'wb') as f:
+        data_start = _write_header(f, header, table)
+        f.truncate(data_start + size)
+    return read(path, writable=True)[1]
+
+
+def read(path, mmap=True, writable=False):
+    """
+    Reads a file written by :func:`write` or :func:`create`.
+
+    :param path: File to read
+    :type path: str
+    :param mmap: If True the arrays are memory maps of the file, so nothing is read until it's used
+    :type mmap: bool
+    :param writable: If True the memory maps can be written to, changing the file
+    :type writable: bool
+    :return: The header, and a dict of name to array
+    :rtype: tuple
+    """
+    with open(path, 'rb') as f:
+        magic, version, unused, length = _PREFIX.unpack(f.read(_PREFIX.size))
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a checkpoint")
+        if version > FORMAT_VERSION:
+            raise ValueError(f"{path} is checkpoint version {version}; this version reads up to {FORMAT_VERSION}")
+        header = json.loads(f.read(length).decode('utf-8'))
+        data_start = _aligned(_PREFIX.size + length)
+        arrays = {}
+        for entry in header.pop('arrays'):
+            dtype = numpy.dtype(entry['dtype'])
+            shape = tuple(entry['shape'])
+            offset = data_start + entry['offset']
+            if mmap and numpy.prod(shape) > 0:
+                arrays[entry['name']] = numpy.memmap(path, dtype, 'r+' if writable else 'r', offset, shape)
+            else:
+                f.seek(offset)
+                count = int(numpy.prod(shape))
+                arrays[entry['name']] = numpy.fromfile(f, dtype, count).reshape(shape)
+    return header, arrays
+
+
+def _json_options():
+    options = {}
+    for key, value in Options.items():
+        try:
+            json.dumps(value)
+        except TypeError:
+            continue
+        options[key] = value
+    return options
+
+
+def save(engine, path):
+    """
+    Writes the whole state of `engine` to `path`.
+
+    :param engine: The engine to save
+    :type engine: :class:`Engine.Engine`
+    :param path: File to write
+    :type path: str
+    """
+    with engine.lock:
+        world = engine.world
+        n = world.count
+        # rows of the material table only mean something in this process, so only the materials in use are saved,
+        # numbered from 0
+        used, body_materials = numpy.unique(world.column('material_ids'), return_inverse=True)
+        materials = [[m.name, m.density, m.color, m.restitution, m.friction, m.drag_coefficient]
+                     for m in (world.materials.materials[i] for i in used.tolist())]
+
+        arrays = {name: world.column(name) for name in world.COLUMNS if name not in world.MATERIAL_COLUMNS}
+        arrays['materials'] = body_materials.astype(numpy.int32)
+        arrays['volumes'] = numpy.array([body.volume for body in world.bodies], dtype=numpy.float64)
+        forces = world.forces
+        arrays['force targets'] = forces.targets[:forces.count]
+        arrays['force vectors'] = forces.vectors[:forces.count]
+        arrays['force remaining'] = forces.remaining[:forces.count]
+        arrays['force constant'] = forces.constant[:forces.count]
+        links = [(f.planet.index, f.moon.index) for f in engine.interacting_forces
+                 if isinstance(f, Physics.GravitationalForceGenerator) and f.planet.world is world]
+        arrays['gravity links'] = numpy.array(links, dtype=numpy.int64).reshape(-1, 2)
+
+        n_body = engine.n_body_gravity
+        controller = engine.step_controller
+        header = {
+            'count': n,
+            'materials': materials,
+            'engine': {
+                'tick': engine.tick,
+                'time': engine.time,
+                'gravity': engine.gravity,
+                'air density': engine.air_density,
+                'sleeping': engine.sleeping,
+                'integrator': {'name': engine.integrator.name, 'fixed tick': engine.integrator.fixed_tick},
+                'step controller': None if controller is None else {
+                    'tolerance': controller.tolerance,
+                    'min ticks': controller.min_ticks,
+                    'max ticks': controller.max_ticks,
+                    'ticks': controller.ticks
+                },
+                'bounds': [engine.min_x, engine.max_x, engine.min_y, engine.max_y],
+                'next island': world.next_island,
+                'n-body gravity': None if n_body is None else {
+                    'theta': n_body.theta,
+                    'gravitational constant': n_body.gravitational_constant,
+                    'softening': n_body.softening,
+                    'exact threshold': n_body.exact_threshold
+                }
+            },
+            'options': _json_options()
+        }
+        write(path, header, arrays)
+
+
+def _material(name, density, color, restitution=1.0, friction=0.0, drag_coefficient=0.8):
+    """
+    A material of Substance.TABLE with the same name and properties if there is one - from Substance.MATERIALS or an
+    earlier load - otherwise a new one, so loading the same file again doesn't grow the table.
+    """
+    for material in Substance.TABLE.materials:
+        if (material.name == name and material.density == density and material.color == color
+                and material.restitution == restitution and material.friction == friction
+                and material.drag_coefficient == drag_coefficient):
+            return material
+    return Substance.Material(density, color, name, restitution, friction, drag_coefficient)
+
+
+def load(path, engine, apply_options=False):
+    """
+    Adds the bodies, forces and links saved in `path` to `engine`, and sets its environment and time to the saved
+    ones. Call :meth:`Engine.Engine.clear` first to replace what the engine holds instead of adding to it.
+
+    :param path: File written by :func:`save`
+    :type path: str
+    :param engine: The engine to load into
+    :type engine: :class:`Engine.Engine`
+    :param apply_options: If True, Options is also updated with the saved values
+    :type apply_options: bool
+    :return: The PhysicsObjects that were added, in saved order
+    :rtype: list
+    """
+    header, arrays = read(path)
+    materials = [_material(*m) for m in header['materials']]
+    bodies = [Physics.PhysicsObject.without_row(v) for v in arrays['volumes'].tolist()]
+    columns = {name: arrays[name] for name in World.WorldState.COLUMNS if name in arrays}
+    material_ids = numpy.array([m.index for m in materials], dtype=numpy.int32)
+    columns['material_ids'] = material_ids[arrays['materials']]
+    saved = header['engine']
+
+    with engine.lock:
+        world = engine.world
+        first_island = world.next_island  # keep saved islands apart from any already in the world
+        columns['islands'] = columns['islands'] + first_island
+        start = engine.extend(bodies, columns)
+        world.next_island = max(world.next_island, first_island + saved['next island'])
+        world.forces.extend(arrays['force targets'] + start, arrays['force vectors'], arrays['force remaining'],
+                            arrays['force constant'])
+        for planet, moon in arrays['gravity links'].tolist():
+            engine.add_interacting_force(Physics.GravitationalForceGenerator(bodies[planet], bodies[moon]))
+
+        engine.tick = saved['tick']
+        engine.time = saved['time']
+        engine.gravity = saved['gravity']
+        engine.air_density = saved['air density']
+        engine.sleeping = saved['sleeping']
+        integrator = saved.get('integrator')  # not in checkpoints from before integrators could be chosen
+        if integrator is not None:
+            engine.integrator = Integrators.INTEGRATORS[integrator['name']]()
+            engine.integrator.fixed_tick = integrator['fixed tick']
+        if 'step controller' in saved:  # likewise
+            controller = saved['step controller']
+            engine.step_controller = None if controller is None else Integrators.StepController(
+                controller['tolerance'], controller['min ticks'], controller['max ticks'])
+            if controller is not None:
+                engine.step_controller.ticks = controller['ticks']
+        engine.next_dt = None
+        engine.min_x, engine.max_x, engine.min_y, engine.max_y = saved['bounds']
+        n_body = saved['n-body gravity']
+        engine.n_body_gravity = None if n_body is None else BarnesHut.NBodyGravity(
+            n_body['theta'], n_body['gravitational constant'], n_body['softening'], n_body['exact threshold'])
+        engine.keep_sleeping()
+        engine.previous_positions = world.positions[:world.count].copy()
+
+    if apply_options:
+        Options.update(header['options'])
+    return bodies
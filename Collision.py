@@ -0,0 +1,559 @@
+"""Continuous collision detection.
+
+Each body moves by its velocity in one update. Checking only where bodies end up lets a fast body jump straight
+over another one, so instead each candidate pair from the broad phase is swept: the boxes move along their paths
+and the time of impact - the first moment during the update at which they touch - is worked out exactly.
+
+Time is measured as a fraction of the update: 0 is where the bodies are now, 1 is where their motion for the update
+(their velocity, unless an integrator says otherwise) would take them.
+
+Two narrow phases resolve what the sweep finds, chosen with `Options['narrow phase']`:
+
+- :class:`Collision.SweptNarrowPhase` resolves the earliest collision of each body on its own, and leaves any other
+  contact of that body to the next update.
+- :class:`Collision.ContactSolver` gathers every contact of the update and resolves them together with sequential
+  impulses, so a stack or a cluster settles in one update instead of one contact per update.
+
+There are no UI components in this module.
+"""
+
+import time
+
+import numpy
+
+from Options import Options
+
+
+def times_of_impact(positions, velocities, sides, a, b):
+    """
+    Swept box test for pairs of bodies.
+
+    Each body is a square reaching `side` from its center. Along each axis, the two boxes overlap between an entry
+    and an exit time; they touch while both axes overlap, so the time of impact is the later entry time as long as
+    it comes before the earlier exit time.
+
+    Pairs that already overlap at the start count as touching at time 0 if they are moving towards each other, and
+    as not touching if they are moving apart, so overlapping bodies are left to separate instead of sticking.
+
+    :param positions: Displacement of every body
+    :type positions: numpy.ndarray
+    :param velocities: Velocity of every body, m per update
+    :type velocities: numpy.ndarray
+    :param sides: Side of every body
+    :type sides: numpy.ndarray
+    :param a: First body of each pair
+    :type a: numpy.ndarray
+    :param b: Second body of each pair
+    :type b: numpy.ndarray
+    :return: Time of impact of each pair between 0 and 1, or inf if they don't touch during the update
+    :rtype: numpy.ndarray
+    """
+    offsets = positions[b] - positions[a]
+    closing = velocities[b] - velocities[a]
+    reach = (sides[a] + sides[b])[:, None]
+    still = closing == 0
+    inside = numpy.abs(offsets) <= reach
+    with numpy.errstate(divide='ignore', invalid='ignore'):
+        t1 = (-reach - offsets) / closing
+        t2 = (reach - offsets) / closing
+    entry = numpy.where(still, numpy.where(inside, -numpy.inf, numpy.inf), numpy.minimum(t1, t2)).max(axis=1)
+    leave = numpy.where(still, numpy.where(inside, numpy.inf, -numpy.inf), numpy.maximum(t1, t2)).min(axis=1)
+    approaching = numpy.einsum('ij,ij->i', offsets, closing) < 0
+    touching = (entry <= leave) & (entry <= 1) & (leave >= 0) & ((entry >= 0) | approaching)
+    return numpy.where(touching, numpy.maximum(entry, 0), numpy.inf)
+
+
+def pair_coefficients(world, a, b):
+    """
+    :param world: The world holding the bodies
+    :type world: :class:`World.WorldState`
+    :param a: First body of each pair
+    :type a: numpy.ndarray
+    :param b: Second body of each pair
+    :type b: numpy.ndarray
+    :return: The restitution of each pair, the larger of its two materials', and the friction coefficient of each
+        pair, the geometric mean of its two materials'
+    :rtype: tuple
+    """
+    rows = world.materials.rows
+    material_a = world.material_ids[a]
+    material_b = world.material_ids[b]
+    restitution = numpy.maximum(rows['restitution'][material_a], rows['restitution'][material_b])
+    friction = numpy.sqrt(rows['friction'][material_a] * rows['friction'][material_b])
+    return restitution, friction
+
+
+def contact_normals(positions, sides, a, b):
+    """
+    Normals for pairs of boxes that are touching or about to. The normal of a pair points from a to b along the axis
+    on which the boxes are furthest apart - or, if they overlap on both, overlap least - since that is the face they
+    meet on.
+
+    :param positions: Displacement of every body
+    :type positions: numpy.ndarray
+    :param sides: Side of every body
+    :type sides: numpy.ndarray
+    :param a: First body of each pair
+    :type a: numpy.ndarray
+    :param b: Second body of each pair
+    :type b: numpy.ndarray
+    :return: The unit normal of each pair, and the gap between the boxes along it (negative if they overlap)
+    :rtype: tuple
+    """
+    offsets = positions[b] - positions[a]
+    gaps = numpy.abs(offsets) - (sides[a] + sides[b])[:, None]
+    axes = numpy.argmax(gaps, axis=1)
+    rows = numpy.arange(len(a))
+    directions = numpy.sign(offsets[rows, axes])
+    directions[directions == 0] = 1
+    normals = numpy.zeros((len(a), 2))
+    normals[rows, axes] = directions
+    return normals, gaps[rows, axes]
+
+
+def independent_batches(a, b, n):
+    """
+    Splits pairs into batches in which no body appears twice, so a whole batch can be updated with fancy indexing
+    without two pairs writing to the same body. Each batch takes, in order, every remaining pair that is the first
+    remaining pair of both of its bodies.
+
+    :param a: First body of each pair
+    :type a: numpy.ndarray
+    :param b: Second body of each pair
+    :type b: numpy.ndarray
+    :param n: Number of bodies
+    :type n: int
+    :return: Arrays of pair numbers, one per batch
+    :rtype: list
+    """
+    batches = []
+    remaining = numpy.arange(len(a))
+    first = numpy.empty(n, dtype=numpy.int64)
+    while len(remaining):
+        first.fill(len(a))
+        numpy.minimum.at(first, a[remaining], remaining)
+        numpy.minimum.at(first, b[remaining], remaining)
+        free = (first[a[remaining]] == remaining) & (first[b[remaining]] == remaining)
+        batches.append(remaining[free])
+        remaining = remaining[~free]
+    return batches
+
+
+def elastic_response(world, a, b):
+    """
+    Whole-array version of :meth:`Physics.PhysicsObject.collide` for pairs that share no body.
+
+    The velocities along the line between the centers are exchanged as in a 1-D collision that keeps the larger
+    restitution of the two materials (fully elastic, as in :meth:`Physics.PhysicsObject.collide`, for the default
+    restitution of 1). If the materials have friction, the sliding of the pair across that line is slowed by at most
+    the friction coefficient times the impulse along it, the coefficient of a pair being the geometric mean of the
+    two; otherwise the velocities across the line are unchanged. Every material number is gathered for all pairs at
+    once from `world.materials`.
+
+    :param world: The world holding the bodies
+    :type world: :class:`World.WorldState`
+    :param a: First body of each pair
+    :type a: numpy.ndarray
+    :param b: Second body of each pair
+    :type b: numpy.ndarray
+    """
+    positions = world.positions
+    velocities = world.velocities
+    e, mu = pair_coefficients(world, a, b)
+    normals = positions[b] - positions[a]
+    lengths = numpy.hypot(normals[:, 0], normals[:, 1])
+    same = lengths == 0
+    normals[same] = (1, 0)
+    lengths[same] = 1
+    normals /= lengths[:, None]
+    m_1 = world.masses[a]
+    m_2 = world.masses[b]
+    v_1 = velocities[a]
+    v_2 = velocities[b]
+    v1_n = numpy.einsum('ij,ij->i', v_1, normals)
+    v2_n = numpy.einsum('ij,ij->i', v_2, normals)
+    v_1f = (v1_n*(m_1-e*m_2)+(1+e)*m_2*v2_n)/(m_1+m_2)
+    v_2f = (v2_n*(m_2-e*m_1)+(1+e)*m_1*v1_n)/(m_1+m_2)
+    velocities[a] = v_1 + (v_1f - v1_n)[:, None] * normals
+    velocities[b] = v_2 + (v_2f - v2_n)[:, None] * normals
+    if mu.any():
+        tangents = numpy.stack((-normals[:, 1], normals[:, 0]), axis=1)
+        sliding = numpy.einsum('ij,ij->i', v_2 - v_1, tangents)
+        limit = mu * numpy.abs(m_1 * (v_1f - v1_n))
+        impulses = numpy.clip(sliding * m_1 * m_2 / (m_1 + m_2), -limit, limit)
+        velocities[a] += (impulses / m_1)[:, None] * tangents
+        velocities[b] -= (impulses / m_2)[:, None] * tangents
+
+
+class SweptNarrowPhase:
+    """
+    Finds and resolves the collisions of one update.
+
+    Every candidate pair from the broad phase gets a time of impact. The pairs are handled earliest first: both
+    bodies are moved to where they touch, :func:`Collision.elastic_response` works out their new velocities, and
+    they spend the rest of the update moving with those. A body collides at most once per update; a second
+    contact during the rest of the update is found on the next one. Sleeping bodies that get hit are woken.
+    """
+    def __init__(self):
+        self.contact_count = 0
+        """Collisions resolved on the last update"""
+        self.resolve_time = 0
+        """Seconds spent in the last update"""
+
+    def resolve(self, world, pairs, interval, motions=None, ticks=1, floor_y=None):
+        """
+        Moves every body in `world` through one update, resolving collisions on the way. Bodies that collide spend
+        the rest of the update moving with their new velocity.
+
+        :param world: The world to advance
+        :type world: :class:`World.WorldState`
+        :param pairs: Candidate pairs as rows (a, b), e.g. :attr:`Broadphase.SpatialHashGrid.pairs`
+        :type pairs: numpy.ndarray
+        :param interval: Time of the update, seconds
+        :type interval: number
+        :param motions: How far each body moves during the update, from :meth:`World.WorldState.integrate`; its
+            velocity if None
+        :type motions: numpy.ndarray
+        :param ticks: Length of the update in ticks, see :mod:`Integrators`
+        :type ticks: number
+        :param floor_y: Not used; the floor is left to :meth:`World.WorldState.bounce`
+        :type floor_y: number
+        """
+        start = time.perf_counter()
+        n = world.count
+        if motions is None:
+            motions = world.velocities[:n].copy()
+        a = pairs[:, 0]
+        b = pairs[:, 1]
+        toi = times_of_impact(world.positions[:n], motions, world.sides[:n], a, b)
+        hits = numpy.flatnonzero(numpy.isfinite(toi))
+        hits = hits[numpy.lexsort((b[hits], a[hits], toi[hits]))]
+        self.resolve_hits(world, a[hits], b[hits], toi[hits], motions, ticks)
+        self.resolve_time = time.perf_counter() - start
+
+    def resolve_hits(self, world, a, b, toi, motions, ticks=1):
+        """
+        The second half of :meth:`resolve`, for pairs whose times of impact are already known: takes the pairs in
+        the order given, skipping any with a body that has already collided, resolves them, and moves every body
+        through the update.
+
+        :param world: The world to advance
+        :type world: :class:`World.WorldState`
+        :param a: First body of each pair that touches during the update, earliest first
+        :type a: numpy.ndarray
+        :param b: Second body of each pair
+        :type b: numpy.ndarray
+        :param toi: Time of impact of each pair, from :func:`Collision.times_of_impact`
+        :type toi: numpy.ndarray
+        :param motions: How far each body moves during the update
+        :type motions: numpy.ndarray
+        :param ticks: Length of the update in ticks
+        :type ticks: number
+        """
+        n = world.count
+        positions = world.positions[:n]
+        velocities = world.velocities[:n]
+        impact = numpy.zeros(n)
+        contacts = 0
+        if len(toi):
+            done = set()
+            chosen = []
+            for k, first, second in zip(range(len(toi)), a.tolist(), b.tolist()):
+                if first in done or second in done:
+                    continue
+                done.add(first)
+                done.add(second)
+                chosen.append(k)
+            chosen = numpy.array(chosen, dtype=numpy.int64)
+            first = a[chosen]
+            second = b[chosen]
+            t = toi[chosen]
+            impact[first] = t
+            impact[second] = t
+            positions[first] += t[:, None] * motions[first]
+            positions[second] += t[:, None] * motions[second]
+            elastic_response(world, first, second)
+            hit = numpy.concatenate((first, second))
+            motions[hit] = velocities[hit] * ticks
+            hit = hit[~world.awake[hit]]
+            if len(hit):
+                world.wake(hit)
+            contacts = len(chosen)
+        positions += (1 - impact)[:, None] * motions
+        self.contact_count = contacts
+
+    def stats(self):
+        """
+        :return: Counters from the last update, for logging and benchmarks
+        :rtype: dict
+        """
+        return {
+            'contacts': self.contact_count,
+            'resolve time': self.resolve_time
+        }
+
+
+class ContactSolver:
+    """
+    Finds every contact of one update and resolves them together.
+
+    Every candidate pair from the broad phase is a contact, and so is every body that may reach the floor, if one is
+    given; the floor doesn't move, whatever pushes on it. An iterative sequential-impulse solver works out the
+    velocities of all of them at once: on each pass, every contact in turn gets the impulse that makes its bodies separate along its normal at the
+    bounce speed its restitution asks for, slowed across the normal by friction. Only impacts - contacts that were
+    apart and meet during the update, faster than the restitution threshold - bounce; resting contacts just stop
+    approaching. Impulses only ever push, and friction never exceeds the friction coefficient times the push. The
+    remaining contacts are speculative: their bodies may close the gap between them, but no more. Bodies in an
+    impact move to where they first touch and finish the update with their new velocities, so they turn around
+    where they meet rather than short of each other, which would add height to every bounce. Bodies that
+    overlap anyway are then moved apart a little (Baumgarte stabilization on the positions, so it adds no speed).
+    Bodies then move with their new velocities, and sleeping bodies that got pushed are woken.
+
+    The impulses of each contact are kept, keyed by its pair of bodies, and the next update starts from them (warm
+    starting), so a resting stack starts close to the answer and needs few passes. The cache is dropped whenever rows
+    of the world are added, removed or reordered.
+
+    :param iterations: Most passes over all contacts per update
+    :type iterations: int
+    :param tolerance: The solver stops early once no pass changes a velocity by more than this, m per tick
+    :type tolerance: number
+    :param restitution_threshold: Contacts approaching slower than this don't bounce, m per tick
+    :type restitution_threshold: number
+    :param baumgarte: Share of an overlap pushed apart per update
+    :type baumgarte: number
+    :param max_correction: Most an overlap is pushed apart per update, m
+    :type max_correction: number
+    :param slop: Overlap left alone, m
+    :type slop: number
+    """
+    def __init__(self, iterations=Options['contact iterations'], tolerance=Options['contact tolerance'],
+                 restitution_threshold=Options['restitution threshold'], baumgarte=0.2, max_correction=1,
+                 slop=0.01):
+        self.iterations = iterations
+        self.tolerance = tolerance
+        self.restitution_threshold = restitution_threshold
+        self.baumgarte = baumgarte
+        self.max_correction = max_correction
+        self.slop = slop
+        self.contact_count = 0
+        """Contacts resolved on the last update"""
+        self.warm_started = 0
+        """Contacts on the last update that started from cached impulses"""
+        self.iterations_used = 0
+        """Passes the solver made on the last update"""
+        self.residual = 0
+        """Largest velocity change made by the last pass, m per tick"""
+        self.resolve_time = 0
+        """Seconds spent in the last update"""
+        self._cache_keys = numpy.zeros(0, dtype=numpy.int64)
+        self._cache_impulses = numpy.zeros((0, 2))
+        self._cache_version = None
+        self._cache_ticks = 1
+
+    def resolve(self, world, pairs, interval, motions=None, ticks=1, floor_y=None):
+        """
+        Moves every body in `world` through one update, resolving contacts on the way. Same arguments as
+        :meth:`SweptNarrowPhase.resolve`.
+
+        :param world: The world to advance
+        :type world: :class:`World.WorldState`
+        :param pairs: Candidate pairs as rows (a, b), e.g. :attr:`Broadphase.SpatialHashGrid.pairs`
+        :type pairs: numpy.ndarray
+        :param interval: Time of the update, seconds
+        :type interval: number
+        :param motions: How far each body moves during the update, from :meth:`World.WorldState.integrate`; its
+            velocity if None
+        :type motions: numpy.ndarray
+        :param ticks: Length of the update in ticks, see :mod:`Integrators`
+        :type ticks: number
+        :param floor_y: Where bodies stand on the floor, or None for no floor
+        :type floor_y: number
+        """
+        start = time.perf_counter()
+        n = world.count
+        positions = world.positions[:n]
+        velocities = world.velocities[:n]
+        sides = world.sides[:n]
+        if motions is None:
+            motions = velocities.copy()
+        self.iterations_used = 0
+        self.residual = 0
+        self.warm_started = 0
+        # every candidate pair is a contact, even if it isn't about to touch, in case the solver turns it around
+        a = pairs[:, 0]
+        b = pairs[:, 1]
+        toi = times_of_impact(positions, motions, sides, a, b)
+        gaps = contact_normals(positions, sides, a, b)[1]
+        grounded = numpy.zeros(0, dtype=numpy.int64)
+        if floor_y is not None:
+            heights = positions[:, 1] - sides - floor_y
+            grounded = numpy.flatnonzero(heights <= numpy.abs(motions).max(axis=1, initial=0) + self.slop)
+            heights = heights[grounded]
+            falls = motions[grounded, 1]
+            with numpy.errstate(divide='ignore', invalid='ignore'):
+                landing = numpy.where((falls < 0) & (heights + falls <= 0), heights / -falls, numpy.inf)
+            toi = numpy.concatenate((toi, landing.clip(0)))
+            gaps = numpy.concatenate((gaps, heights))
+        contacts = len(a) + len(grounded)
+        if contacts:
+            # contacts that were apart and meet during the update are impacts; contacts that were already touching
+            # are resting and never bounce
+            impacts = numpy.isfinite(toi) & (gaps > self.slop)
+            # an impact is solved at the moment its bodies first touch: their velocities are wound back to then,
+            # and they move there, then on through the rest of the update with their new velocities
+            hits = numpy.full(n, numpy.inf)
+            pair_hits = impacts[:len(a)]
+            floor_hits = impacts[len(a):]
+            numpy.minimum.at(hits, a[pair_hits], toi[:len(a)][pair_hits])
+            numpy.minimum.at(hits, b[pair_hits], toi[:len(a)][pair_hits])
+            numpy.minimum.at(hits, grounded[floor_hits], toi[len(a):][floor_hits])
+            hit = numpy.isfinite(hits)
+            remaining = numpy.where(hit, 1 - hits, 0)[:, None]
+            gained = 2 * (velocities - motions / ticks) * remaining  # speed picked up after the impact
+            velocities -= gained
+            pushed = self._solve(world, a, b, grounded, floor_y, ticks, impacts)
+            velocities += gained
+            pushed = numpy.unique(numpy.concatenate((a[pushed[:len(a)]], b[pushed[:len(a)]],
+                                                     grounded[pushed[len(a):]])))
+            bounced = pushed[hit[pushed]]
+            resting = pushed[~hit[pushed]]
+            motions[bounced] = (motions[bounced] * hits[bounced, None]
+                                + (velocities[bounced] - gained[bounced] / 2) * ticks * remaining[bounced])
+            motions[resting] = velocities[resting] * ticks
+            pushed = pushed[~world.awake[pushed]]
+            if len(pushed):
+                world.wake(pushed)
+        else:
+            self._cache_keys = self._cache_keys[:0]
+            self._cache_impulses = self._cache_impulses[:0]
+        positions += motions
+        self.contact_count = contacts
+        self.resolve_time = time.perf_counter() - start
+
+    def _solve(self, world, a, b, grounded, floor_y, ticks, impacts):
+        """
+        The sequential-impulse solve. The floor is row n of the velocities and inverse masses, where it never
+        moves; a floor contact has the floor as its first body and the body on it as its second.
+
+        Impacts bounce. The other contacts are speculative: their bodies may close the gap between them during the
+        update, but no more.
+
+        :return: Whether each contact pushed its bodies
+        :rtype: numpy.ndarray
+        """
+        n = world.count
+        positions = world.positions[:n]
+        sides = world.sides[:n]
+        rows = world.materials.rows
+        pairs = len(a)
+        velocities = numpy.concatenate((world.velocities[:n], numpy.zeros((1, 2))))
+        inverse_masses = numpy.append(1 / world.masses[:n], 0)
+
+        normals, gaps = contact_normals(positions, sides, a, b)
+        normals = numpy.concatenate((normals, numpy.tile((0.0, 1.0), (len(grounded), 1))))
+        gaps = numpy.concatenate((gaps, positions[grounded, 1] - sides[grounded] - floor_y))
+        restitution, friction = pair_coefficients(world, a, b)
+        materials = world.material_ids[grounded]  # the floor takes on the material of whatever stands on it
+        restitution = numpy.concatenate((restitution, rows['restitution'][materials]))
+        friction = numpy.concatenate((friction, rows['friction'][materials]))
+        a = numpy.concatenate((a, numpy.full(len(grounded), n)))
+        b = numpy.concatenate((b, grounded))
+        tangents = numpy.stack((-normals[:, 1], normals[:, 0]), axis=1)
+        inverse_a = inverse_masses[a]
+        inverse_b = inverse_masses[b]
+        effective = 1 / (inverse_a + inverse_b)
+        approach = numpy.einsum('ij,ij->i', velocities[b] - velocities[a], normals)
+        bounce = numpy.where(-approach > self.restitution_threshold, -restitution * approach, 0)
+        closing = numpy.maximum(gaps, 0) / -ticks
+        targets = numpy.where(impacts & (bounce > 0), bounce, closing)
+        # warm start: apply what each contact needed last update
+        keys = numpy.minimum(a, b).astype(numpy.int64) << 32 | numpy.maximum(a, b)
+        impulses = numpy.zeros((len(a), 2))
+        if self._cache_version == world.version and len(self._cache_keys):
+            found = numpy.searchsorted(self._cache_keys, keys).clip(0, len(self._cache_keys) - 1)
+            cached = self._cache_keys[found] == keys
+            impulses[cached] = self._cache_impulses[found[cached]] * (ticks / self._cache_ticks)
+            self.warm_started = int(numpy.count_nonzero(cached))
+            if self.warm_started:
+                vectors = impulses[:, :1] * normals + impulses[:, 1:] * tangents
+                numpy.subtract.at(velocities, a, vectors * inverse_a[:, None])
+                numpy.add.at(velocities, b, vectors * inverse_b[:, None])
+                velocities[n] = 0
+
+        # the floor can share a batch with any number of contacts, since it never moves
+        solo = a.copy()
+        solo[pairs:] = n + numpy.arange(len(grounded))
+        batches = independent_batches(solo, b, n + len(grounded))
+        change = 0
+        iteration = -1
+        for iteration in range(self.iterations):
+            change = 0
+            for batch in batches:
+                i = a[batch]
+                j = b[batch]
+                normal = normals[batch]
+                tangent = tangents[batch]
+                inverse_i = inverse_a[batch]
+                inverse_j = inverse_b[batch]
+                mass = effective[batch]
+                relative = velocities[j] - velocities[i]
+                normal_impulse = numpy.maximum(
+                    impulses[batch, 0] + mass * (targets[batch] - numpy.einsum('ij,ij->i', relative, normal)), 0)
+                normal_change = normal_impulse - impulses[batch, 0]
+                relative += ((inverse_i + inverse_j) * normal_change)[:, None] * normal
+                limit = friction[batch] * normal_impulse
+                tangent_impulse = numpy.clip(
+                    impulses[batch, 1] - mass * numpy.einsum('ij,ij->i', relative, tangent), -limit, limit)
+                tangent_change = tangent_impulse - impulses[batch, 1]
+                impulses[batch, 0] = normal_impulse
+                impulses[batch, 1] = tangent_impulse
+                vectors = normal_change[:, None] * normal + tangent_change[:, None] * tangent
+                velocities[i] -= vectors * inverse_i[:, None]
+                velocities[j] += vectors * inverse_j[:, None]
+                change = max(change, float((numpy.abs(vectors).max(axis=1) * (inverse_i + inverse_j)).max()))
+            if change <= self.tolerance:
+                break
+        self.iterations_used = iteration + 1
+        self.residual = change
+        world.velocities[:n] = velocities[:n]
+
+        # push overlapping bodies apart by moving them, not by speeding them up, so it adds no energy
+        corrections = numpy.minimum(self.baumgarte * (-gaps - self.slop), self.max_correction)
+        overlapping = corrections > 0
+        if overlapping.any():
+            positions = numpy.concatenate((positions, numpy.zeros((1, 2))))
+            for batch in batches:
+                batch = batch[overlapping[batch]]
+                i = a[batch]
+                j = b[batch]
+                shares = (corrections[batch] * effective[batch])[:, None] * normals[batch]
+                positions[i] -= shares * inverse_a[batch, None]
+                positions[j] += shares * inverse_b[batch, None]
+            world.positions[:n] = positions[:n]
+
+        order = numpy.argsort(keys)
+        self._cache_keys = keys[order]
+        self._cache_impulses = impulses[order]
+        self._cache_version = world.version
+        self._cache_ticks = ticks
+        return (impulses[:, 0] > 0) | (impulses[:, 1] != 0)
+
+    def stats(self):
+        """
+        :return: Counters from the last update, for logging and benchmarks
+        :rtype: dict
+        """
+        return {
+            'contacts': self.contact_count,
+            'warm started': self.warm_started,
+            'iterations': self.iterations_used,
+            'residual': self.residual,
+            'resolve time': self.resolve_time
+        }
+
+
+NARROW_PHASES = {
+    'swept': SweptNarrowPhase,
+    'impulse': ContactSolver
+}
+"""Name to narrow phase class; see `Options['narrow phase']`"""
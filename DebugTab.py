@@ -1,20 +1,24 @@
 """Contains 'tabs' which are really just frames but are used by the `ttk.Notebook object
 <https://tkdocs.com/shipman/ttk-Notebook.html>`_ for tabbed display.
 
-The LogTab contains a Listbox and a Scrollbar. Strings can be sent to LogTab to be logged - they will be added to
-the list. When clicked, they display on a lower label to account for long-stringed log events.
+The LogTab contains a Listbox and a Scrollbar. Strings can be sent to LogTab to be logged - they go through a
+:class:`Log.LogPipeline` and are added to the list in batches. When clicked, they display on a lower label to account
+for long-stringed log events.
 
 The DebugTab contains buttons for adding objects, for testing purposes. The panels for adding those objects are part
-of this module. """
+of this module. It also shows how long each phase of a tick takes, see :class:`Profiler.TickProfiler`. """
 import random
 from tkinter import *
 from tkinter import ttk, colorchooser
 
 import Particle
+import Profiler
+import Log
 import Utility, Substance, Physics
 from Options import Options
 
-import time, math
+import math
+import os
 
 
 class LogTab(ttk.Frame):
@@ -23,7 +27,8 @@ class LogTab(ttk.Frame):
 
     Created by :class:`Ui.MainWindow`
 
-    Uses a `Tkinter.Listbox <https://tkdocs.com/shipman/listbox.html>`_.
+    Uses a `Tkinter.Listbox <https://tkdocs.com/shipman/listbox.html>`_, which holds at most
+    `Options['log capacity']` entries.
 
     :param parent: The frame where this component will be placed.
     :type parent: widget
@@ -36,14 +41,20 @@ class LogTab(ttk.Frame):
         """
         ttk.Frame.__init__(self, parent)
         self.window = window
+        self.pipeline = Log.LogPipeline()
+        """Holds messages until :meth:`flush` shows them"""
         self.scroll_bar = Scrollbar(self)
         self.list_box = Listbox(self, selectmode=SINGLE, width=45, yscrollcommand=self.scroll_bar.set)
         self.list_box.bind('<ButtonPress>', self.click)
         self.selected_var = StringVar()
         selected_label = ttk.Label(self, textvariable=self.selected_var, wraplength=230)
+        self.is_writing = BooleanVar()
+        file_check = ttk.Checkbutton(self, text=f"write to {Options['log path']}", variable=self.is_writing,
+                                     command=self.toggle_file)
         self.list_box.grid(column=1, row=0)
         self.scroll_bar.grid(column=0, row=0, sticky=(N,S))
         selected_label.grid(column=1,row=1)
+        file_check.grid(column=1, row=2, sticky=W)
 
     def click(self, event):
         """
@@ -57,13 +68,37 @@ class LogTab(ttk.Frame):
         selection = self.list_box.get(index)
         self.selected_var.set(selection)
 
-    def log(self, string):
+    def log(self, string, source='ui'):
         """
-        Creates an entry in the Listbox from the string. Prepends a timestamp.
+        Queues an entry for the Listbox from the string, with a timestamp. Safe to call from any thread; the entry is
+        shown by the next :meth:`flush`. Dropped if `source` is logging too fast, see :class:`Log.LogPipeline`.
         :param string: text to log
+        :param source: who is logging
         """
-        timestring = time.strftime('%H:%M:%S', time.localtime())
-        self.list_box.insert(END, f"{string}    {timestring}")
+        self.pipeline.log(string, source)
+
+    def flush(self):
+        """
+        Adds every queued entry to the Listbox in one insert, then trims the oldest entries past
+        `Options['log capacity']`. Called by :meth:`Ui.TimeSelector.draw_frame` on the Tk thread.
+        """
+        entries = self.pipeline.drain()
+        if not entries:
+            return
+        self.list_box.insert(END, *entries)
+        extra = self.list_box.size() - self.pipeline.capacity
+        if extra > 0:
+            self.list_box.delete(0, extra - 1)
+        self.list_box.see(END)
+
+    def toggle_file(self):
+        """
+        Starts or stops writing the log to `Options['log path']`.
+        """
+        if self.is_writing.get():  # checkbox changes before command is called
+            self.pipeline.start_file()
+        else:
+            self.pipeline.stop_file()
 
 
 class DebugTab(ttk.Frame):
@@ -79,6 +114,117 @@ class DebugTab(ttk.Frame):
         ttk.Frame.__init__(self, parent)
         self.window = window
         self.force_adder = ForceObjectAdder(self.window, ttk.Frame(self))
+        self.render_stats_var = StringVar()
+        render_stats_label = ttk.Label(self, textvariable=self.render_stats_var)
+        render_stats_label.grid(column=0, row=1, sticky=W)
+        self.contact_stats_var = StringVar()
+        contact_stats_label = ttk.Label(self, textvariable=self.contact_stats_var)
+        contact_stats_label.grid(column=0, row=4, sticky=W)
+
+        profile_frame = ttk.Frame(self)
+        self.is_profiling = BooleanVar()
+        profile_check = ttk.Checkbutton(profile_frame, text='time ticks', variable=self.is_profiling,
+                                        command=self.toggle_profiling)
+        self.capture_ticks = IntVar()
+        self.capture_ticks.set(Options['profile capture ticks'])
+        capture_spinbox = ttk.Spinbox(profile_frame, from_=1, to=10000, increment=10, width=6,
+                                      textvariable=self.capture_ticks)
+        capture_button = ttk.Button(profile_frame, text='cProfile ticks', command=self.capture_press)
+        self.profile_var = StringVar()
+        profile_label = ttk.Label(self, textvariable=self.profile_var, justify=LEFT)
+        self.shown_captures = {}
+        """Source of each capture logged since the last capture was started, to its path"""
+        profile_frame.grid(column=0, row=2, sticky=W)
+        profile_check.grid(column=0, row=0)
+        capture_spinbox.grid(column=1, row=0)
+        capture_button.grid(column=2, row=0)
+        profile_label.grid(column=0, row=3, sticky=W)
+
+    def show_render_stats(self, stats):
+        """
+        Displays the counters kept by :meth:`Ui.PhysicsCanvas.render`.
+
+        :param stats: :attr:`Ui.PhysicsCanvas.render_stats`
+        :type stats: dict
+        """
+        self.render_stats_var.set(f"render: {stats['average frame time']*1000:.2f} ms/frame, "
+                                  f"moved {stats['moved']}, unchanged {stats['unchanged']}, culled {stats['culled']}")
+
+    def show_contact_stats(self, stats):
+        """
+        Displays the counters kept by the engine's narrow phase. Iterations and warm starts are only shown for
+        :class:`Collision.ContactSolver`.
+
+        :param stats: From the narrow phase's stats method
+        :type stats: dict
+        """
+        text = f"contacts: {stats['contacts']}, {stats['resolve time']*1000:.2f} ms"
+        if 'iterations' in stats:
+            text += (f", {stats['iterations']} iterations, {stats['warm started']} warm started, "
+                     f"residual {stats['residual']:.2g}")
+        self.contact_stats_var.set(text)
+
+    def show_stats(self, stats):
+        """
+        Displays the counters the simulation sends about once a second.
+
+        :param stats: From :meth:`Remote.Simulation.stats`
+        :type stats: dict
+        """
+        self.show_contact_stats(stats['contacts'])
+        self.show_profile(stats, self.window.time_selector.profiler)
+
+    def toggle_profiling(self):
+        """
+        Turns timing of the simulation's ticks and the window's frames on or off, each with a
+        :class:`Profiler.TickProfiler` of its own.
+        """
+        profiling = self.is_profiling.get()  # checkbox changes before command is called
+        self.window.simulation.send('profile', profiling)
+        if profiling:
+            self.window.time_selector.profiler = Profiler.TickProfiler()
+        else:
+            self.window.time_selector.profiler = None
+            self.profile_var.set('')
+
+    def capture_press(self):
+        """
+        Captures the number of ticks in the spinbox with cProfile into `Options['profile path']`, and as many frames
+        of the window into the same name ending in -window. Turns timing on if it is off.
+        """
+        if not self.is_profiling.get():
+            self.is_profiling.set(True)
+            self.toggle_profiling()
+        try:
+            ticks = max(1, int(self.capture_ticks.get()))
+        except (TclError, ValueError):
+            ticks = Options['profile capture ticks']
+        root, extension = os.path.splitext(Options['profile path'])
+        self.window.simulation.send('capture', ticks, Options['profile path'])
+        self.window.time_selector.profiler.start_capture(ticks, root + '-window' + extension)
+        self.shown_captures = {}
+        self.window.log(f"capturing {ticks} ticks")
+
+    def show_profile(self, stats, profiler):
+        """
+        Displays the percentiles kept by the simulation's and the window's profilers, and logs any capture written
+        since last time.
+
+        :param stats: From :meth:`Remote.Simulation.stats`
+        :type stats: dict
+        :param profiler: :attr:`Ui.TimeSelector.profiler`
+        :type profiler: :class:`Profiler.TickProfiler`
+        """
+        if profiler is None:
+            return
+        text = "ms: 50% / 95% / 99%"
+        if stats['profile']:
+            text += "\n" + stats['profile']
+        self.profile_var.set(text + "\n" + profiler.summary())
+        for source, capture in (('simulation', stats['capture']), ('window', profiler.last_capture)):
+            if capture is not None and self.shown_captures.get(source) is None:
+                self.shown_captures[source] = capture
+                self.window.log(f"wrote cProfile capture to {capture}")
 
 
 class ForceObjectAdder:
@@ -110,6 +256,7 @@ class ForceObjectAdder:
         self.particle_test.grid(column=0, row=3)
 
         self.force_objects = []
+        """Refs of the objects added here, see :meth:`Remote.SimulationClient.handle_of`"""
         self.window.root.bind('<Down>', self.key_handler)
         self.window.root.bind('<Up>', self.key_handler)
         self.window.root.bind('<Left>', self.key_handler)
@@ -126,8 +273,7 @@ class ForceObjectAdder:
         material = Substance.MATERIALS['cork']
         mass = 100000
         force_object = Physics.PhysicsObject(material, mass)
-        self.force_objects.append(force_object)
-        self.window.physics_canvas.add_physics_object(force_object)
+        self.force_objects.append(self.window.physics_canvas.add_physics_object(force_object))
 
     def key_handler(self, event):
         direction = 's'
@@ -137,9 +283,12 @@ class ForceObjectAdder:
             direction = 'n'
         elif event.keysym == 'Left':
             direction = 'w'
-        for i in range(0, len(self.force_objects)):
-            force = Physics.Force.make_directional_force(direction, Options['key force magnitude'], Options['key force duration'])
-            self.force_objects[i].forces.append(force)
+        simulation = self.window.simulation
+        force = Physics.Force.make_directional_force(direction, Options['key force magnitude'], Options['key force duration'])
+        for ref in self.force_objects:
+            handle = simulation.handle_of(ref)
+            if handle is not None:
+                simulation.send('push', handle, force.x, force.y, force.remaining)
 
     def particle_test(self):
         particle = Particle.Particle()
@@ -0,0 +1,483 @@
+"""Engine runs the simulation without any user interface.
+
+An :class:`Engine.Engine` owns the :class:`World.WorldState` holding every PhysicsObject, the interacting forces such
+as :class:`Physics.GravitationalForceGenerator`, the broad phase and the world boundaries. Calling
+:meth:`Engine.step` advances all of them by one update; :meth:`Engine.run` does that repeatedly.
+
+Nothing here imports tkinter, so an Engine can be built and run on a server or from a benchmark. The UI never steps
+one itself: a :class:`Remote.Simulation` runs it and publishes what the window draws (see :mod:`Remote`). Other code
+can attach to an Engine as an observer, by appending a function to `Engine.observers`; it is handed an
+:class:`Engine.Snapshot` after every step, and a :class:`Engine.SnapshotBuffer` hands the latest to another thread.
+
+:class:`Engine.FixedStepClock` converts wall-clock time into fixed-size steps for real-time loops.
+"""
+
+import threading
+import time
+
+from Options import Options
+import World
+import Registry
+import Broadphase
+import Collision
+import Integrators
+import Parallel
+
+
+class Snapshot:
+    """
+    The state of every body in an Engine after one step.
+
+    The arrays are read-only copies, so a Snapshot never changes once made and can be handed from the simulation
+    thread to another thread without any locking.
+
+    :param engine: The engine to copy from
+    :type engine: :class:`Engine.Engine`
+    """
+    def __init__(self, engine):
+        world = engine.world
+        n = world.count
+        self.tick = engine.tick
+        """Number of steps the engine had taken"""
+        self.time = engine.time
+        """Simulated seconds the engine had run"""
+        self.dt = engine.last_dt
+        """Seconds simulated by the step that produced this snapshot"""
+        self.wall_time = time.perf_counter()
+        """When the snapshot was made, from time.perf_counter"""
+        self.bodies = tuple(world.bodies)
+        """The PhysicsObject for each row"""
+        self.version = world.version
+        """:attr:`World.WorldState.version` when the snapshot was made; equal versions mean equal row order"""
+        self.positions = world.positions[:n].copy()
+        """Displacement of each body, one row per body"""
+        self.sides = world.sides[:n].copy()
+        """Side length of each body"""
+        self.previous_positions = engine.previous_positions[:n].copy()
+        """Displacement of each body before the step, for interpolation"""
+        for array in (self.positions, self.sides, self.previous_positions):
+            array.flags.writeable = False
+
+    def interpolate(self, alpha):
+        """
+        Blends the displacement before and after the step, for drawing between two fixed steps.
+
+        :param alpha: 0 gives the displacement before the step, 1 the displacement after it
+        :type alpha: number
+        :return: One interpolated displacement row per body
+        :rtype: numpy.ndarray
+        """
+        if alpha >= 1:
+            return self.positions
+        return self.previous_positions + alpha * (self.positions - self.previous_positions)
+
+
+class SnapshotBuffer:
+    """
+    A double buffer for handing :class:`Engine.Snapshot` objects from the simulation thread to another thread.
+
+    The simulation thread calls :meth:`publish` after every step; it writes into the back slot and then flips which
+    slot is the front. The reading thread calls :meth:`latest` whenever it likes and gets whatever is in the front
+    slot. Neither side ever waits for the other beyond the flip itself, so physics can run faster than the reader.
+    :class:`Remote.FrameRing` does the same between processes.
+    """
+    def __init__(self):
+        self._slots = [None, None]
+        self._front = 0
+        self._lock = threading.Lock()
+        self.published = 0
+        """Number of snapshots published so far"""
+
+    def publish(self, snapshot):
+        """
+        Called from the simulation thread. Suitable as an entry in `Engine.observers`.
+
+        :param snapshot: The newest state
+        :type snapshot: :class:`Engine.Snapshot`
+        """
+        back = 1 - self._front
+        self._slots[back] = snapshot
+        with self._lock:
+            self._front = back
+            self.published += 1
+
+    def latest(self):
+        """
+        Called from the reading thread.
+
+        :return: The newest published snapshot, or None if nothing has been published
+        :rtype: :class:`Engine.Snapshot`
+        """
+        with self._lock:
+            return self._slots[self._front]
+
+
+class FixedStepClock:
+    """
+    Turns wall-clock time into a whole number of fixed simulation steps.
+
+    Elapsed time is added to an accumulator and one step of `dt` is taken for each whole `dt` in it, so the
+    simulation always advances by the same `dt` no matter how long a frame took - results don't depend on the frame
+    rate. What is left over is exposed as `alpha`, the fraction of a step to interpolate by when drawing.
+
+    If the machine falls so far behind that more than `max_steps` would be needed, the excess is dropped instead of
+    being caught up later; otherwise each slow frame would schedule even more work for the next one.
+
+    :param dt: Seconds per simulation step
+    :type dt: number
+    :param max_steps: Most steps to take for one frame
+    :type max_steps: int
+    """
+    def __init__(self, dt=Options['update interval'], max_steps=Options['max steps per frame']):
+        self.dt = dt
+        """Seconds per simulation step"""
+        self.max_steps = max_steps
+        """Most steps to take for one frame"""
+        self.accumulator = 0
+        """Seconds not yet simulated"""
+        self.dropped_time = 0
+        """Total seconds thrown away because a frame needed more than max_steps"""
+
+    def advance(self, elapsed):
+        """
+        Adds elapsed wall-clock time.
+
+        :param elapsed: Seconds since the last call
+        :type elapsed: number
+        :return: How many steps of self.dt to take now
+        :rtype: int
+        """
+        self.accumulator += elapsed
+        steps = int(self.accumulator // self.dt)
+        if steps > self.max_steps:
+            self.dropped_time += (steps - self.max_steps) * self.dt
+            steps = self.max_steps
+        self.accumulator -= steps * self.dt
+        if self.accumulator >= self.dt:
+            self.accumulator %= self.dt
+        return steps
+
+    @property
+    def alpha(self):
+        """Fraction of a step the accumulator holds, between 0 and 1"""
+        return self.accumulator / self.dt
+
+
+class Engine:
+    """
+    Owns the bodies, interacting forces and boundaries of a simulation and advances them.
+
+    The boundaries default to the canvas size from Options, since one canvas pixel is one meter, including the
+    per-edge physics adjustments that used to be applied by the canvas.
+
+    :param width: Width of the world in m
+    :type width: number
+    :param height: Height of the world in m
+    :type height: number
+    """
+    def __init__(self, width=Options['canvas width'], height=Options['canvas height']):
+        self.world = World.WorldState()
+        """Array-backed state of every PhysicsObject in the simulation"""
+        self.broad_phase = Broadphase.SpatialHashGrid()
+        """Rebuilt each step; hands candidate pairs to self.narrow_phase"""
+        self.narrow_phase = Collision.NARROW_PHASES[Options['narrow phase']]()
+        """Resolves contacts among the candidate pairs each step; one of :data:`Collision.NARROW_PHASES`"""
+        self.interacting_forces = Registry.HandleRegistry()
+        """Instances from, e.g. :class:`Physics.GravitationalForceGenerator` that need to be have update called"""
+        self.handles = Registry.HandleRegistry()
+        """Every PhysicsObject in the simulation by its `handle`; see :meth:`get`"""
+        self.observers = []
+        """Functions called with a :class:`Engine.Snapshot` after every step"""
+        self.min_x = -width/2
+        self.max_x = width/2
+        self.min_y = -height/2
+        self.max_y = height/2
+        self.tick = 0
+        """Number of steps taken"""
+        self.time = 0
+        """Simulated seconds"""
+        self.previous_positions = self.world.positions[:0].copy()
+        """Displacement of each body at the start of the last step"""
+        self.last_dt = 0
+        """dt of the last step"""
+        self.gravity = 0
+        """Downward acceleration applied to every body, m/s^2. 0 turns gravity off"""
+        self.air_density = 0
+        """Density of the air every body moves through, kg/m^3. 0 turns air resistance off"""
+        self.n_body_gravity = None
+        """A :class:`BarnesHut.NBodyGravity` pulling every body toward every other one, or None for no such pull"""
+        self.integrator = Integrators.INTEGRATORS[Options['integrator']]()
+        """Moves the bodies through each step; see :mod:`Integrators`"""
+        self.step_controller = Integrators.StepController() if Options['adaptive steps'] else None
+        """An :class:`Integrators.StepController` choosing the length of each step in :meth:`advance`, or None for
+        steps of `Options['update interval']`"""
+        self.next_dt = None
+        """Length of the next step :meth:`advance` will take, once chosen"""
+        self.owed_time = 0
+        """Seconds handed to :meth:`advance` that haven't been simulated yet"""
+        self.sleeping = Options['sleeping']
+        """Whether bodies that come to rest are put to sleep; see :meth:`World.WorldState.update_sleep`"""
+        self._fields = None
+        self.recorder = None
+        """A :class:`Recorder.TrajectoryRecorder` that every step is recorded into, or None"""
+        self.profiler = None
+        """A :class:`Profiler.TickProfiler` timing each phase of a step, or None to not time anything"""
+        self.tiles = Parallel.TiledExecutor(Options['worker processes']) if Options['worker processes'] else None
+        """A :class:`Parallel.TiledExecutor` spreading each step over worker processes, or None to step on one core"""
+        self.lock = threading.RLock()
+        """Held while stepping; hold it to add or remove bodies from another thread"""
+
+    @property
+    def physics_objects(self):
+        """Every :class:`Physics.PhysicsObject` in the simulation, in row order"""
+        return self.world.bodies
+
+    def add(self, physics_object):
+        """
+        Moves a PhysicsObject's state into this engine's world.
+
+        :param physics_object: The object to simulate
+        :type physics_object: :class:`Physics.PhysicsObject`
+        """
+        with self.lock:
+            self.world.adopt(physics_object)
+            if self.handles.get(physics_object.handle) is not physics_object:
+                physics_object.handle = self.handles.add(physics_object)
+        physics_object.engine = self
+
+    def extend(self, physics_objects, columns):
+        """
+        Adds many PhysicsObjects at once; see :meth:`World.WorldState.extend`.
+
+        :param physics_objects: Objects without a row, e.g. from :meth:`Physics.PhysicsObject.without_row`
+        :type physics_objects: list
+        :param columns: Column name to an array with one entry per object
+        :type columns: dict
+        :return: The row of the first object
+        :rtype: int
+        """
+        with self.lock:
+            start = self.world.extend(physics_objects, columns)
+            for physics_object, handle in zip(physics_objects, self.handles.extend(physics_objects)):
+                physics_object.handle = handle
+                physics_object.engine = self
+        return start
+
+    def remove(self, physics_object):
+        """
+        Stops simulating a PhysicsObject. Its last state stays readable, but its handle no longer finds it.
+
+        :param physics_object: The object to remove
+        :type physics_object: :class:`Physics.PhysicsObject`
+        """
+        with self.lock:
+            self.world.remove(physics_object)
+            self.handles.remove(physics_object.handle)
+
+    def get(self, handle):
+        """
+        :param handle: `PhysicsObject.handle` of an object added to this engine
+        :type handle: tuple
+        :return: The object, or None if it has been removed since
+        :rtype: :class:`Physics.PhysicsObject`
+        """
+        return self.handles.get(handle)
+
+    def add_interacting_force(self, force):
+        """
+        Has `force.update` called after every step until :meth:`remove_interacting_force`.
+
+        :param force: e.g. a :class:`Physics.GravitationalForceGenerator`
+        """
+        with self.lock:
+            force.handle = self.interacting_forces.add(force)
+
+    def remove_interacting_force(self, force):
+        """
+        :param force: A force added with :meth:`add_interacting_force`
+        """
+        with self.lock:
+            self.interacting_forces.remove(force.handle)
+
+    def clear(self):
+        """
+        Removes every PhysicsObject and interacting force.
+        """
+        with self.lock:
+            for force in list(self.interacting_forces):
+                force.remove()
+            self.world.clear()
+            self.handles.clear()
+            self.next_dt = None
+
+    def keep_sleeping(self):
+        """
+        Normally every sleeping body is woken on the next step after gravity, air density, n-body gravity or
+        sleeping is changed. Calling this accepts the current settings as the ones the sleeping bodies came to rest
+        in, e.g. after loading a checkpoint.
+        """
+        self._fields = (self.gravity, self.air_density, self.n_body_gravity, self.sleeping)
+
+    def step(self, dt):
+        """
+        Advances the simulation by one update of `dt` seconds.
+
+        Sums the forces from the force table, then self.integrator works out the new velocity of every object and
+        how far it moves, asking for gravity, air resistance and n-body gravity wherever it needs them. The broad
+        phase is rebuilt, then the narrow phase moves every object, stopping colliding pairs where they first touch
+        to resolve them and letting them finish the step with their new velocities. With self.tiles, the
+        integration, broad phase and times of impact are worked out by its worker processes instead (see
+        :mod:`Parallel`).
+
+        A step is one tick if the integrator has `fixed_tick` set, as with the default
+        :class:`Integrators.EulerIntegrator`, and there is no step controller; otherwise it is
+        `dt / Options['update interval']` ticks, so a longer dt covers more simulated motion. Boundary bounces are applied to the whole
+        world, bodies that have come to rest are put to sleep, the interacting forces are updated, the step is
+        recorded if there is a recorder, and finally each observer is handed a :class:`Engine.Snapshot`. If there is a
+        profiler, each of those phases is timed.
+
+        :param dt: time in seconds
+        :type dt: number
+        """
+        profiler = self.profiler
+        if profiler is not None:
+            profiler.begin_capture()
+            start = t = time.perf_counter()
+        with self.lock:
+            world = self.world
+            self.previous_positions = world.positions[:world.count].copy()
+            if (self.gravity, self.air_density, self.n_body_gravity, self.sleeping) != self._fields:
+                world.wake_all()  # sleeping bodies were only at rest in the old environment
+                self.keep_sleeping()
+            if self.integrator.fixed_tick and self.step_controller is None:
+                ticks = 1
+                fraction = World.delivered_fraction(dt, 1.0)
+            else:
+                ticks = dt / Options['update interval']
+                fraction = World.delivered_fraction(Options['update interval'], 1.0)
+            world.sum_forces(dt)
+            tiles = self.tiles if self.tiles is not None and self.tiles.can_run(self) else None
+            if tiles is None:
+                acceleration = self._acceleration(world.net_forces[:world.count] / ticks, fraction)
+            if profiler is not None:
+                t = profiler.lap('forces', t)
+            if tiles is None:
+                motions = world.integrate(self.integrator, acceleration, ticks, self.min_y)
+            else:
+                tiles.integrate(self, ticks, fraction)
+            if profiler is not None:
+                t = profiler.lap('integration', t)
+            floor_y = self.min_y + Options['canvas top physics adjustment']
+            if tiles is None:
+                self.broad_phase.rebuild(world, motions)
+                self.narrow_phase.resolve(world, self.broad_phase.pairs, dt, motions, ticks, floor_y)
+            else:
+                tiles.collide(self, ticks)
+            if profiler is not None:
+                t = profiler.lap('collision', t)
+            world.bounce(self.min_x + Options['canvas left physics adjustment'],
+                         self.max_x + Options['canvas right physics adjustment'],
+                         floor_y,
+                         self.max_y - Options['canvas bottom physics adjustment'])
+            if profiler is not None:
+                t = profiler.lap('boundary', t)
+            if self.sleeping:
+                world.update_sleep(self.broad_phase.pairs, dt, Options['velocity zero limit'],
+                                   Options['net force zero limit'], Options['sleep delay'], floor_y, self.gravity,
+                                   fraction)
+                if profiler is not None:
+                    t = profiler.lap('sleeping', t)
+            for f in self.interacting_forces:
+                f.update(dt)
+            if profiler is not None:
+                t = profiler.lap('interacting forces', t)
+            self.tick += 1
+            self.time += dt
+            self.last_dt = dt
+            self.next_dt = None
+            if self.recorder is not None:
+                self.recorder.record(self)
+            snapshot = self.snapshot() if self.observers else None
+        for observer in self.observers:
+            observer(snapshot)
+        if profiler is not None:
+            profiler.record('step', profiler.lap('observers', t) - start)
+            profiler.end_capture(tick=True)
+
+    def _acceleration(self, table_forces, fraction):
+        """
+        The acceleration function handed to self.integrator for one step, with this engine's gravity, air
+        resistance and n-body gravity; see :meth:`World.WorldState.acceleration`.
+
+        :param table_forces: Force on each body from :class:`World.ForceTable`, per tick
+        :type table_forces: numpy.ndarray
+        :param fraction: Share of the fields delivered per tick, see :func:`World.delivered_fraction`
+        :type fraction: number
+        :rtype: function
+        """
+        world = self.world
+        n_body_gravity = self.n_body_gravity if world.count > 1 else None
+        return world.acceleration(table_forces, self.gravity, self.air_density, fraction, n_body_gravity)
+
+    def choose_step(self):
+        """
+        :return: Length in seconds of the next step :meth:`advance` will take. With a step controller this is worked
+            out from the current state the first time it is asked for after each step; otherwise it is always
+            `Options['update interval']`.
+        :rtype: number
+        """
+        controller = self.step_controller
+        if controller is None:
+            return Options['update interval']
+        with self.lock:
+            if self.next_dt is None:
+                world = self.world
+                n = world.count
+                interval = Options['update interval']
+                fraction = World.delivered_fraction(interval, 1.0)
+
+                def acceleration_for(ticks):
+                    return self._acceleration(world.table_forces(ticks * interval) / ticks, fraction)
+                ticks = controller.choose(self.integrator, world.positions[:n], world.velocities[:n],
+                                          acceleration_for, world.airborne(self.min_y))
+                self.next_dt = ticks * interval
+            return self.next_dt
+
+    def advance(self, seconds):
+        """
+        Simulates `seconds` more, in steps of :meth:`choose_step`. Whatever is too short for the next step is kept in
+        self.owed_time for the next call, so with a step controller a quiet scene takes one long step every few
+        calls, while a close encounter takes several short steps in one call.
+
+        :param seconds: Time to add
+        :type seconds: number
+        :return: Number of steps taken
+        :rtype: int
+        """
+        self.owed_time += seconds
+        steps = 0
+        while self.choose_step() <= self.owed_time:
+            dt = self.choose_step()
+            self.step(dt)
+            self.owed_time -= dt
+            steps += 1
+        return steps
+
+    def run(self, n_steps, dt=Options['update interval']):
+        """
+        Calls :meth:`step` `n_steps` times, as fast as possible.
+
+        :param n_steps: Number of steps
+        :type n_steps: int
+        :param dt: Seconds per step
+        :type dt: number
+        """
+        for i in range(n_steps):
+            self.step(dt)
+
+    def snapshot(self):
+        """
+        :return: A copy of the current state of every body
+        :rtype: :class:`Engine.Snapshot`
+        """
+        return Snapshot(self)
@@ -0,0 +1,230 @@
+"""Ways of moving every body through one step.
+
+An integrator is handed the displacement and velocity of every body and a function giving the acceleration of every
+body at any displacement and velocity, and works out how far each body moves and its velocity at the end of the step.
+All of them work on whole arrays; none loops over bodies.
+
+Time is measured in ticks, one tick being `Options['update interval']` seconds, because velocities are stored in m
+per tick (see :meth:`World.WorldState.integrate`). A step can cover several ticks.
+
+- :class:`Integrators.EulerIntegrator` is what the simulator has always done: velocity, then displacement with the new
+  velocity. By default it takes every step as exactly one tick, however long the step is, so existing scenes behave
+  as they always have.
+- :class:`Integrators.VelocityVerlet` and :class:`Integrators.Leapfrog` are second order and symplectic, so orbits
+  neither spiral in nor out.
+- :class:`Integrators.RungeKutta4` is fourth order, at four acceleration evaluations per step.
+
+With the higher order integrators a step may cover many ticks at the same accuracy; see
+:func:`Benchmark.integrator_accuracy`.
+
+A :class:`Integrators.StepController` picks how many ticks each step covers instead: it estimates the error of a
+step by step doubling and grows the step while the scene is quiet, shrinking it again for close encounters. See
+:meth:`Engine.Engine.advance`.
+
+There are no UI components in this module.
+"""
+
+import abc
+
+import numpy
+
+from Options import Options
+
+
+class Integrator(abc.ABC):
+    """
+    Base class. Subclasses implement :meth:`step`.
+    """
+    name = ''
+    order = 1
+    """Global error shrinks as the step length to this power"""
+    evaluations = 1
+    """Accelerations worked out per step"""
+    fixed_tick = False
+    """If True every step is one tick long, whatever its length in seconds"""
+
+    @abc.abstractmethod
+    def step(self, positions, velocities, acceleration, ticks):
+        """
+        :param positions: Displacement of every body at the start of the step; not changed
+        :type positions: numpy.ndarray
+        :param velocities: Velocity of every body at the start of the step, m per tick; not changed
+        :type velocities: numpy.ndarray
+        :param acceleration: Function of (positions, velocities) returning the acceleration of every body, m per
+            tick^2
+        :type acceleration: function
+        :param ticks: Length of the step
+        :type ticks: number
+        :return: How far each body moves during the step, each body's velocity at the end of it, and the
+            acceleration the step started with
+        :rtype: tuple
+        """
+
+
+class EulerIntegrator(Integrator):
+    """
+    :math:`v = v_0 + ah`, then :math:`s = s_0 + vh`. First order.
+
+    :param fixed_tick: Take every step as one tick, as the simulator always has
+    :type fixed_tick: bool
+    """
+    name = 'euler'
+
+    def __init__(self, fixed_tick=True):
+        self.fixed_tick = fixed_tick
+
+    def step(self, positions, velocities, acceleration, ticks):
+        a = acceleration(positions, velocities)
+        new_velocities = velocities + a * ticks
+        return new_velocities * ticks, new_velocities, a
+
+
+class VelocityVerlet(Integrator):
+    """
+    :math:`s = s_0 + v_0h + \\frac{1}{2}a_0h^2`, then :math:`v = v_0 + \\frac{1}{2}(a_0 + a_1)h` with :math:`a_1` taken
+    at the new displacement. Second order, two evaluations per step.
+    """
+    name = 'verlet'
+    order = 2
+    evaluations = 2
+
+    def step(self, positions, velocities, acceleration, ticks):
+        a0 = acceleration(positions, velocities)
+        motions = ticks * velocities + (0.5 * ticks * ticks) * a0
+        a1 = acceleration(positions + motions, velocities + ticks * a0)
+        return motions, velocities + (0.5 * ticks) * (a0 + a1), a0
+
+
+class Leapfrog(Integrator):
+    """
+    Drift half a step, kick a whole step, drift half a step. Second order, one evaluation per step.
+    """
+    name = 'leapfrog'
+    order = 2
+
+    def step(self, positions, velocities, acceleration, ticks):
+        a = acceleration(positions + (0.5 * ticks) * velocities, velocities)
+        new_velocities = velocities + ticks * a
+        return (0.5 * ticks) * (velocities + new_velocities), new_velocities, a
+
+
+class RungeKutta4(Integrator):
+    """
+    The classic fourth order Runge-Kutta method on displacement and velocity together. Four evaluations per step.
+    """
+    name = 'rk4'
+    order = 4
+    evaluations = 4
+
+    def step(self, positions, velocities, acceleration, ticks):
+        half = 0.5 * ticks
+        a1 = acceleration(positions, velocities)
+        v2 = velocities + half * a1
+        a2 = acceleration(positions + half * velocities, v2)
+        v3 = velocities + half * a2
+        a3 = acceleration(positions + half * v2, v3)
+        v4 = velocities + ticks * a3
+        a4 = acceleration(positions + ticks * v3, v4)
+        sixth = ticks / 6
+        motions = sixth * (velocities + 2 * v2 + 2 * v3 + v4)
+        return motions, velocities + sixth * (a1 + 2 * a2 + 2 * a3 + a4), a1
+
+
+class StepController:
+    """
+    Chooses the length of each step so the error of a step stays under `tolerance`.
+
+    The error of a step is estimated by step doubling: the step is taken once whole and once as two halves, and the
+    furthest any body ends up apart between the two is the estimate. The next step is scaled by
+    :math:`(tolerance / error)^{1/(p+1)}` for an integrator of order p, within `min_ticks` and `max_ticks`. A step
+    whose error is over the tolerance is shrunk and tried again before it is taken, unless it is already as short as
+    allowed.
+
+    :param tolerance: Most a body may be off after one step, m
+    :type tolerance: number
+    :param min_ticks: Shortest step, in ticks
+    :type min_ticks: number
+    :param max_ticks: Longest step, in ticks
+    :type max_ticks: number
+    :param safety: Steps are made this much shorter than the estimate says they could be
+    :type safety: number
+    """
+    def __init__(self, tolerance=Options['step tolerance'], min_ticks=Options['min step ticks'],
+                 max_ticks=Options['max step ticks'], safety=0.9):
+        self.tolerance = tolerance
+        self.min_ticks = min_ticks
+        self.max_ticks = max_ticks
+        self.safety = safety
+        self.ticks = 1
+        """Length of the next step to try"""
+        self.accepted = 0
+        """Steps chosen"""
+        self.rejected = 0
+        """Tries that were over the tolerance and shrunk"""
+
+    def error(self, integrator, positions, velocities, acceleration, ticks, moving=None):
+        """
+        :param integrator: The integrator the step will be taken with
+        :type integrator: :class:`Integrators.Integrator`
+        :param positions: Displacement of every body
+        :type positions: numpy.ndarray
+        :param velocities: Velocity of every body, m per tick
+        :type velocities: numpy.ndarray
+        :param acceleration: As for :meth:`Integrator.step`
+        :type acceleration: function
+        :param ticks: Length of the step
+        :type ticks: number
+        :param moving: Optional boolean mask; only rows where it is True count
+        :type moving: numpy.ndarray
+        :return: Estimated error of the step, m
+        :rtype: float
+        """
+        half = 0.5 * ticks
+        whole = integrator.step(positions, velocities, acceleration, ticks)[0]
+        first, first_velocities = integrator.step(positions, velocities, acceleration, half)[:2]
+        second = integrator.step(positions + first, first_velocities, acceleration, half)[0]
+        apart = whole - first - second
+        if moving is not None:
+            apart = apart[moving]
+        if len(apart) == 0:
+            return 0.0
+        return float(numpy.sqrt((apart * apart).sum(axis=1).max()))
+
+    def choose(self, integrator, positions, velocities, acceleration_for, moving=None):
+        """
+        Picks the length of the next step, and remembers a length to try for the one after.
+
+        :param integrator: The integrator the step will be taken with
+        :type integrator: :class:`Integrators.Integrator`
+        :param positions: Displacement of every body
+        :type positions: numpy.ndarray
+        :param velocities: Velocity of every body, m per tick
+        :type velocities: numpy.ndarray
+        :param acceleration_for: Function of a step length in ticks returning the acceleration function for a step
+            that long
+        :type acceleration_for: function
+        :param moving: Optional boolean mask; only rows where it is True count
+        :type moving: numpy.ndarray
+        :return: Length of the step to take, in ticks
+        :rtype: number
+        """
+        ticks = min(self.max_ticks, max(self.min_ticks, self.ticks))
+        exponent = 1 / (integrator.order + 1)
+        while True:
+            error = self.error(integrator, positions, velocities, acceleration_for(ticks), ticks, moving)
+            scale = 5 if error == 0 else min(5, max(0.2, self.safety * (self.tolerance / error) ** exponent))
+            if error <= self.tolerance or ticks <= self.min_ticks:
+                self.ticks = min(self.max_ticks, max(self.min_ticks, ticks * scale))
+                self.accepted += 1
+                return ticks
+            self.rejected += 1
+            ticks = max(self.min_ticks, ticks * scale)
+
+
+INTEGRATORS = {
+    'euler': EulerIntegrator,
+    'verlet': VelocityVerlet,
+    'leapfrog': Leapfrog,
+    'rk4': RungeKutta4
+}
+"""Name to integrator class; see `Options['integrator']`"""
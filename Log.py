@@ -0,0 +1,127 @@
+"""The log behind :class:`DebugTab.LogTab`.
+
+A :class:`Log.LogPipeline` takes messages from any thread and never blocks the caller:
+
+- Each message source gets a token bucket, so a source logging faster than `Options['log rate']` messages a second
+  (after a burst of `Options['log burst']`) has the rest counted instead of kept. The count is logged once the Tk
+  thread next drains the log.
+- Messages are kept in a ring buffer of the last `Options['log capacity']`; older ones are dropped.
+- The Tk thread calls :meth:`LogPipeline.drain` at display rate and inserts everything new into the Listbox at once.
+- Optionally, messages are also handed to a background thread that writes them to a rotating file.
+
+There are no UI components in this module.
+"""
+
+import collections
+import logging
+import logging.handlers
+import queue
+import time
+
+from Options import Options
+
+
+class LogPipeline:
+    """
+    Rate-limited, bounded log with an optional rotating file.
+
+    :param capacity: Number of messages kept
+    :type capacity: int
+    :param rate: Messages a second each source may log, on average
+    :type rate: number
+    :param burst: Messages a source may log at once before the rate applies
+    :type burst: number
+    """
+    def __init__(self, capacity=Options['log capacity'], rate=Options['log rate'], burst=Options['log burst']):
+        self.capacity = capacity
+        self.rate = rate
+        self.burst = burst
+        self.entries = collections.deque(maxlen=capacity)
+        """The most recent messages, oldest first, with their timestamps"""
+        self.pending = collections.deque(maxlen=capacity)
+        """Messages not drained yet"""
+        self.suppressed = {}
+        """Source to the number of its messages dropped by rate limiting since the last drain"""
+        self._buckets = {}
+        self._file_queue = None
+        self._file_listener = None
+
+    def log(self, message, source='ui'):
+        """
+        Logs a message with a timestamp, unless `source` is over its rate. Safe to call from any thread; it never
+        waits.
+
+        :param message: text to log
+        :type message: str
+        :param source: Who is logging, for rate limiting
+        :type source: str
+        :return: Whether the message was kept
+        :rtype: bool
+        """
+        now = time.monotonic()
+        tokens, last = self._buckets.get(source, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - last) * self.rate)
+        if tokens < 1:
+            self._buckets[source] = (tokens, now)
+            self.suppressed[source] = self.suppressed.get(source, 0) + 1
+            return False
+        self._buckets[source] = (tokens - 1, now)
+        self._append(message)
+        return True
+
+    def _append(self, message):
+        timestring = time.strftime('%H:%M:%S', time.localtime())
+        entry = f"{message}    {timestring}"
+        self.entries.append(entry)
+        self.pending.append(entry)
+        if self._file_queue is not None:
+            self._file_queue.put_nowait(logging.makeLogRecord({'msg': entry}))
+
+    def drain(self):
+        """
+        Called from the Tk thread. Also logs how many messages each source had suppressed.
+
+        :return: Every message logged since the last drain, oldest first
+        :rtype: list
+        """
+        suppressed, self.suppressed = self.suppressed, {}
+        for source, count in suppressed.items():
+            self._append(f"{count} more messages from {source} not logged")
+        pending = self.pending
+        return [pending.popleft() for i in range(len(pending))]
+
+    @property
+    def writing(self):
+        """Whether messages are being written to a file"""
+        return self._file_listener is not None
+
+    def start_file(self, path=Options['log path'], max_bytes=Options['log file bytes'],
+                   backups=Options['log file backups']):
+        """
+        Starts writing every message kept from now on to `path` on a background thread. When the file reaches
+        `max_bytes` it is renamed to path.1 (path.1 to path.2 and so on, up to `backups`) and a new one started.
+
+        :param path: The file to write
+        :type path: str
+        :param max_bytes: Size of a file before it is rotated
+        :type max_bytes: int
+        :param backups: Number of old files kept
+        :type backups: int
+        """
+        self.stop_file()
+        handler = logging.handlers.RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backups)
+        self._file_queue = queue.SimpleQueue()
+        self._file_listener = logging.handlers.QueueListener(self._file_queue, handler)
+        self._file_listener.start()
+
+    def stop_file(self):
+        """
+        Stops writing to a file, once every message already handed to the writer is written.
+        """
+        if self._file_listener is None:
+            return
+        self._file_queue = None
+        self._file_listener.stop()
+        for handler in self._file_listener.handlers:
+            handler.close()
+        self._file_listener = None
@@ -11,10 +11,17 @@ Options = {
     'gravity': False, # starting val
     'air resistance': False,
     'air density': 1.225,  # 1.225 is earth
+    'n-body gravity': False,  # starting val
+    'n-body gravitational constant': 1e-5,  # 6.674e-11 in reality; larger so the pull shows at canvas scale
+    'n-body softening': 1,  # meters
+    'n-body exact threshold': 64,  # up to this many bodies, gravity is summed pair by pair
+    'barnes hut theta': 0.5,  # opening angle; 0 is exact, larger is faster and rougher
     'zoom': 1, # not yet implemented
     'canvas height': 800, # pixels
     'canvas width': 800,
     'update interval': 0.02,  # seconds
+    'render interval': 0.02,  # seconds between redraws on the Tk thread
+    'max steps per frame': 5,  # fixed updates per frame before the simulation is allowed to fall behind
     'default mass': 10000000,  # kilograms
     'key force magnitude': 100000,  # newtons
     'key force duration': 1,
@@ -27,10 +34,39 @@ Options = {
     'canvas top physics adjustment': 5,
     'canvas bottom physics adjustment': 3,
     'object popup update interval': 1,  # in seconds
+    'inspector update interval': 0.2,  # seconds between refreshes of the inspector tab
     'canvas select radius': 5,
     'windows transparent color': '#F3F4FF',
-    'velocity zero limit': 5,
-    'net force zero limit': 5
+    'velocity zero limit': 5,  # m/s; slower bodies may fall asleep
+    'net force zero limit': 5,  # newtons, not counting gravity
+    'sleep delay': 0.5,  # seconds a body has to stay still before it falls asleep
+    'sleeping': True,
+    'integrator': 'euler',  # euler, verlet, leapfrog or rk4; see Integrators.py
+    'adaptive steps': False,  # let the engine choose the length of each step; see Engine.Engine.advance
+    'step tolerance': 0.001,  # meters a body may be off after one adaptive step
+    'min step ticks': 0.25,  # shortest adaptive step, in update intervals
+    'max step ticks': 20,  # longest adaptive step, in update intervals
+    'narrow phase': 'swept',  # swept resolves one collision per body per update, impulse every contact at once
+    'contact iterations': 10,  # most solver passes per update with the impulse narrow phase
+    'contact tolerance': 1e-4,  # m per tick; the solver stops once a pass changes no velocity by more
+    'restitution threshold': 0.05,  # m per tick; contacts approaching slower than this don't bounce
+    'worker processes': 0,  # 0 steps on one core; more splits the world into that many tiles, see Parallel.py
+    'parallel min bodies': 5000,  # smaller worlds step on one core even with worker processes
+    'simulation process': True,  # step the physics in a process of its own; False steps it on a thread, see Remote.py
+    'frame ring slots': 4,  # frames kept in shared memory for the window, see Remote.py
+    'frame ring bodies': 65536,  # bodies published per frame
+    'recorder path': 'trajectory.rec',
+    'recorder frames': 3000,  # ticks kept for replay; 60 seconds at the default update interval
+    'recorder bodies': 4096,  # most bodies recorded per tick; the file starts small and grows up to this
+    'profiler window': 600,  # most recent timings per phase kept for percentiles
+    'profile capture ticks': 100,
+    'profile path': 'tick_profile.pstats',
+    'log capacity': 1000,  # messages kept in the log tab
+    'log rate': 10,  # messages a second each source may log
+    'log burst': 50,  # messages a source may log at once
+    'log path': 'simulator.log',
+    'log file bytes': 1000000,  # size of a log file before it is rotated
+    'log file backups': 3
 }
 """
 """
\ No newline at end of file
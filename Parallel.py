@@ -0,0 +1,312 @@
+"""Stepping one world on several processes.
+
+Python threads can't use more than one core for the physics, so a :class:`Parallel.TiledExecutor` spreads the
+integration, broad phase and times of impact of each step over a pool of worker processes instead:
+
+- The columns of the :class:`World.WorldState` are moved into `multiprocessing.shared_memory` blocks
+  (:class:`Parallel.SharedColumns`). The engine keeps using them as ordinary NumPy arrays; the workers attach to the
+  same blocks, so no body state is pickled between processes.
+- Each step the bodies are cut into vertical strips - tiles - holding the same number of bodies each. A worker
+  integrates the bodies of one tile, then rebuilds a broad phase over them and a halo: every body of another tile
+  whose swept box reaches into this tile's. It hands back the candidate pairs it owns - those whose lower row is one
+  of its bodies, so a pair crossing two tiles is reported once - with their times of impact.
+- The main process merges the pairs of every tile, sorts the ones that touch by time of impact and then by rows,
+  and resolves them with :meth:`Collision.SweptNarrowPhase.resolve_hits`. The merge doesn't depend on how the work
+  was split or which worker finished first, so the same world steps to the same result with any number of workers.
+
+Boundaries, sleeping, interacting forces and observers still run in the main process. Steps that need the whole
+world at once - n-body gravity and :class:`Collision.ContactSolver` - and worlds smaller than
+`Options['parallel min bodies']` are stepped in the main process as before.
+
+There are no UI components in this module.
+"""
+
+import concurrent.futures
+import multiprocessing
+import os
+import weakref
+from multiprocessing import shared_memory
+
+import numpy
+
+from Options import Options
+import World
+import Substance
+import Broadphase
+import Collision
+
+
+class SharedColumns:
+    """
+    Moves every column of a WorldState into shared memory, plus a 'motions' column for how far each body moves
+    during a step. The WorldState's attributes are pointed at the shared arrays, keeping their contents.
+
+    When the world grows it allocates ordinary arrays again; :meth:`shares` then returns False and a new
+    SharedColumns has to be made. The blocks are freed by :meth:`release`, or at exit if it is never called.
+
+    :param world: The world whose columns to share
+    :type world: :class:`World.WorldState`
+    """
+    def __init__(self, world):
+        self.capacity = world.capacity
+        """Rows in each block"""
+        self.arrays = {}
+        """Column name to the array over its shared block"""
+        self.layout = {}
+        """Column name to (block name, shape, dtype); enough for another process to attach"""
+        self._blocks = []
+        columns = {name: getattr(world, name) for name in World.WorldState.COLUMNS}
+        columns['motions'] = numpy.zeros((world.capacity, 2))
+        for name, column in columns.items():
+            block = shared_memory.SharedMemory(create=True, size=max(1, column.nbytes))
+            array = numpy.ndarray(column.shape, column.dtype, buffer=block.buf)
+            array[:] = column
+            self._blocks.append(block)
+            self.arrays[name] = array
+            self.layout[name] = (block.name, column.shape, column.dtype.str)
+        for name in World.WorldState.COLUMNS:
+            setattr(world, name, self.arrays[name])
+        self._finalizer = weakref.finalize(self, _free, self._blocks)
+
+    def shares(self, world):
+        """
+        :param world: A world
+        :type world: :class:`World.WorldState`
+        :return: Whether every column of `world` is still one of these shared arrays
+        :rtype: bool
+        """
+        return all(getattr(world, name) is self.arrays[name] for name in World.WorldState.COLUMNS)
+
+    def release(self, world=None):
+        """
+        Frees the shared blocks. If `world` still uses them, it is handed private copies first.
+
+        :param world: The world the columns were shared from
+        :type world: :class:`World.WorldState`
+        """
+        if world is not None:
+            for name in World.WorldState.COLUMNS:
+                if getattr(world, name) is self.arrays[name]:
+                    setattr(world, name, self.arrays[name].copy())
+        self.arrays = {}
+        self._finalizer()
+
+
+def _free(blocks):
+    for block in blocks:
+        _close(block)
+        block.unlink()
+
+
+def _close(block):
+    try:
+        block.close()
+    except BufferError:  # a view is still alive somewhere; the mapping goes when it does
+        pass
+
+
+_attached = {}
+"""In a worker process: block name to (SharedMemory, array) for every block attached to"""
+
+
+def _columns(layout):
+    """
+    In a worker process: the arrays of `layout`, attaching to blocks not seen before and detaching from blocks no
+    longer used.
+    """
+    names = {block_name for block_name, shape, dtype in layout.values()}
+    for block_name in [name for name in _attached if name not in names]:
+        block, array = _attached.pop(block_name)
+        del array
+        _close(block)
+    columns = {}
+    for name, (block_name, shape, dtype) in layout.items():
+        if block_name not in _attached:
+            block = shared_memory.SharedMemory(name=block_name)
+            _attached[block_name] = (block, numpy.ndarray(shape, dtype, buffer=block.buf))
+        columns[name] = _attached[block_name][1]
+    return columns
+
+
+def _integrate_tile(layout, rows, integrator, ticks, fraction, gravity, air_density, floor_y, materials):
+    """
+    In a worker process: integrates the bodies in `rows`, as :meth:`World.WorldState.integrate` does for the whole
+    world, writing their velocities, accelerations, net forces and motions back to shared memory.
+    """
+    columns = _columns(layout)
+    table = Substance.MaterialTable(len(materials))
+    table.rows[:len(materials)] = materials
+    table.count = len(materials)
+    tile = World.WorldState.from_columns({name: columns[name][rows] for name in World.WorldState.COLUMNS}, table)
+    acceleration = tile.acceleration(tile.net_forces / ticks, gravity, air_density, fraction)
+    motions = tile.integrate(integrator, acceleration, ticks, floor_y)
+    for name in ('velocities', 'accelerations', 'net_forces'):
+        columns[name][rows] = getattr(tile, name)
+    columns['motions'][rows] = motions
+
+
+def _collide_tile(layout, rows, count):
+    """
+    In a worker process: finds the candidate pairs of the bodies in `rows` and their times of impact.
+
+    :return: First and second row of each pair owned by this tile, and its time of impact
+    :rtype: tuple
+    """
+    columns = _columns(layout)
+    positions = columns['positions'][:count]
+    motions = columns['motions'][:count]
+    ends = positions + motions
+    sides = columns['sides'][:count]
+    lows = numpy.minimum(positions[:, 0], ends[:, 0]) - sides
+    highs = numpy.maximum(positions[:, 0], ends[:, 0]) + sides
+    # the halo: every body whose swept box, as the broad phase makes it, reaches into this tile's
+    near = numpy.flatnonzero((highs >= lows[rows].min()) & (lows <= highs[rows].max()))
+    tile = World.WorldState.from_columns({name: columns[name][near]
+                                          for name in ('positions', 'velocities', 'sides', 'awake')})
+    grid = Broadphase.SpatialHashGrid()
+    grid.rebuild(tile, motions[near])
+    owned = numpy.zeros(len(near), dtype=bool)
+    owned[numpy.searchsorted(near, rows)] = True
+    # near is in row order, so the first body of each pair has the lower row; its tile reports the pair
+    pairs = grid.pairs[owned[grid.pairs[:, 0]]]
+    a = pairs[:, 0]
+    b = pairs[:, 1]
+    toi = Collision.times_of_impact(tile.positions, motions[near], tile.sides, a, b)
+    return near[a], near[b], toi
+
+
+class TiledExecutor:
+    """
+    Runs the integration, broad phase and times of impact of each :meth:`Engine.Engine.step` on a pool of worker
+    processes, one vertical strip of the world per worker. Set one as `Engine.tiles` to use it; call :meth:`close`
+    when done with it to stop the workers and free the shared memory. If it is used again after that, it starts
+    again.
+
+    The workers are started with 'spawn', so the Tk thread is never forked, and they start on the first step big
+    enough to use them.
+
+    :param workers: Number of worker processes and tiles; one per core if None
+    :type workers: int
+    :param min_bodies: Worlds with fewer bodies are stepped in the main process
+    :type min_bodies: int
+    """
+    def __init__(self, workers=None, min_bodies=Options['parallel min bodies']):
+        self.workers = workers or os.cpu_count() or 1
+        self.min_bodies = min_bodies
+        self.shared = None
+        """The :class:`Parallel.SharedColumns` of the world being stepped"""
+        self.tile_sizes = []
+        """Bodies owned by each tile on the last step"""
+        self.pair_count = 0
+        """Candidate pairs merged on the last step"""
+        self._pool = None
+        self._world = None
+        self._tiles = []
+
+    def can_run(self, engine):
+        """
+        :param engine: The engine about to step
+        :type engine: :class:`Engine.Engine`
+        :return: Whether this step can be split into tiles
+        :rtype: bool
+        """
+        return (engine.world.count >= self.min_bodies and engine.n_body_gravity is None
+                and isinstance(engine.narrow_phase, Collision.SweptNarrowPhase))
+
+    def _share(self, world):
+        if self.shared is not None and self._world is world and self.shared.shares(world):
+            return
+        if self.shared is not None:
+            self.shared.release(self._world if self._world is not world else None)
+        self.shared = SharedColumns(world)
+        self._world = world
+        if self._pool is None:
+            self._pool = concurrent.futures.ProcessPoolExecutor(
+                self.workers, mp_context=multiprocessing.get_context('spawn'))
+
+    def _split(self, world):
+        """
+        Cuts the world into self.workers tiles of nearly equal numbers of bodies at quantiles of x.
+
+        :return: The rows of each tile, in ascending order
+        :rtype: list
+        """
+        n = world.count
+        x = world.positions[:n, 0]
+        cuts = n * numpy.arange(1, self.workers) // self.workers
+        boundaries = numpy.partition(x, cuts)[cuts] if len(cuts) else cuts
+        owners = numpy.searchsorted(boundaries, x, 'right')
+        order = numpy.argsort(owners, kind='stable')
+        sizes = numpy.bincount(owners, minlength=self.workers)
+        tiles = numpy.split(order, numpy.cumsum(sizes)[:-1])
+        self.tile_sizes = sizes.tolist()
+        return [tile for tile in tiles if len(tile)]
+
+    def integrate(self, engine, ticks, fraction):
+        """
+        Integrates every body, each tile on its own worker. Takes the place of :meth:`World.WorldState.integrate`;
+        the net forces from the force table must already be summed.
+
+        :param engine: The engine being stepped
+        :type engine: :class:`Engine.Engine`
+        :param ticks: Length of the step in ticks
+        :type ticks: number
+        :param fraction: Share of the fields delivered per tick, see :func:`World.delivered_fraction`
+        :type fraction: number
+        """
+        world = engine.world
+        self._share(world)
+        self._tiles = self._split(world)
+        materials = world.materials.rows[:world.materials.count]
+        k = len(self._tiles)
+        list(self._pool.map(_integrate_tile, [self.shared.layout] * k, self._tiles, [engine.integrator] * k,
+                            [ticks] * k, [fraction] * k, [engine.gravity] * k, [engine.air_density] * k,
+                            [engine.min_y] * k, [materials] * k))
+
+    def collide(self, engine, ticks):
+        """
+        Finds the candidate pairs and times of impact of every tile on the workers, then merges them and moves every
+        body through the step with the engine's narrow phase. Takes the place of the broad phase rebuild and
+        :meth:`Collision.SweptNarrowPhase.resolve`; the engine's broad phase is handed the merged pairs.
+
+        :param engine: The engine being stepped, after :meth:`integrate`
+        :type engine: :class:`Engine.Engine`
+        :param ticks: Length of the step in ticks
+        :type ticks: number
+        """
+        world = engine.world
+        n = world.count
+        k = len(self._tiles)
+        found = list(self._pool.map(_collide_tile, [self.shared.layout] * k, self._tiles, [n] * k))
+        a = numpy.concatenate([first for first, second, toi in found])
+        b = numpy.concatenate([second for first, second, toi in found])
+        toi = numpy.concatenate([toi for first, second, toi in found])
+        engine.broad_phase.use_pairs(numpy.stack((a, b), axis=1), n)
+        self.pair_count = len(a)
+        hits = numpy.flatnonzero(numpy.isfinite(toi))
+        hits = hits[numpy.lexsort((b[hits], a[hits], toi[hits]))]
+        engine.narrow_phase.resolve_hits(world, a[hits], b[hits], toi[hits], self.shared.arrays['motions'][:n],
+                                         ticks)
+
+    def close(self):
+        """
+        Stops the workers and frees the shared memory; the world gets private copies of its columns back.
+        """
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+        if self.shared is not None:
+            self.shared.release(self._world)
+            self.shared = None
+            self._world = None
+
+    def stats(self):
+        """
+        :return: Counters from the last step, for logging and benchmarks
+        :rtype: dict
+        """
+        return {
+            'workers': self.workers,
+            'tile sizes': self.tile_sizes,
+            'pairs': self.pair_count
+        }
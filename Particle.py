@@ -37,6 +37,8 @@ class Particle:
         """ Vector from physicsCanvas origin that particle will be placed"""
         self.time_remaining = duration
         """ How much time the particle has left before it's removed from the rendered/referenced objects"""
+        self.handle = None
+        """ Finds this particle in `physicsCanvas.particles`; set by add_to"""
 
     def update(self, interval):
         """
@@ -50,14 +52,13 @@ class Particle:
         self.time_remaining -= interval
         if self.time_remaining <= 0:
             self.physics_canvas.canvas.delete(self.canvas_id)
-            index = self.physics_canvas.particles.index(self)
-            self.physics_canvas.particles.pop(index)
+            self.physics_canvas.particles.remove(self.handle)
         else:
             self.transform(interval)
 
     def add_to(self, physics_canvas):
         """
-        Adds this Particle to the physics canvas, appending it to the list of particles to be updated and making the
+        Adds this Particle to the physics canvas, registering it with the particles to be updated and making the
         internal reference of `self.physics_canvas`.
 
         Afterwards, calls `self.draw`
@@ -67,7 +68,7 @@ class Particle:
         :param physics_canvas:
         :return:
         """
-        physics_canvas.particles.append(self)
+        self.handle = physics_canvas.particles.add(self)
         self.physics_canvas = physics_canvas
         self.draw()
 
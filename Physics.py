@@ -5,15 +5,22 @@ All displacements are calculated on an abstract plane - :class:`Ui.PhysicsCanvas
 canvas coordinates.
 
 One semi-exception - PhysicsObjects handle their own collision detection, and they do that by referencing the
-collection of PhysicsObjects in PhysicsCanvas.
+collection of PhysicsObjects in the :class:`Engine.Engine` simulating them.
+
+The state of each PhysicsObject (displacement, velocity, acceleration, net force, mass and side) is stored in a row of
+a :class:`World.WorldState`; the PhysicsObject itself is a handle into that row.
 
 All the physics logic and calculation should be handled here.
  """
 
+import contextlib
 import math
 
+import numpy
+
 import Substance, Utility
-import Particle
+import World
+import Collision
 from Options import Options
 
 
@@ -22,20 +29,72 @@ class Vector:
     Represents direction and magnitude. Vectors can be broken into x and y components and reassembled from those
     components.
 
+    The x and y components are what is stored. Angle and magnitude are worked out from them only when they are read,
+    and kept until the components change, so code that only adds and scales Vectors never pays for trigonometry.
+    Setting angle or magnitude updates the components straight away.
+
+    Methods ending in _make return a new Vector, unless a Vector is passed as `out`, in which case the result is
+    written into it and no Vector is allocated.
+
     :param angle: The angle, in radians
     :type angle: number
     :param magnitude: The magnitude of the Vector
     :type magnitude: number
     """
+    __slots__ = ('x', 'y', '_angle', '_magnitude', '_polar_x', '_polar_y')
+
     def __init__(self, angle, magnitude):
         """
         constructor
         """
-        self.angle = angle
-        self.magnitude = magnitude
-        self.y = 0
-        self.x = 0
-        self.calculate_components()
+        self._set_polar(angle, magnitude)
+
+    def _set_polar(self, angle, magnitude):
+        """
+        Sets the components from an angle and magnitude, and remembers both.
+        """
+        x = magnitude * math.cos(angle)
+        y = magnitude * math.sin(angle)
+        self.x = x
+        self.y = y
+        self._angle = angle
+        self._magnitude = magnitude
+        self._polar_x = x
+        self._polar_y = y
+
+    def _refresh_polar(self):
+        """
+        Recalculates angle and magnitude if the components changed since they were last worked out.
+        """
+        x = self.x
+        y = self.y
+        if x != self._polar_x or y != self._polar_y:
+            self._angle = math.atan2(y, x)
+            self._magnitude = math.sqrt(x*x + y*y)
+            self._polar_x = x
+            self._polar_y = y
+
+    @property
+    def angle(self):
+        """The angle, in radians"""
+        self._refresh_polar()
+        return self._angle
+
+    @angle.setter
+    def angle(self, value):
+        self._refresh_polar()
+        self._set_polar(value, self._magnitude)
+
+    @property
+    def magnitude(self):
+        """The magnitude"""
+        self._refresh_polar()
+        return self._magnitude
+
+    @magnitude.setter
+    def magnitude(self, value):
+        self._refresh_polar()
+        self._set_polar(self._angle, value)
 
     def calculate_components(self):
         """
@@ -45,9 +104,10 @@ class Vector:
 
         :math:`x = \\text{vector}_\\text{mag} * \\cos{\\theta}`
 
+        Setting angle or magnitude already does this, so it is only needed to undo direct changes to x or y.
         """
-        self.y = self.magnitude * math.sin(self.angle)
-        self.x = self.magnitude * math.cos(self.angle)
+        if self._polar_x is not None:
+            self._set_polar(self._angle, self._magnitude)
 
     def calculate_angles(self):
         """
@@ -57,11 +117,21 @@ class Vector:
 
         :math:`\\text{mag} = \\sqrt{x^2+y^2}`
 
+        Reading angle or magnitude already does this when needed, so calling it is never required.
         """
-        y = self.y
-        x = self.x
-        self.angle = math.atan2(y, x)
-        self.magnitude = math.sqrt(x*x + y*y)
+        self._refresh_polar()
+
+    def set_components(self, x, y):
+        """
+        MUTATES this Vector to have the given components.
+
+        :param x: The x component
+        :type x: number
+        :param y: The y component
+        :type y: number
+        """
+        self.x = x
+        self.y = y
 
     def dot_product(self, other_vector):
         """
@@ -74,6 +144,17 @@ class Vector:
         """
         return (self.x * other_vector.x) + (self.y * other_vector.y)
 
+    def dot_components(self, x, y):
+        """
+        Like dot_product, for a vector given as components, so no Vector has to be made for it.
+
+        :param x: The other x component
+        :param y: The other y component
+        :return: A scalar
+        :rtype: number
+        """
+        return self.x * x + self.y * y
+
     @staticmethod
     def make_vector_from_components(x, y):
         """
@@ -85,39 +166,53 @@ class Vector:
         :returns: A brand new Vector
         :rtype: Vector
         """
-        angle = math.atan2(y, x)
-        magnitude = math.sqrt(x*x + y*y)
-        return Vector(angle, magnitude)
+        vector = Vector.__new__(Vector)
+        vector.x = x
+        vector.y = y
+        vector._polar_x = None  # angle and magnitude are worked out when first read
+        vector._polar_y = None
+        return vector
 
-    def add_make(self, other_vector):
+    @staticmethod
+    def _result(out, x, y):
+        """
+        Writes x and y into out, or into a new Vector if out is None, and returns it.
+        """
+        if out is None:
+            return Vector.make_vector_from_components(x, y)
+        out.x = x
+        out.y = y
+        return out
+
+    def add_make(self, other_vector, out=None):
         """
         Use this to have a new vector return from the addition and the input vectors to be unchanged.
 
-        No existing Vector will mutate.
+        No existing Vector will mutate, except `out` if it is given.
 
         :param other_vector: A vector to add to this one.
         :type other_vector: Vector
-        :returns: A brand new Vector
+        :param out: Optional Vector to write the result into instead of making a new one
+        :type out: Vector
+        :returns: A brand new Vector, or out
         :rtype: Vector
         """
-        new_x = other_vector.x + self.x
-        new_y = other_vector.y + self.y
-        return Vector.make_vector_from_components(new_x, new_y)
+        return Vector._result(out, other_vector.x + self.x, other_vector.y + self.y)
 
-    def subtract_make(self, other_vector):
+    def subtract_make(self, other_vector, out=None):
         """
         Use this to have a new vector return from the subtraction and the input vectors to be unchanged.
 
-        No existing Vector will mutate.
+        No existing Vector will mutate, except `out` if it is given.
 
         :param other_vector: A vector to subtract FROM this one.
         :type other_vector: Vector
-        :returns: A brand new Vector
+        :param out: Optional Vector to write the result into instead of making a new one
+        :type out: Vector
+        :returns: A brand new Vector, or out
         :rtype: Vector
         """
-        new_x = self.x - other_vector.x
-        new_y = self.y - other_vector.y
-        return Vector.make_vector_from_components(new_x, new_y)
+        return Vector._result(out, self.x - other_vector.x, self.y - other_vector.y)
 
     def add(self, other_vector):
         """
@@ -130,7 +225,19 @@ class Vector:
         """
         self.x += other_vector.x
         self.y += other_vector.y
-        self.calculate_angles()
+
+    def add_scaled(self, other_vector, scalar):
+        """
+        MUTATES this Vector by adding another Vector multiplied by the scalar, without making a Vector for the
+        product.
+
+        :param other_vector: A vector to add to this one.
+        :type other_vector: Vector
+        :param scalar: Scalar to multiply the other Vector by
+        :type scalar: number
+        """
+        self.x += other_vector.x * scalar
+        self.y += other_vector.y * scalar
 
     def subtract(self, other_vector):
         """
@@ -143,7 +250,6 @@ class Vector:
         """
         self.x -= other_vector.x
         self.y -= other_vector.y
-        self.calculate_angles()
 
     def rotate(self, radians):
         """
@@ -159,7 +265,6 @@ class Vector:
         else:
             new_angle = twoPi - new_angle
         self.angle = new_angle
-        self.calculate_components()
 
     def scale(self, scalar):
         """
@@ -168,32 +273,34 @@ class Vector:
         :param scalar: Scalar to multiply this Vector's angle by.
         :type scalar: number
         """
-        self.magnitude *= scalar
-        self.calculate_components()
+        self.x *= scalar
+        self.y *= scalar
 
-    def scale_make(self, scalar):
+    def scale_make(self, scalar, out=None):
         """
         Creates a new Vector of a magnitude equal to this Vector's magnitude multiplied by the scalar,
         and returns the new Vector..
 
         :param scalar: Scalar to multiply this Vector's angle by.
         :type scalar: number
-        :returns: A brand new Vector
+        :param out: Optional Vector to write the result into instead of making a new one
+        :type out: Vector
+        :returns: A brand new Vector, or out
         :rtype: Vector
         """
-        new_magnitude = self.magnitude * scalar
-        return Vector(self.angle, new_magnitude)
+        return Vector._result(out, self.x * scalar, self.y * scalar)
 
-    def normal_make(self):
+    def normal_make(self, out=None):
         """
         Returns a new magnitude 1 vector in the same angle.
 
-        :return: new Vector
+        :param out: Optional Vector to write the result into instead of making a new one
+        :type out: Vector
+        :return: new Vector, or out
         :rtype: Vector
         """
-        x = self.x / self.magnitude
-        y = self.y / self.magnitude
-        return Vector.make_vector_from_components(x, y)
+        magnitude = math.sqrt(self.x*self.x + self.y*self.y)
+        return Vector._result(out, self.x / magnitude, self.y / magnitude)
 
     @staticmethod
     def make_directional_vector(direction='S', magnitude=1):
@@ -241,15 +348,130 @@ class Vector:
         return f"Vec({round(self.x,3)}, {round(self.y,3)})    a:{round(math.degrees(self.angle),3)} mag:{round(self.magnitude, 3)}"
 
 
+class BodyVector(Vector):
+    """
+    A Vector whose x and y live in a row of a :class:`World.WorldState` column instead of on the Vector itself.
+
+    PhysicsObjects hand these out for displacement, velocity, acceleration and net force, so existing code that
+    reads or mutates those Vectors (``velocity.x *= -1``, ``velocity.rotate(...)``) reads and writes the world arrays
+    directly. Angle and magnitude are always derived from the components, so calculate_angles and
+    calculate_components have nothing left to do. Changing a BodyVector wakes its body if it is asleep.
+
+    :param body: The PhysicsObject owning the row
+    :type body: :class:`Physics.PhysicsObject`
+    :param column: Name of the WorldState column, e.g. 'velocities'
+    :type column: str
+    """
+    __slots__ = ('body', 'column')
+
+    def __init__(self, body, column):
+        self.body = body
+        self.column = column
+
+    def _row(self):
+        body = self.body
+        return getattr(body.world, self.column)[body.index]
+
+    def _changed(self):
+        body = self.body
+        body.world.wake(body.index)
+
+    @property
+    def x(self):
+        return float(self._row()[0])
+
+    @x.setter
+    def x(self, value):
+        self._row()[0] = value
+        self._changed()
+
+    @property
+    def y(self):
+        return float(self._row()[1])
+
+    @y.setter
+    def y(self, value):
+        self._row()[1] = value
+        self._changed()
+
+    @property
+    def angle(self):
+        row = self._row()
+        return math.atan2(row[1], row[0])
+
+    @angle.setter
+    def angle(self, value):
+        magnitude = self.magnitude
+        row = self._row()
+        row[0] = magnitude * math.cos(value)
+        row[1] = magnitude * math.sin(value)
+        self._changed()
+
+    @property
+    def magnitude(self):
+        row = self._row()
+        return math.hypot(row[0], row[1])
+
+    @magnitude.setter
+    def magnitude(self, value):
+        angle = self.angle
+        row = self._row()
+        row[0] = value * math.cos(angle)
+        row[1] = value * math.sin(angle)
+        self._changed()
+
+    def calculate_components(self):
+        """
+        Nothing to do - the components are the stored values.
+        """
+
+    def calculate_angles(self):
+        """
+        Nothing to do - angle and magnitude are derived on access.
+        """
+
+    def set(self, other_vector):
+        """
+        Copies the components of another Vector into this row.
+
+        :param other_vector: The Vector to copy
+        :type other_vector: Vector
+        """
+        row = self._row()
+        row[0] = other_vector.x
+        row[1] = other_vector.y
+        self._changed()
+
+
+def _body_vector_property(column, doc):
+    """
+    Builds a property that returns the :class:`BodyVector` for `column`, and copies the components of any Vector
+    assigned to it into the world row, so ``physics_object.velocity = Vector(...)`` keeps working.
+    """
+    attribute = '_' + column
+
+    def getter(self):
+        vector = self.__dict__.get(attribute)
+        if vector is None:  # made on first use, so making many objects at once stays cheap
+            vector = self.__dict__[attribute] = BodyVector(self, column)
+        return vector
+
+    def setter(self, vector):
+        getter(self).set(vector)
+
+    return property(getter, setter, doc=doc)
+
+
 class Force(Vector):
     """
     A force which operates over time, executing a single force on the object once per sec.
 
     If constant is true, the force does not deplete and will continue acting on the object.
 
-    PhysicsObjects have lists of forces currently operating on them. As the PhysicsObject updates, it gets a Vector
-    representing a force for each force acting on it. That force is scaled based on the time of the update interval.
-    It also reduces the 'remaining' attribute of the Force until the Force is depleted.
+    Forces are applied to a PhysicsObject with :meth:`PhysicsObject.apply_force`, which copies them into the
+    :class:`World.ForceTable` of the object's world. Each update, every force in the table is scaled based on the time
+    of the update interval, all of them at once, and its remaining time is reduced until the Force is depleted.
+    :meth:`update` does the same calculation for a single Force.
 
     :param angle: Angle in radians
     :type angle: number
@@ -260,6 +482,8 @@ class Force(Vector):
     :param constant: Whether force depletes or not
     :type constant: bool
     """
+    __slots__ = ('force_magnitude', 'remaining', 'constant')
+
     def __init__(self, angle, magnitude, duration=1.0, constant=False):
         Vector.__init__(self, angle, magnitude)
         self.force_magnitude = magnitude
@@ -306,10 +530,21 @@ class Force(Vector):
 
 
 class DragForce(Force):
+    """
+    Air resistance on a single object. The engine applies the same drag to every object at once when air resistance
+    is turned on (see :meth:`World.WorldState.sum_forces`); this class works it out for one object.
+
+    :param physics_object: The object moving through air
+    :type physics_object: PhysicsObject
+    :param air_density: kg/m^3
+    :type air_density: number
+    """
+    __slots__ = ('drag_scale', 'object')
+
     def __init__(self, physics_object, air_density=Options['air density']):
         Force.__init__(self, 0, 0, 1.0, True)
         area = physics_object.side * physics_object.side
-        self.drag_scale = area * air_density * 0.5 * 0.8 * -1 # 0.8 is drag coefficient for cube
+        self.drag_scale = area * air_density * 0.5 * physics_object.material.drag_coefficient * -1
         self.object = physics_object
 
     def update(self, interval):
@@ -334,13 +569,13 @@ class GravitationalForceGenerator:
     Connects two objects together with 'gravity'. Currently not accurately implemented, because planetary scales make
     for poor visibility on the UI.
 
-    Three objects keep a reference to a gravitational force; the `class:Ui.PhysicsCanvas` object and each
+    Three objects keep a reference to a gravitational force; the `class:Engine.Engine` object and each
     `class:Physics.ForceObject` that are connected with the gravity.
 
     When remove() is called on a GravitationalForceGenerator, it removes each of these references so it will no
     longer be updated.
 
-    GraviationalForceGenerator is updated directly by  `class:Ui.PhysicsCanvas`; each update, it calculates the
+    GraviationalForceGenerator is updated directly by  `class:Engine.Engine`; each update, it calculates the
     appropriate graviational pull for its two reference ForceObjects, then adds a force of the appropriate angle and
     magnitude to their force lists.
 
@@ -365,19 +600,13 @@ class GravitationalForceGenerator:
         planet_vector = Vector.make_vector_from_components(planet_off_x, planet_off_y)
         reversed_vector = Vector.make_vector_from_components(planet_off_x*-1, planet_off_y*-1)
         force_magnitude = (math.sqrt(self.planet.mass * self.moon.mass)/2)*interval # not accurate gravitational force
-        self.planet.forces.append(Force(planet_vector.angle, force_magnitude))
-        self.moon.forces.append(Force(reversed_vector.angle, force_magnitude))
+        self.planet.apply_force(Force(planet_vector.angle, force_magnitude))
+        self.moon.apply_force(Force(reversed_vector.angle, force_magnitude))
 
     def remove(self):
-        moon_forces = self.moon.dependent_force_generators
-        moon_i = moon_forces.index(self)
-        planet_forces = self.planet.dependent_force_generators
-        planet_i = planet_forces.index(self)
-        moon_forces.pop(moon_i)
-        planet_forces.pop(planet_i)
-        main_list = self.planet.physics_canvas.interacting_forces
-        main_i = main_list.index(self)
-        main_list.pop(main_i)
+        self.moon.dependent_force_generators.remove(self)
+        self.planet.dependent_force_generators.remove(self)
+        self.planet.engine.remove_interacting_force(self)
 
 
 class PhysicsObject:
@@ -387,8 +616,8 @@ class PhysicsObject:
     Abstracts the physics calculations - :class:`Ui.PhysicsCanvas` is responsible for the rendering, and translating
     the displacement of the PhysicsObject into the Tkinter Canvas coordinate space.
 
-    Each update, it determines how much force should be applied based on the interval and the list of forces
-    currently affecting this object.
+    Each update, the world it lives in determines how much force should be applied based on the interval and the
+    forces currently affecting this object.
 
     From the net force and mass, it calculates acceleration. From the acceleration, it calculates velocity. From
     velocity, displacement is calculated.
@@ -410,68 +639,89 @@ class PhysicsObject:
     :type mass: Number
 
     """
+    displacement = _body_vector_property('positions', "A vector of positional offset from the 0,0 of world origin")
+    velocity = _body_vector_property('velocities', "A vector of velocity magnitude and angle")
+    acceleration = _body_vector_property('accelerations', "A vector of acceleration magnitude and angle")
+    net_force_vector = _body_vector_property('net_forces', "The net force of the last update")
+
     def __init__(self, material, mass):
+        self._bind(mass / material.density)
+        World.WorldState(1).add(self, mass, self.volume**(1/3), material.index)
+
+    def _bind(self, volume):
         self.physics_canvas = None  # added by physics canvas at time of adding
         """Reference to canvas added when object rendered on canvas"""
         self.canvas_id = None  # set by physics canvas at time of drawing
         """Used by the tkinter canvas to reference the shape linked to this object"""
-        self.displacement = Vector(0,0)
-        """A vector of positional offset from the 0,0 of world origin"""
-        self.velocity = Vector(0,0)
-        """A vector of velocity magnitude and angle"""
-        self.acceleration = Vector(0,0)
-        """A vector of acceleration magnitude and angle"""
-        self.material = material
-        """The material the PhysicsObject is made of"""
-        self.mass = mass
+        self.engine = None  # set by the engine at time of adding
+        """The :class:`Engine.Engine` simulating this object"""
+        self.handle = None  # set by the engine at time of adding
+        """Finds this object with :meth:`Engine.Engine.get` until it is removed"""
+        self.world = None
+        """The :class:`World.WorldState` holding this object's row. A private one until added to a PhysicsCanvas"""
+        self.index = 0
+        """This object's row in self.world"""
+        self.volume = volume
+        self.dependent_force_generators = []
+        """ Force generators like :class:`Physics.GravitationalForceGenerator`"""
+
+    @classmethod
+    def without_row(cls, volume):
+        """
+        Makes a PhysicsObject that has no row in any world yet, for filling a world in bulk with
+        :meth:`World.WorldState.extend` (e.g. :func:`Checkpoint.load`). Its state, including its material, can't be
+        read until then.
+
+        :param volume: m^3
+        :type volume: number
+        :rtype: PhysicsObject
+        """
+        physics_object = cls.__new__(cls)
+        physics_object._bind(volume)
+        return physics_object
+
+    @property
+    def material(self):
+        """The :class:`Substance.Material` the PhysicsObject is made of"""
+        world = self.world
+        return world.materials.materials[world.material_ids[self.index]]
+
+    @material.setter
+    def material(self, material):
+        self.world.material_ids[self.index] = material.index
+
+    @property
+    def mass(self):
         """mass in kg"""
-        self.volume = mass / self.material.density
-        self.side = self.volume**(1/3)
+        return float(self.world.masses[self.index])
+
+    @property
+    def side(self):
         """ Length of a side in m"""
-        self.width = self.side
+        return float(self.world.sides[self.index])
+
+    @property
+    def width(self):
         """ width in m"""
-        self.height = self.side
+        return self.side
+
+    @property
+    def height(self):
         """ height in m """
-        self.forces = []
-        """ Currently active forces affecting this object """
-        self.dependent_force_generators = []
-        """ Force generators like :class:`Physics.GravitationalForceGenerator`"""
-        self.net_force_vector = Vector(0,0)
+        return self.side
 
-    def update(self, interval):
+    def apply_force(self, force):
         """
-        Gets a new vector equal to multiplying acceleration by Velocity and adds it
-        to the velocity, mutating the velocity vector. :math:`v = at + v_0`
-        Does the same for displacement. :math:`s = vt + s_0`
-        Tells physicsCanvas to move the rendering of the oval.
-
-        :param interval: The time since last update.
-        :type interval: number
+        Starts a force acting on this object. The force's direction, magnitude, remaining time and constant flag are
+        copied into the :class:`World.ForceTable` of this object's world; the Force itself is not kept.
 
+        :param force: The force to apply
+        :type force: Force
         """
-        self.net_force_vector = Vector(0, 0)
-        non_expired_forces = []
-        for i in range(0, len(self.forces)):  # get the net force for this interval
-            force = self.forces[i]
-            force.update(interval)
-            self.net_force_vector.add(force)
-            if force.remaining > 0:
-                non_expired_forces.append(force)
-        self.forces = non_expired_forces
-        self.acceleration = Vector(self.net_force_vector.angle, self.net_force_vector.magnitude/self.mass)
-        if self.displacement.y - self.side > self.physics_canvas.min_y + self.side:
-            self.velocity.add(self.acceleration)
-        #elif self.velocity.y < Options['velocity zero limit']:
-        #    if self.net_force_vector.y < Options['net force zero limit']:
-        #        self.velocity = Vector.make_vector_from_components(self.velocity.x, 0)
-        #        self.displacement.y = self.physics_canvas.min_y + self.side
-        #        self.displacement.calculate_angles()
-        # a check to see if it should stop
-        y_min = self.physics_canvas.min_y
-
-        if not self.check_collision(interval):
-            self.displacement.add(self.velocity)
-            self.physics_canvas.move_physics_object(self)
+        lock = self.engine.lock if self.engine is not None else contextlib.nullcontext()
+        with lock:
+            self.world.forces.add(self.index, force.x, force.y, force.remaining, force.constant)
+            self.world.wake(self.index)
 
     def collide(self, other_object, my_next_displacement, other_next_displacement, interval):
         """
@@ -516,10 +766,10 @@ class PhysicsObject:
         # calculate the normal vector
         x_diff = other_object.displacement.x - self.displacement.x
         y_diff = other_object.displacement.y - self.displacement.y
-        normal = Vector.make_vector_from_components(x_diff, y_diff)
-        unit_normal = normal.scale_make(1)
-        unit_normal.magnitude = 1
-        unit_normal.calculate_components()
+        if x_diff == 0 and y_diff == 0:
+            unit_normal = Vector.make_vector_from_components(1, 0)
+        else:
+            unit_normal = Vector.make_vector_from_components(x_diff, y_diff).normal_make()
 
         # calculate the unit tangent
         unit_tangent = Vector.make_vector_from_components(unit_normal.y*(-1), unit_normal.x)
@@ -536,67 +786,55 @@ class PhysicsObject:
         v_1f_mag = (v1_n*(m_1-m_2)+2*m_2*v2_n)/(m_1+m_2)
         v_2f_mag = (v2_n*(m_2-m_1)+2*m_1*v1_n)/(m_1+m_2)
 
-        # convert new magnitudes to vectors
-        v_1fn = unit_normal.scale_make(v_1f_mag)
-        v_1ft = unit_tangent.scale_make(v1_t)
-        v_2fn = unit_normal.scale_make(v_2f_mag)
-        v_2ft = unit_tangent.scale_make(v2_t)
-
-        # final velocity vectors
-        v_1_f = v_1fn.add_make(v_1ft)
-        v_2_f = v_2fn.add_make(v_2ft)
+        # convert new magnitudes to vectors, then add the unchanged tangential velocities in place
+        v_1_f = unit_normal.scale_make(v_1f_mag)
+        v_1_f.add_scaled(unit_tangent, v1_t)
+        v_2_f = unit_normal.scale_make(v_2f_mag)
+        v_2_f.add_scaled(unit_tangent, v2_t)
 
         self.velocity = v_1_f
         other_object.velocity= v_2_f
 
-        self.physics_canvas.move_physics_object(self)
-
     def check_collision(self, interval):
         """
-        The way collision is checked is that the next displacement from the velocity is calculated.
+        Sweeps this object's box along its velocity against each of its candidates from the engine's broad phase
+        (:class:`Broadphase.SpatialHashGrid`, rebuilt once per update) and finds the earliest time they touch (see
+        :func:`Collision.times_of_impact`).
 
-        For each other extant physics object on the canvas, the next displacement from velocity is calculated.
+        If they touch during the update, both objects are moved to where they first touch and :meth:`collide` is
+        called. The engine resolves the whole world at once with :class:`Collision.SweptNarrowPhase`; this does the
+        same for one object.
 
-        If the lines between the displacements cross, the vectors have 'collided'.
-
-        This function returns True or False and is used in the update function. If collision doesn't happen,
-        the update function handles simple movement.
-
-        :param interval:
+        :param interval: Time of the update, seconds
+        :type interval: number
         :return: Whether collision happened
         :rtype: bool
 
         """
-        next_displacement = self.displacement.add_make(self.velocity) # add radius/side length here?
-        for p in self.physics_canvas.physics_objects:
-            if p != self:
-                other_next_displacement = p.displacement.add_make(p.velocity)
-                y_cross = False
-                if self.displacement.y <= p.displacement.y:
-                    if next_displacement.y + self.side >= other_next_displacement.y - p.side:
-                        y_cross = True
-                elif self.displacement.y >= p.displacement.y:
-                    if next_displacement.y - self.side <= other_next_displacement.y + p.side:
-                        y_cross = True
-                x_cross = False
-                if self.displacement.x <= p.displacement.x:
-                    if next_displacement.x + self.side >= other_next_displacement.x - p.side:
-                        x_cross = True
-                elif self.displacement.x >= p.displacement.x:
-                    if next_displacement.x - self.side <= other_next_displacement.x + p.side:
-                        x_cross = True
-
-                if x_cross and y_cross:
-                    self.collide(p, next_displacement, other_next_displacement, interval)
-                    return True
-        return False
+        candidates = self.engine.broad_phase.candidates(self.index)
+        if not candidates:
+            return False
+        world = self.world
+        others = numpy.array(candidates)
+        toi = Collision.times_of_impact(world.positions, world.velocities, world.sides,
+                                        numpy.full(len(others), self.index), others)
+        nearest = int(numpy.argmin(toi))
+        t = float(toi[nearest])
+        if t == math.inf:
+            return False
+        other = world.bodies[candidates[nearest]]
+        world.positions[self.index] += t * world.velocities[self.index]
+        world.positions[other.index] += t * world.velocities[other.index]
+        self.collide(other, self.displacement.add_make(self.velocity), other.displacement.add_make(other.velocity),
+                     interval)
+        return True
 
     def clear_forces(self):
         """
         Clears forces from self.dependent_force_generators by calling remove() on each
 
         """
-        for f in self.dependent_force_generators:
+        for f in list(self.dependent_force_generators):  # each one removes itself from the list
             f.remove()
 
     def get_energy_vector(self):
@@ -3,6 +3,8 @@ from tkinter import ttk
 
 import math
 
+import numpy
+
 import Substance
 import Utility
 from Options import Options
@@ -48,123 +50,192 @@ class PhysicsWindow:
             self.time_elapsed_since_last_update = 0
 
 
-class PhysicsObjectWindow(PhysicsWindow):
+class InspectorTab(ttk.Frame):
     """
-    A window which tracks the status of a :class:`Physics.ForceObject`, showing its current x, y, velocity, etc.
+    Shows the status of any number of PhysicsObjects - their x, y, velocity, etc. - in one tab of the main window.
+    Takes the place of a popup window per object.
+
+    Every inspected object gets an :class:`PhysicsWindow.InspectorRow`. The simulation is told which objects are
+    inspected, and every `Options['inspector update interval']` seconds sends the state of all of them in one event
+    (see :meth:`Remote.Simulation.inspected`). :meth:`show` only sets labels whose rounded value changed, so it costs
+    the simulation next to nothing however many objects are inspected.
 
-    Also provides buttons for deleting the object and adding an "orbiter"
+    Created by :class:`Ui.MainWindow`.
 
+    :param parent: The notebook this tab is placed in
+    :type parent: widget
     :param window: The main UI window
     :type window: :class:`Ui.MainWindow`
-    :param physics_object: The ForceObject to track
-    :type physics_object: :class:`Physics.ForceObject`
-    :param x: The screen x the window should appear
-    :type x: number
-    :param y: The screen y the window should appear
-    :type y: number
     """
-    def __init__(self, window, physics_object, x = 200, y=200):
+    def __init__(self, parent, window):
+        ttk.Frame.__init__(self, parent)
+        self.window = window
+        self.rows = {}
+        """`PhysicsObject.handle` of each inspected object to its InspectorRow"""
+        self.opened = 0
+        """Number of rows ever opened; rows are shown in the order they were opened"""
+
+        self.scroll_bar = Scrollbar(self)
+        self.list_canvas = Canvas(self, width=330, height=Options['canvas height'] - 60, highlightthickness=0,
+                                  yscrollcommand=self.scroll_bar.set)
+        self.scroll_bar['command'] = self.list_canvas.yview
+        self.list_frame = ttk.Frame(self.list_canvas)
+        self.list_canvas.create_window(0, 0, window=self.list_frame, anchor=NW)
+        self.list_frame.bind('<Configure>', lambda e: self.list_canvas.configure(
+            scrollregion=self.list_canvas.bbox(ALL)))
+        close_all_button = ttk.Button(self, text='Close all', command=self.clear)
+
+        close_all_button.grid(column=1, row=0, sticky=W)
+        self.scroll_bar.grid(column=0, row=1, sticky=(N, S))
+        self.list_canvas.grid(column=1, row=1)
+
+    def inspect(self, handle):
         """
-        constructor
+        Adds a row for a PhysicsObject, unless it already has one, and brings this tab to the front.
+
+        :param handle: `PhysicsObject.handle` of the object to show
+        :type handle: tuple
         """
-        PhysicsWindow.__init__(self, window)
-        self.root.geometry(f"+{round(x)}+{round(y)}")
-        self.physics_object = physics_object
-
-        id_label = ttk.Label(self.root, text='id: '+str(physics_object.canvas_id))
-        id_label.grid(row=0, column=0, sticky=W)
-        material_text = f"{physics_object.material.name}, {physics_object.mass}kg"
-        material_label = ttk.Label(self.root, text=material_text)
-        material_label.grid(row=1, columnspan=4, sticky = W)
-        x_label = ttk.Label(self.root, text='x: ')
-        x_label.grid(row=2, column=0, sticky=E)
-        self.x_val = ttk.Label(self.root)
-        self.x_val.grid(row=2, column=1, sticky=W)
-        y_label = ttk.Label(self.root, text='y: ')
-        y_label.grid(row=2, column=2, sticky=E)
-        self.y_val = ttk.Label(self.root)
-        self.y_val.grid(row=2, column=3, sticky=W)
-        self.velocity_label = ttk.Label(self.root)
-        self.velocity_label.grid(row=3, column=0, columnspan=4, sticky=W)
-        self.acceleration_label = ttk.Label(self.root)
-        self.acceleration_label.grid(row=4, column=0, columnspan=4, sticky=W)
-        self.net_force_label = ttk.Label(self.root)
-        self.net_force_label.grid(row=5, column=0, columnspan=4, sticky=W)
-
-        self.delete_button = ttk.Button(self.root, text='Delete', command=self.delete_button)
-        self.delete_button.grid(row=3, column=4, sticky=E)
-
-        self.add_orbiter_button = ttk.Button(self.root, text='Add Orbiter', command=self.orbiter_button)
-        self.add_orbiter_button.grid(row=4, column=4, sticky=E)
-
-        self.update(Options['object popup update interval'])
-        self.root.mainloop()
-        # add additional protocol to window close so it removes from open window list
+        if handle not in self.rows:
+            row = InspectorRow(self, handle)
+            self.rows[handle] = row
+            self.opened += 1
+            row.frame.grid(column=0, row=self.opened, sticky=W)
+            self.watch()
+        self.window.right_notebook.select(self)
+
+    def forget(self, row):
+        """
+        Removes a row.
 
-    def update(self, interval):
+        :param row: The row to remove
+        :type row: :class:`PhysicsWindow.InspectorRow`
         """
-        Updates the displayed information.
+        if self.rows.pop(row.handle, None) is not None:
+            row.frame.destroy()
+            self.watch()
 
-        Updates less frequently than the framerate; only as often as specified in Options.py to improve performance
+    def clear(self):
+        """
+        Removes every row.
+        """
+        for row in list(self.rows.values()):
+            self.forget(row)
 
-        :param interval: Time in seconds
-        :type interval: number
+    def watch(self):
         """
-        self.time_elapsed_since_last_update += interval
-        if self.time_elapsed_since_last_update >= Options['object popup update interval']:
-            self.root.lift()
-            displacement = self.physics_object.displacement
-            x_text = f"{round(displacement.x)} m"
-            y_text = f"{round(displacement.y)} m"
-            self.x_val['text'] = x_text
-            self.y_val['text'] = y_text
-            velocity = self.physics_object.velocity
-            velocity_text = f"velocity: {round(velocity.magnitude)} m/s, {round(math.degrees(velocity.angle))} deg"
-            self.velocity_label['text'] = velocity_text
-            acceleration = self.physics_object.acceleration
-            acceleration_text = f"acceleration: {round(acceleration.magnitude)} m/s^2, {round(math.degrees(acceleration.angle))} deg"
-            self.acceleration_label['text'] = acceleration_text
-            net_force = self.physics_object.net_force_vector
-            net_force_text = f"net_force: {round(net_force.magnitude)} N, {round(math.degrees(net_force.angle))} deg"
-            self.net_force_label['text'] = net_force_text
-            self.time_elapsed_since_last_update = 0
+        Tells the simulation which objects to send the state of.
+        """
+        self.window.simulation.send('watch', list(self.rows))
+
+    def show(self, states):
+        """
+        Called on the Tk thread with each 'inspected' event from the simulation. Passes each row its rounded values.
+        Rows of objects no longer in the simulation are removed.
+
+        :param states: Handle to material name, mass and values of each inspected object, or to None for objects
+            no longer in the simulation; see :meth:`Remote.Simulation.inspected`
+        :type states: dict
+        """
+        for handle, state in states.items():
+            row = self.rows.get(handle)
+            if row is None:
+                continue
+            if state is None:
+                self.forget(row)
+                continue
+            name, mass, values = state
+            row.show(name, mass, numpy.rint(values).astype(numpy.int64).tolist())
+
+
+class InspectorRow:
+    """
+    The part of the :class:`PhysicsWindow.InspectorTab` showing one PhysicsObject, with buttons for deleting the
+    object, adding an "orbiter" and closing the row.
+
+    :param inspector: The tab the row is in
+    :type inspector: :class:`PhysicsWindow.InspectorTab`
+    :param handle: `PhysicsObject.handle` of the object to show
+    :type handle: tuple
+    """
+    FORMATS = (
+        (slice(0, 1), "x: {} m"),
+        (slice(1, 2), "y: {} m"),
+        (slice(2, 4), "velocity: {} m/s, {} deg"),
+        (slice(4, 6), "acceleration: {} m/s^2, {} deg"),
+        (slice(6, 8), "net_force: {} N, {} deg")
+    )
+    """The part of the values passed to :meth:`show` each label shows, and how"""
+
+    def __init__(self, inspector, handle):
+        self.inspector = inspector
+        self.window = inspector.window
+        self.handle = handle
+        self.frame = ttk.Frame(inspector.list_frame, borderwidth=1, relief='groove')
+
+        self.canvas_id = self.window.physics_canvas.items.get(handle)
+        self.header_label = ttk.Label(self.frame, text=f"id: {self.canvas_id}")
+        self.header_label.grid(row=0, column=0, columnspan=2, sticky=W)
+        close_button = ttk.Button(self.frame, text='x', width=2, command=self.close_button)
+        close_button.grid(row=0, column=2, sticky=E)
+        self.labels = []
+        for i, (part, text) in enumerate(self.FORMATS):
+            label = ttk.Label(self.frame)
+            label.grid(row=1 + i//2, column=i % 2, sticky=W)
+            self.labels.append(label)
+        self.shown = [None] * len(self.FORMATS)
+        """The rounded values each label shows"""
+        self.shown_header = None
+
+        self.delete_button = ttk.Button(self.frame, text='Delete', command=self.delete_button)
+        self.delete_button.grid(row=3, column=1, sticky=E)
+        self.add_orbiter_button = ttk.Button(self.frame, text='Add Orbiter', command=self.orbiter_button)
+        self.add_orbiter_button.grid(row=3, column=2, sticky=E)
+
+    def show(self, name, mass, values):
+        """
+        Sets the header once, and the labels whose values changed.
+
+        :param name: Name of the object's material
+        :type name: str
+        :param mass: The object's mass, kg
+        :type mass: number
+        :param values: x, y, then magnitude and angle in degrees of velocity, acceleration and net force, rounded
+        :type values: list
+        """
+        if self.shown_header is None:
+            self.shown_header = f"id: {self.canvas_id}  {name}, {mass}kg"
+            self.header_label['text'] = self.shown_header
+        for i, (part, text) in enumerate(self.FORMATS):
+            shown = values[part]
+            if shown != self.shown[i]:
+                self.labels[i]['text'] = text.format(*shown)
+                self.shown[i] = shown
+
+    def close_button(self):
+        """
+        Stops inspecting the object.
+        """
+        self.inspector.forget(self)
 
     def delete_button(self):
         """
-        Called when user presses the delete button on the window.
+        Called when user presses the delete button on the row.
 
-        Deletes the ForceObject and the PhysicsObjectWindow
+        Deletes the PhysicsObject and the row
 
-        Calls clear_forces on the :class:`Physics.ForceObject`
+        The simulation calls clear_forces on the :class:`Physics.PhysicsObject`
         """
-        self.physics_object.clear_forces()
-        self.window.physics_canvas.delete_physics_object(self.physics_object)
-        self.del_win()
+        self.window.physics_canvas.delete_physics_object(self.handle)
+        self.inspector.forget(self)
 
     def orbiter_button(self):
         """
-        Adds a new ForceObject to the physics canvas. The new ForceObject is 1/100th the mass of the object this
-        ForceWindow is already referencing. It starts 100 meters N of this ForceWindow's ForceObject and has a
-        western velocity. A :class:`Physics.GravitationalForceGenerator` is also created to generate gravity between
-        the two objects
-        """
-        planet = self.physics_object
-        gravitational_constant = 6.67*10**(-11)
-        orbital_radius = 100
-        new_mass = planet.mass/100
-        material = planet.material
-        force_magnitude = (gravitational_constant * planet.mass * new_mass)/orbital_radius**2
-        moon_radial_acceleration = new_mass/force_magnitude
-        orbital_velocity = 10
-        moon = Physics.PhysicsObject(material, new_mass)
-        moon_x = planet.displacement.x
-        moon_y = planet.displacement.y - orbital_radius
-        moon.displacement = Physics.Vector.make_vector_from_components(moon_x,moon_y)
-        moon.velocity = Physics.Vector.make_directional_vector('W', orbital_velocity)
-        self.window.physics_canvas.add_physics_object(moon)
-        grav = Physics.GravitationalForceGenerator(planet, moon)
-        self.window.physics_canvas.interacting_forces.append(grav)
-        self.window.log('added orbiter')
+        Has the simulation add a new PhysicsObject 1/100th the mass of the object this row is showing. It starts 100
+        meters S of that object and has a western velocity. A :class:`Physics.GravitationalForceGenerator` is also
+        created to generate gravity between the two objects; see :meth:`Remote.Simulation.add_orbiter`
+        """
+        self.window.simulation.send('orbiter', self.handle)
 
 
 class AddObjectWindow(PhysicsWindow):
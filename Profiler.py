@@ -0,0 +1,171 @@
+"""Timing where each tick goes.
+
+A :class:`Profiler.TickProfiler` keeps the most recent durations of each phase of a tick and reports rolling
+percentiles of them. The simulation and the window each keep their own (see :mod:`Remote`): the simulation times
+the phases of :meth:`Engine.Engine.step`, the window times events, drawing, particles and popup windows in
+:meth:`Ui.TimeSelector.draw_frame`.
+
+Set one as `Engine.profiler` to turn timing on. With `Engine.profiler` left as None, the only cost is a check for
+None after each phase.
+
+The profiler can also capture the next few ticks with cProfile, for when the phase timings say where the time went
+but not why. Each capture covers every thread of its process and is written as one pstats file::
+
+    python -m pstats tick_profile.pstats
+
+There are no UI components in this module.
+"""
+
+import cProfile
+import pstats
+import threading
+import time
+
+import numpy
+
+from Options import Options
+
+PHASES = ('forces', 'integration', 'collision', 'boundary', 'sleeping', 'interacting forces', 'observers', 'step',
+          'events', 'render', 'particles', 'additional windows', 'frame')
+"""Phases timed, in the order they happen. 'step' and 'frame' are the totals of the simulation and the window."""
+
+
+class TickProfiler:
+    """
+    Rolling timings of each phase in :data:`Profiler.PHASES`, and cProfile captures.
+
+    :param window: Number of recent timings kept per phase
+    :type window: int
+    """
+    def __init__(self, window=Options['profiler window']):
+        self.window = window
+        self.times = {phase: numpy.zeros(window) for phase in PHASES}
+        """Phase to a ring buffer of its recent durations, seconds"""
+        self.counts = dict.fromkeys(PHASES, 0)
+        """Phase to the number of times it has been timed"""
+        self.capture_ticks = 0
+        """Ticks left to capture with cProfile; 0 when not capturing"""
+        self.capture_path = None
+        self.last_capture = None
+        """Path of the last capture, once written; None while capturing"""
+        self._profiles = {}
+        self._finished = []
+        self._lock = threading.Lock()
+
+    def record(self, phase, seconds):
+        """
+        :param phase: One of :data:`Profiler.PHASES`
+        :type phase: str
+        :param seconds: How long it took this time
+        :type seconds: number
+        """
+        i = self.counts[phase]
+        self.times[phase][i % self.window] = seconds
+        self.counts[phase] = i + 1
+
+    def lap(self, phase, since):
+        """
+        Records the time from `since` to now as `phase`. Chain laps to time phases that follow each other::
+
+            t = time.perf_counter()
+            ...
+            t = profiler.lap('forces', t)
+            ...
+            t = profiler.lap('integration', t)
+
+        :param phase: One of :data:`Profiler.PHASES`
+        :type phase: str
+        :param since: When the phase started, from time.perf_counter
+        :type since: number
+        :return: Now, from time.perf_counter
+        :rtype: number
+        """
+        now = time.perf_counter()
+        self.record(phase, now - since)
+        return now
+
+    def percentiles(self, q=(50, 95, 99)):
+        """
+        :param q: Percentiles to work out, 0 to 100
+        :type q: tuple
+        :return: Phase to an array of the percentiles of its recent durations in seconds, for phases timed so far
+        :rtype: dict
+        """
+        result = {}
+        for phase in PHASES:
+            n = min(self.counts[phase], self.window)
+            if n:
+                result[phase] = numpy.percentile(self.times[phase][:n], q)
+        return result
+
+    def summary(self):
+        """
+        :return: One line per timed phase with its 50th, 95th and 99th percentile in ms
+        :rtype: str
+        """
+        return '\n'.join(f"{phase}: {p50*1000:.2f} / {p95*1000:.2f} / {p99*1000:.2f}"
+                         for phase, (p50, p95, p99) in self.percentiles().items())
+
+    def reset(self):
+        """
+        Forgets every timing.
+        """
+        for phase in PHASES:
+            self.counts[phase] = 0
+
+    def start_capture(self, ticks=Options['profile capture ticks'], path=Options['profile path']):
+        """
+        Captures the next `ticks` engine steps or drawn frames with cProfile. The capture is written to `path` once
+        the last of them is done.
+
+        :param ticks: Number of engine steps or frames to capture
+        :type ticks: int
+        :param path: pstats file to write
+        :type path: str
+        """
+        with self._lock:
+            self.capture_path = path
+            self.capture_ticks = ticks
+            self.last_capture = None
+
+    def begin_capture(self):
+        """
+        Called at the start of an engine step or a frame. Does nothing unless capturing.
+        """
+        if not self.capture_ticks:
+            return
+        with self._lock:
+            if not self.capture_ticks:
+                return
+            thread = threading.get_ident()
+            profile = self._profiles.get(thread)
+            if profile is None:
+                profile = self._profiles[thread] = cProfile.Profile()
+        profile.enable()
+
+    def end_capture(self, tick=False):
+        """
+        Called at the end of an engine step or a frame. Does nothing unless this thread is being captured.
+
+        :param tick: True at the end of an engine step, or of a frame in the window, which counts towards the ticks
+            to capture
+        :type tick: bool
+        """
+        profile = self._profiles.get(threading.get_ident())
+        if profile is None:
+            return
+        profile.disable()
+        with self._lock:
+            if tick and self.capture_ticks:
+                self.capture_ticks -= 1
+            if self.capture_ticks:
+                return
+            # each thread hands in its own profile, so none is still running when the capture is written
+            self._finished.append(self._profiles.pop(threading.get_ident()))
+            if not self._profiles:
+                stats = pstats.Stats(self._finished[0])
+                for other in self._finished[1:]:
+                    stats.add(other)
+                stats.dump_stats(self.capture_path)
+                self._finished = []
+                self.last_capture = self.capture_path
@@ -0,0 +1,249 @@
+"""Recording and replaying what happened during a run.
+
+A :class:`Recorder.TrajectoryRecorder` keeps the displacement and velocity of every body for the most recent
+`frames` ticks in a memory-mapped file. The file is a ring buffer - tick t always goes in slot t % frames - so
+recording never allocates, and finding a tick again is a single index. Set it as `Engine.recorder` and the engine
+records after every step.
+
+:class:`Ui.PhysicsCanvas` replays a recorded tick by drawing a :class:`Recorder.ReplayFrame`, which looks like a
+:class:`Remote.RingFrame` to :meth:`Ui.PhysicsCanvas.render`, so scrubbing doesn't simulate anything. The window
+opens the file the simulation records to with :meth:`TrajectoryRecorder.open`.
+
+Frames are stored by row, along with the handle of the body in each row (see :class:`Registry.HandleRegistry`). Rows
+are taken over by other bodies when a body is removed (see :meth:`World.WorldState.remove`), so a replayed frame
+matches bodies by handle, not by row: bodies removed since are left out, and bodies added since aren't moved.
+
+There are no UI components in this module.
+"""
+
+import os
+
+import numpy
+
+from Options import Options
+import Checkpoint
+
+
+class ReplayFrame:
+    """
+    One recorded tick laid over a live frame, in the shape :meth:`Ui.PhysicsCanvas.render` expects.
+
+    Holds every body of the live frame. Those that were recorded are at their recorded displacement, matched by
+    handle; the rest are where the live frame has them.
+
+    :param recorder: Where the tick was recorded
+    :type recorder: :class:`Recorder.TrajectoryRecorder`
+    :param slot: The slot holding the tick
+    :type slot: int
+    :param live: The newest frame of the simulation the tick was recorded from
+    :type live: :class:`Remote.RingFrame`
+    """
+    def __init__(self, recorder, slot, live):
+        n = int(recorder.counts[slot])
+        rows = recorder.rows(slot, live)
+        kept = rows >= 0
+        self.tick = int(recorder.ticks[slot])
+        self.time = float(recorder.times[slot])
+        self.dt = 0
+        self.version = (live.version, int(recorder.versions[slot]))
+        """Changes whenever the bodies held could: with the live rows or with the recorded ones"""
+        self.handles = live.handles
+        self.colors = live.colors
+        self.sides = live.sides
+        self.positions = live.positions.copy()
+        self.positions[rows[kept]] = recorder.positions[slot, :n][kept]
+
+    def interpolate(self, alpha):
+        """
+        :return: The recorded displacements; a replayed frame isn't interpolated
+        :rtype: numpy.ndarray
+        """
+        return self.positions
+
+
+class TrajectoryRecorder:
+    """
+    A ring buffer of per-tick body state in a memory-mapped file.
+
+    Displacement and velocity are stored as 32 bit floats, which is plenty for drawing and halves the copying
+    compared to the 64 bit world arrays. The file starts with room for `max_bodies` rows per tick and is rewritten
+    with twice as many whenever a tick has more bodies, up to `limit`; bodies past that are not recorded.
+
+    :param path: File to record to; it is created, or overwritten
+    :type path: str
+    :param frames: Number of ticks kept
+    :type frames: int
+    :param max_bodies: Number of rows recorded per tick to start with
+    :type max_bodies: int
+    :param limit: Most rows recorded per tick
+    :type limit: int
+    """
+    def __init__(self, path=Options['recorder path'], frames=Options['recorder frames'], max_bodies=64,
+                 limit=Options['recorder bodies']):
+        arrays = Checkpoint.create(path, {'kind': 'trajectory'}, self._layout(frames, min(max_bodies, limit)))
+        arrays['ticks'][:] = -1  # no tick is recorded in any slot yet
+        self._use(path, arrays)
+        self.limit = limit
+
+    @staticmethod
+    def _layout(frames, max_bodies):
+        return {
+            'ticks': (numpy.int64, (frames,)),
+            'times': (numpy.float64, (frames,)),
+            'counts': (numpy.int32, (frames,)),
+            'versions': (numpy.int64, (frames,)),
+            'handles': (numpy.int64, (frames, max_bodies, 2)),
+            'positions': (numpy.float32, (frames, max_bodies, 2)),
+            'velocities': (numpy.float32, (frames, max_bodies, 2))
+        }
+
+    def _use(self, path, arrays):
+        self.path = path
+        self.ticks = arrays['ticks']
+        """Tick recorded in each slot, -1 for none"""
+        self.times = arrays['times']
+        """Simulated time of each slot"""
+        self.counts = arrays['counts']
+        """Number of bodies recorded in each slot"""
+        self.versions = arrays['versions']
+        """:attr:`World.WorldState.version` of each slot; slots with equal versions have the same body in each row"""
+        self.handles = arrays['handles']
+        """`PhysicsObject.handle` of the body in each row of each slot"""
+        self.positions = arrays['positions']
+        self.velocities = arrays['velocities']
+        self.frames = len(self.ticks)
+        self.max_bodies = self.positions.shape[1]
+        self.truncated = 0
+        """Ticks that had more bodies than could be recorded"""
+        self._handles = numpy.zeros((0, 2), dtype=numpy.int64)
+        self._handles_version = None
+        self._rows = {}
+
+    @classmethod
+    def open(cls, path):
+        """
+        Opens an existing recording for replay.
+
+        :param path: File written by a TrajectoryRecorder
+        :type path: str
+        :rtype: TrajectoryRecorder
+        """
+        header, arrays = Checkpoint.read(path, writable=True)
+        if header.get('kind') != 'trajectory' or 'handles' not in arrays:
+            raise ValueError(f"{path} is not a trajectory recording")
+        recorder = cls.__new__(cls)
+        recorder._use(path, arrays)
+        recorder.limit = recorder.max_bodies
+        return recorder
+
+    def _grow(self, n):
+        """
+        Rewrites the file with room for at least `n` bodies per tick, up to self.limit, keeping what's recorded.
+        """
+        max_bodies = min(self.limit, max(n, 2 * self.max_bodies))
+        if max_bodies <= self.max_bodies:
+            return
+        grown_path = self.path + '.grow'
+        arrays = Checkpoint.create(grown_path, {'kind': 'trajectory'}, self._layout(self.frames, max_bodies))
+        for name, array in arrays.items():
+            old = getattr(self, name)
+            if array.ndim == 1:
+                array[:] = old
+            else:
+                array[:, :self.max_bodies] = old
+            array.flush()
+        del arrays, old
+        truncated = self.truncated
+        for name in self._layout(0, 0):
+            setattr(self, name, None)  # drop the old maps before the file is replaced
+        os.replace(grown_path, self.path)
+        self._use(self.path, Checkpoint.read(self.path, writable=True)[1])
+        self.truncated = truncated
+
+    def record(self, engine):
+        """
+        Copies the current state of `engine` into the slot for its tick. Called by :meth:`Engine.Engine.step`.
+
+        :param engine: The engine to record
+        :type engine: :class:`Engine.Engine`
+        """
+        world = engine.world
+        n = world.count
+        if n > self.max_bodies:
+            self._grow(n)
+        if n > self.max_bodies:
+            n = self.max_bodies
+            self.truncated += 1
+        if self._handles_version != world.version:  # handles only change with the rows
+            self._handles = numpy.array([body.handle for body in world.bodies], dtype=numpy.int64).reshape(-1, 2)
+            self._handles_version = world.version
+        slot = engine.tick % self.frames
+        self.positions[slot, :n] = world.positions[:n]
+        self.velocities[slot, :n] = world.velocities[:n]
+        self.handles[slot, :n] = self._handles[:n]
+        self.versions[slot] = world.version
+        self.counts[slot] = n
+        self.times[slot] = engine.time
+        self.ticks[slot] = engine.tick
+
+    def has(self, tick):
+        """
+        :param tick: An engine tick
+        :type tick: int
+        :return: Whether that tick is still in the buffer
+        :rtype: bool
+        """
+        return tick >= 0 and int(self.ticks[tick % self.frames]) == tick
+
+    def tick_range(self):
+        """
+        :return: The first and last tick in the buffer, or None if nothing has been recorded
+        :rtype: tuple
+        """
+        recorded = self.ticks[self.ticks >= 0]
+        if len(recorded) == 0:
+            return None
+        return int(recorded.min()), int(recorded.max())
+
+    def frame(self, tick, live):
+        """
+        Looks up a recorded tick in O(1).
+
+        :param tick: The tick to replay
+        :type tick: int
+        :param live: The newest frame of the simulation, whose bodies the tick is drawn onto
+        :type live: :class:`Remote.RingFrame`
+        :return: The recorded tick, or None if it isn't in the buffer
+        :rtype: :class:`Recorder.ReplayFrame`
+        """
+        if not self.has(tick):
+            return None
+        return ReplayFrame(self, tick % self.frames, live)
+
+    def rows(self, slot, live):
+        """
+        :param slot: A recorded slot
+        :type slot: int
+        :param live: The frame the slot is drawn onto
+        :type live: :class:`Remote.RingFrame`
+        :return: The row in `live` now holding the body recorded in each row of the slot, -1 for bodies no longer
+            in it
+        :rtype: numpy.ndarray
+        """
+        key = (live.version, int(self.versions[slot]))
+        rows = self._rows.get(key)
+        if rows is None:
+            if len(self._rows) > 64:
+                self._rows.clear()
+            current = {handle: row for row, handle in enumerate(map(tuple, live.handles.tolist()))}
+            recorded = map(tuple, self.handles[slot, :int(self.counts[slot])].tolist())
+            rows = self._rows[key] = numpy.array([current.get(handle, -1) for handle in recorded], dtype=numpy.intp)
+        return rows
+
+    def flush(self):
+        """
+        Writes recorded ticks out to the file.
+        """
+        for array in (self.ticks, self.times, self.counts, self.versions, self.handles, self.positions,
+                      self.velocities):
+            array.flush()
@@ -0,0 +1,126 @@
+"""Handles for things that come and go.
+
+A :class:`Registry.HandleRegistry` holds objects such as bodies, particles and interacting forces, and hands out a
+handle for each one: a (slot, generation) tuple. Adding, removing and looking up by handle are all O(1):
+
+- The objects are kept in a dense list, so iterating over them is as fast as iterating over a list. Removing one
+  moves the last object into its place (swap-remove), so nothing is shifted.
+- A handle names a slot, and each slot keeps the position of its object in the dense list.
+- Each slot also has a generation, which goes up every time the slot is freed. A handle only matches while its
+  generation matches, so a handle to a removed object never finds whatever reused its slot.
+
+There are no UI components in this module.
+"""
+
+import itertools
+
+
+class HandleRegistry:
+    """
+    An unordered collection with O(1) add, remove and lookup by handle.
+
+    A handle is a plain (slot, generation) tuple rather than an object, so handing out handles for a whole checkpoint
+    of bodies stays cheap. Iterating gives the objects in no particular order; removing an object changes the order.
+    """
+    def __init__(self):
+        self._items = []
+        """The objects, densely packed"""
+        self._item_slots = []
+        """The slot of each object in self._items"""
+        self._positions = []
+        """For each slot, the position of its object in self._items, or -1 if the slot is free"""
+        self._generations = []
+        self._free = []
+
+    def add(self, item):
+        """
+        :param item: The object to hold
+        :return: A handle for finding or removing it
+        :rtype: tuple
+        """
+        if self._free:
+            slot = self._free.pop()
+        else:
+            slot = len(self._positions)
+            self._positions.append(-1)
+            self._generations.append(0)
+        self._positions[slot] = len(self._items)
+        self._items.append(item)
+        self._item_slots.append(slot)
+        return slot, self._generations[slot]
+
+    def extend(self, items):
+        """
+        Adds many objects at once.
+
+        :param items: The objects to hold
+        :type items: list
+        :return: A handle for each object, in order
+        :rtype: list
+        """
+        reused = [self.add(item) for item in items[:len(self._free)]]
+        items = items[len(reused):]
+        start = len(self._positions)
+        slots = range(start, start + len(items))
+        self._positions.extend(range(len(self._items), len(self._items) + len(items)))
+        self._generations.extend([0] * len(items))
+        self._items.extend(items)
+        self._item_slots.extend(slots)
+        return reused + list(zip(slots, itertools.repeat(0)))
+
+    def get(self, handle):
+        """
+        :param handle: From :meth:`add`, or None
+        :type handle: tuple
+        :return: The object, or None if it has been removed
+        """
+        if handle is None:
+            return None
+        slot, generation = handle
+        if slot >= len(self._positions) or self._generations[slot] != generation:
+            return None
+        return self._items[self._positions[slot]]
+
+    def remove(self, handle):
+        """
+        Removes an object by moving the last object into its place.
+
+        :param handle: From :meth:`add`, or None
+        :type handle: tuple
+        :return: The removed object, or None if it had been removed already
+        """
+        item = self.get(handle)
+        if item is None:
+            return None
+        slot = handle[0]
+        position = self._positions[slot]
+        last_slot = self._item_slots[-1]
+        self._items[position] = self._items[-1]
+        self._item_slots[position] = last_slot
+        self._positions[last_slot] = position
+        self._items.pop()
+        self._item_slots.pop()
+        self._positions[slot] = -1
+        self._generations[slot] += 1  # every outstanding handle to this slot is now stale
+        self._free.append(slot)
+        return item
+
+    def clear(self):
+        """
+        Removes every object. Outstanding handles all become stale.
+        """
+        for slot in self._item_slots:
+            self._positions[slot] = -1
+            self._generations[slot] += 1
+            self._free.append(slot)
+        self._items.clear()
+        self._item_slots.clear()
+
+    def __contains__(self, handle):
+        return self.get(handle) is not None
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def __len__(self):
+        return len(self._items)
@@ -0,0 +1,672 @@
+"""Running the simulation apart from the UI.
+
+Drawing with Tk and stepping the physics compete for one GIL while they share a process. So :class:`Ui.MainWindow`
+never steps an engine itself: it starts a :class:`Remote.Simulation` through a :class:`Remote.SimulationClient`,
+normally in a process of its own (:func:`Remote.simulate`), and talks to it only through these:
+
+- After each batch of steps the simulation publishes what drawing needs - the displacement, side, color and handle
+  of every body - into a :class:`Remote.FrameRing`, a ring of frames in shared memory. Each slot has a sequence
+  number that is odd while the slot is being written, so the simulation never waits for the window; a window that
+  catches the newest slot mid-write takes the one before it.
+- The window draws the newest complete frame whenever it draws, as a :class:`Remote.RingFrame`.
+- Everything the window changes - bodies, forces, the environment, recording - goes the other way as commands on a
+  queue; see :class:`Remote.Simulation` for the list. The simulation takes whatever has arrived between steps,
+  without waiting for more.
+- What the window needs besides frames - new colors, log messages, the state of inspected bodies, counters - comes
+  back as events on a second queue.
+
+With `Options['simulation process']` False (``python main.py --in-process``) the same Simulation runs on a thread of
+the window's process instead, as the simulator always used to. Only the queues differ; the window can't tell.
+
+There are no UI components in this module.
+"""
+
+import multiprocessing
+import queue
+import threading
+import time
+from multiprocessing import shared_memory
+
+import numpy
+
+from Options import Options
+import Substance
+import Physics
+import Engine
+import BarnesHut
+import Integrators
+import Collision
+import Parallel
+import Checkpoint
+import Recorder
+import Profiler
+
+
+class RingFrame:
+    """
+    One published frame, copied out of the ring so it never changes once read. Drawn by :meth:`Ui.PhysicsCanvas.render`
+    like an :class:`Engine.Snapshot`, except that it holds handles and colors instead of PhysicsObjects.
+
+    :param ring: The ring the frame was read from
+    :type ring: :class:`Remote.FrameRing`
+    :param slot: The slot it was read from
+    :type slot: int
+    """
+    def __init__(self, ring, slot):
+        n = int(ring.counts[slot])
+        self.frame = int(ring.sequences[slot]) // 2 - 1
+        """Number of frames published before this one"""
+        self.tick = int(ring.ticks[slot])
+        self.time = float(ring.times[slot])
+        self.dt = float(ring.dts[slot])
+        """Seconds simulated by the step that produced this frame"""
+        self.wall_time = float(ring.wall_times[slot])
+        """When the frame was published, from time.perf_counter, which every process on a machine shares"""
+        self.version = int(ring.versions[slot])
+        """Equal versions mean the same body in each row"""
+        self.positions = ring.positions[slot, :n].astype(numpy.float64)
+        self.previous_positions = ring.previous_positions[slot, :n].astype(numpy.float64)
+        """Displacement of each body before the step, for interpolation"""
+        self.sides = ring.sides[slot, :n].astype(numpy.float64)
+        self.colors = ring.colors[slot, :n].copy()
+        """Index of each body's color in the simulation's :attr:`Substance.MaterialTable.colors`"""
+        self.handles = ring.handles[slot, :n].copy()
+        """`PhysicsObject.handle` of each body, one (slot, generation) row per body"""
+
+    def interpolate(self, alpha):
+        """
+        Blends the displacement before and after the step, as :meth:`Engine.Snapshot.interpolate` does.
+
+        :param alpha: 0 gives the displacement before the step, 1 the displacement after it
+        :type alpha: number
+        :rtype: numpy.ndarray
+        """
+        if alpha >= 1:
+            return self.positions
+        return self.previous_positions + alpha * (self.positions - self.previous_positions)
+
+
+class FrameRing:
+    """
+    A ring of frames in one shared memory block, written by one process and read by any number of others.
+
+    Frame f goes in slot f % slots. Its slot's sequence number is 2f + 1 while it is written and 2f + 2 once it is
+    complete, and `published` counts the frames completed. A reader copies the newest slot and checks the sequence
+    number is still the one it saw before copying (a seqlock); if not, the writer got there first and the reader
+    tries the slot before. Neither side ever waits for the other.
+
+    Positions and sides are stored as 32 bit floats, as in :class:`Recorder.TrajectoryRecorder`; bodies past
+    `max_bodies` are not published.
+
+    :param slots: Number of frames kept; at least 2
+    :type slots: int
+    :param max_bodies: Number of bodies a frame holds
+    :type max_bodies: int
+    :param name: Name of a block made by another FrameRing to attach to; a new block is made if None
+    :type name: str
+    """
+    FIELDS = ('published', 'sequences', 'ticks', 'times', 'dts', 'wall_times', 'counts', 'versions', 'handles',
+              'positions', 'previous_positions', 'sides', 'colors')
+
+    def __init__(self, slots=Options['frame ring slots'], max_bodies=Options['frame ring bodies'], name=None):
+        self.slots = max(2, slots)
+        self.max_bodies = max_bodies
+        types = (
+            (numpy.int64, (1,)),
+            (numpy.int64, (self.slots,)),
+            (numpy.int64, (self.slots,)),
+            (numpy.float64, (self.slots,)),
+            (numpy.float64, (self.slots,)),
+            (numpy.float64, (self.slots,)),
+            (numpy.int64, (self.slots,)),
+            (numpy.int64, (self.slots,)),
+            (numpy.int64, (self.slots, max_bodies, 2)),
+            (numpy.float32, (self.slots, max_bodies, 2)),
+            (numpy.float32, (self.slots, max_bodies, 2)),
+            (numpy.float32, (self.slots, max_bodies)),
+            (numpy.int32, (self.slots, max_bodies))
+        )
+        size = sum(numpy.dtype(dtype).itemsize * int(numpy.prod(shape)) for dtype, shape in types)
+        if name is None:
+            self._block = shared_memory.SharedMemory(create=True, size=size)
+        else:
+            self._block = shared_memory.SharedMemory(name=name)
+        self.name = self._block.name
+        """Name of the shared memory block, for attaching from another process"""
+        self._owner = name is None
+        offset = 0
+        for field, (dtype, shape) in zip(self.FIELDS, types):  # widest types first, so every array is aligned
+            array = numpy.ndarray(shape, dtype, buffer=self._block.buf, offset=offset)
+            setattr(self, field, array)
+            offset += array.nbytes
+        if self._owner:
+            self.published[0] = 0
+            self.sequences[:] = 0
+        self.truncated = 0
+        """Frames published with more bodies than max_bodies"""
+        self._handles = numpy.zeros((0, 2), dtype=numpy.int64)
+        self._rows = None
+        self._version = 0
+
+    def publish(self, engine):
+        """
+        Writes the current state of `engine` as the newest frame. Called from the simulation; never waits.
+
+        :param engine: The engine to publish
+        :type engine: :class:`Engine.Engine`
+        """
+        world = engine.world
+        n = world.count
+        if n > self.max_bodies:
+            n = self.max_bodies
+            self.truncated += 1
+        if self._rows != (id(world), world.version):  # handles only change with the rows
+            self._handles = numpy.array([body.handle for body in world.bodies], dtype=numpy.int64).reshape(-1, 2)
+            self._rows = (id(world), world.version)
+            self._version += 1
+        previous = engine.previous_positions
+        moved = min(n, len(previous))
+        frame = int(self.published[0])
+        slot = frame % self.slots
+        self.sequences[slot] = 2 * frame + 1
+        self.positions[slot, :n] = world.positions[:n]
+        self.previous_positions[slot, :moved] = previous[:moved]
+        self.previous_positions[slot, moved:n] = world.positions[moved:n]  # added since the step
+        self.sides[slot, :n] = world.sides[:n]
+        self.colors[slot, :n] = world.materials.rows['color'][world.material_ids[:n]]
+        self.handles[slot, :n] = self._handles[:n]
+        self.counts[slot] = n
+        self.ticks[slot] = engine.tick
+        self.times[slot] = engine.time
+        self.dts[slot] = engine.last_dt
+        self.wall_times[slot] = time.perf_counter()
+        self.versions[slot] = self._version
+        self.sequences[slot] = 2 * frame + 2
+        self.published[0] = frame + 1
+
+    def latest(self):
+        """
+        Called from the window.
+
+        :return: The newest complete frame, or None if none has been published
+        :rtype: :class:`Remote.RingFrame`
+        """
+        published = int(self.published[0])
+        for frame in range(published - 1, max(-1, published - 1 - self.slots), -1):
+            slot = frame % self.slots
+            complete = 2 * frame + 2
+            if int(self.sequences[slot]) != complete:
+                continue  # being written, or already written over
+            copy = RingFrame(self, slot)
+            if int(self.sequences[slot]) == complete:
+                return copy
+        return None
+
+    def close(self, unlink=None):
+        """
+        Detaches from the block. The ring that made it also frees it, unless told otherwise.
+
+        :param unlink: Whether to free the block; True for the ring that made it if None
+        :type unlink: bool
+        """
+        for field in self.FIELDS:
+            setattr(self, field, None)
+        try:
+            self._block.close()
+        except BufferError:  # a frame view is still alive somewhere; the mapping goes when it does
+            pass
+        if self._owner if unlink is None else unlink:
+            self._block.unlink()
+
+
+class Simulation:
+    """
+    The simulation's side: steps an engine in real time, carries out commands between steps and publishes a frame
+    whenever something changed.
+
+    Commands are tuples whose first item names them. Bodies are named by their `PhysicsObject.handle`:
+
+    - ('add', ref, material name, mass, x, y, vx, vy) adds a body and answers ('added', ref, handle)
+    - ('remove', handle) removes a body and the interacting forces on it
+    - ('clear',) removes every body and interacting force
+    - ('push', handle, fx, fy, seconds) applies a force of (fx, fy) N to a body
+    - ('orbiter', handle) adds a moon circling a body, as :meth:`PhysicsWindow.InspectorRow.orbiter_button` did
+    - ('run', bool) starts or pauses time; ('step',) takes one step of `Options['update interval']`
+    - ('gravity', m/s^2), ('air density', kg/m^3), ('n-body gravity', theta or None), ('theta', theta),
+      ('integrator', name), ('adaptive', bool), ('narrow phase', name) and ('workers', count) change the
+      environment, as the :class:`Ui.EnvironmentTab` controls say
+    - ('save', path) and ('load', path) write and read checkpoints; a load answers with ('environment', settings)
+    - ('record', path) starts recording into a :class:`Recorder.TrajectoryRecorder`, ('record', None) stops
+    - ('profile', bool) times each step, ('capture', ticks, path) captures steps with cProfile
+    - ('watch', handles) picks the bodies whose state is sent as ('inspected', {handle: state})
+    - ('stop',) ends the simulation
+
+    Events are (kind, value...) tuples. Besides the answers above there are ('colors', colors) whenever new colors
+    are used, ('log', message), ('recording', path) whenever the recording file is made or rewritten, and
+    ('stats', counters) about every `Options['object popup update interval']` seconds.
+
+    :param ring: Where frames are published
+    :type ring: :class:`Remote.FrameRing`
+    :param commands: Queue of commands from the window
+    :type commands: queue.Queue or multiprocessing.Queue
+    :param events: Queue of events for the window
+    :type events: queue.Queue or multiprocessing.Queue
+    :param engine: The engine to run; a new one if None
+    :type engine: :class:`Engine.Engine`
+    """
+    def __init__(self, ring, commands, events, engine=None):
+        self.ring = ring
+        self.commands = commands
+        self.events = events
+        self.engine = Engine.Engine() if engine is None else engine
+        self.running = False
+        """Whether time is running"""
+        self.stopped = False
+        """Set by a 'stop' command"""
+        self.recorder = None
+        """The last recorder started by a 'record' command"""
+        self.watched = []
+        """Handles of the bodies whose state is sent as 'inspected' events"""
+        self._colors_sent = 0
+        self._recording_sent = None
+        self._changed = True
+        self._inspected_time = 0
+        self._stats_time = 0
+
+    def take_commands(self):
+        """
+        Carries out every command that has arrived, without waiting for more.
+        """
+        while True:
+            try:
+                command = self.commands.get_nowait()
+            except queue.Empty:
+                return
+            self.carry_out(command)
+            self._changed = True
+
+    def carry_out(self, command):
+        """
+        :param command: One of the commands listed in the class description
+        :type command: tuple
+        """
+        kind = command[0]
+        engine = self.engine
+        if kind == 'add':
+            ref, name, mass, x, y, vx, vy = command[1:]
+            body = Physics.PhysicsObject(Substance.MATERIALS[name], mass)
+            body.displacement = Physics.Vector.make_vector_from_components(x, y)
+            body.velocity = Physics.Vector.make_vector_from_components(vx, vy)
+            engine.add(body)
+            self.events.put(('added', ref, body.handle))
+        elif kind == 'remove':
+            body = engine.get(tuple(command[1]))
+            if body is not None:
+                body.clear_forces()
+                engine.remove(body)
+        elif kind == 'clear':
+            engine.clear()
+        elif kind == 'push':
+            body = engine.get(tuple(command[1]))
+            if body is not None:
+                push = Physics.Vector.make_vector_from_components(command[2], command[3])
+                body.apply_force(Physics.Force(push.angle, push.magnitude, command[4]))
+        elif kind == 'orbiter':
+            planet = engine.get(tuple(command[1]))
+            if planet is not None:
+                self.add_orbiter(planet)
+        elif kind == 'run':
+            self.running = bool(command[1])
+        elif kind == 'step':
+            engine.step(Options['update interval'])
+        elif kind == 'gravity':
+            engine.gravity = command[1]
+        elif kind == 'air density':
+            engine.air_density = command[1]
+        elif kind == 'n-body gravity':
+            engine.n_body_gravity = None if command[1] is None else BarnesHut.NBodyGravity(theta=command[1])
+        elif kind == 'theta':
+            if engine.n_body_gravity is not None:
+                engine.n_body_gravity.theta = command[1]
+        elif kind == 'integrator':
+            engine.integrator = Integrators.INTEGRATORS[command[1]]()
+            engine.next_dt = None
+        elif kind == 'adaptive':
+            engine.step_controller = Integrators.StepController() if command[1] else None
+            engine.next_dt = None
+            engine.owed_time = 0
+        elif kind == 'narrow phase':
+            engine.narrow_phase = Collision.NARROW_PHASES[command[1]]()
+        elif kind == 'workers':
+            if engine.tiles is not None:
+                engine.tiles.close()
+            engine.tiles = Parallel.TiledExecutor(command[1]) if command[1] else None
+        elif kind == 'save':
+            self.save(command[1])
+        elif kind == 'load':
+            self.load(command[1])
+        elif kind == 'record':
+            self.record(command[1])
+        elif kind == 'profile':
+            engine.profiler = Profiler.TickProfiler() if command[1] else None
+        elif kind == 'capture':
+            if engine.profiler is None:
+                engine.profiler = Profiler.TickProfiler()
+            engine.profiler.start_capture(command[1], command[2])
+        elif kind == 'watch':
+            self.watched = [tuple(handle) for handle in command[1]]
+            self._inspected_time = 0
+        elif kind == 'stop':
+            self.stopped = True
+        else:
+            self.events.put(('log', f"unknown command {kind!r}"))
+
+    def add_orbiter(self, planet):
+        """
+        Adds a moon of 1/100th the mass of `planet`, 100 m south of it and moving west at 10 m/s, with a
+        :class:`Physics.GravitationalForceGenerator` between the two.
+
+        :param planet: The body to circle
+        :type planet: :class:`Physics.PhysicsObject`
+        """
+        orbital_radius = 100
+        orbital_velocity = 10
+        moon = Physics.PhysicsObject(planet.material, planet.mass/100)
+        moon.displacement = Physics.Vector.make_vector_from_components(planet.displacement.x,
+                                                                       planet.displacement.y - orbital_radius)
+        moon.velocity = Physics.Vector.make_directional_vector('W', orbital_velocity)
+        self.engine.add(moon)
+        self.engine.add_interacting_force(Physics.GravitationalForceGenerator(planet, moon))
+        self.events.put(('log', 'added orbiter'))
+
+    def environment(self):
+        """
+        :return: The settings the environment commands change, under the names of those commands
+        :rtype: dict
+        """
+        engine = self.engine
+        return {
+            'gravity': engine.gravity,
+            'air density': engine.air_density,
+            'n-body gravity': None if engine.n_body_gravity is None else engine.n_body_gravity.theta,
+            'integrator': engine.integrator.name,
+            'adaptive': engine.step_controller is not None,
+            'narrow phase': next((name for name, kind in Collision.NARROW_PHASES.items()
+                                  if type(engine.narrow_phase) is kind), Options['narrow phase']),
+            'workers': 0 if engine.tiles is None else engine.tiles.workers
+        }
+
+    def save(self, path):
+        try:
+            Checkpoint.save(self.engine, path)
+        except OSError as e:
+            self.events.put(('log', f"couldn't save {path}: {e}"))
+            return
+        self.events.put(('log', f"saved {path}"))
+
+    def load(self, path):
+        """
+        Replaces everything in the engine with the checkpoint at `path`, and sends the environment it was saved in.
+        """
+        self.engine.clear()
+        try:
+            bodies = Checkpoint.load(path, self.engine)
+        except (OSError, ValueError) as e:
+            self.events.put(('log', f"couldn't load {path}: {e}"))
+            return
+        self.events.put(('environment', self.environment()))
+        self.events.put(('log', f"loaded {len(bodies)} objects from {path}"))
+
+    def record(self, path):
+        """
+        Starts recording every step into a new recorder at `path`, or stops recording if `path` is None. The last
+        recording stays available for replay after it's stopped.
+        """
+        engine = self.engine
+        if path is None:
+            if engine.recorder is not None:
+                engine.recorder = None
+                self.recorder.flush()
+            return
+        self.recorder = Recorder.TrajectoryRecorder(path)
+        self.recorder.record(engine)
+        engine.recorder = self.recorder
+
+    def inspected(self):
+        """
+        :return: For each watched body, its material name, mass and x, y, then the magnitude and angle in degrees of
+            its velocity, acceleration and net force; or None if it is no longer in the engine
+        :rtype: dict
+        """
+        engine = self.engine
+        states = {handle: None for handle in self.watched}
+        bodies = [(handle, engine.get(handle)) for handle in self.watched]
+        bodies = [(handle, body) for handle, body in bodies if body is not None]
+        if not bodies:
+            return states
+        world = engine.world
+        indices = numpy.array([body.index for handle, body in bodies], dtype=numpy.int64)
+        values = numpy.empty((len(bodies), 8))
+        values[:, 0:2] = world.positions[indices]
+        for i, vectors in enumerate((world.velocities[indices], world.accelerations[indices],
+                                     world.net_forces[indices])):
+            values[:, 2 + 2*i] = numpy.hypot(vectors[:, 0], vectors[:, 1])
+            values[:, 3 + 2*i] = numpy.degrees(numpy.arctan2(vectors[:, 1], vectors[:, 0]))
+        for (handle, body), row in zip(bodies, values.tolist()):
+            states[handle] = (body.material.name, float(body.mass), row)
+        return states
+
+    def stats(self):
+        """
+        :return: Counters for the debug tab: the narrow phase's stats, the profiler's summary and last capture, and
+            the first and last recorded tick
+        :rtype: dict
+        """
+        profiler = self.engine.profiler
+        return {
+            'tick': self.engine.tick,
+            'contacts': self.engine.narrow_phase.stats(),
+            'profile': None if profiler is None else profiler.summary(),
+            'capture': None if profiler is None else profiler.last_capture,
+            'recorded': None if self.recorder is None else self.recorder.tick_range(),
+            'truncated': self.ring.truncated
+        }
+
+    def publish(self):
+        """
+        Publishes a frame, and sends the events that are due.
+        """
+        colors = self.engine.world.materials.colors
+        if len(colors) > self._colors_sent:
+            self.events.put(('colors', list(colors)))
+            self._colors_sent = len(colors)
+        self.ring.publish(self.engine)
+        if self.recorder is not None and (self.recorder.path, self.recorder.max_bodies) != self._recording_sent:
+            self._recording_sent = (self.recorder.path, self.recorder.max_bodies)
+            self.events.put(('recording', self.recorder.path))  # made, or rewritten bigger
+        now = time.perf_counter()
+        if self.watched and now - self._inspected_time >= Options['inspector update interval']:
+            self.events.put(('inspected', self.inspected()))
+            self._inspected_time = now
+
+    def run(self):
+        """
+        Steps the engine against the wall clock until a 'stop' command arrives, or the window's process ends.
+
+        Keeps a :class:`Engine.FixedStepClock`: each time round, the wall-clock time since the last is converted
+        into a whole number of updates of exactly `Options['update interval']` seconds, capped at
+        `Options['max steps per frame']`. If the engine has a step controller, that time is handed to
+        :meth:`Engine.Engine.advance` instead, which picks its own step lengths. Commands are carried out before
+        the steps and a frame is published after them if anything changed; then the loop sleeps for whatever is
+        left of the update interval.
+        """
+        clock = Engine.FixedStepClock(Options['update interval'], Options['max steps per frame'])
+        parent = multiprocessing.parent_process()
+        last_time = time.perf_counter()
+        self.events.put(('environment', self.environment()))
+        while not self.stopped:
+            self.take_commands()
+            now_time = time.perf_counter()
+            steps = clock.advance(now_time - last_time)
+            last_time = now_time
+            if self.running and steps:
+                if self.engine.step_controller is not None:
+                    self.engine.advance(steps * clock.dt)
+                else:
+                    for i in range(steps):
+                        self.engine.step(clock.dt)
+                self._changed = True
+            if self._changed:
+                self.publish()
+                self._changed = False
+            if now_time - self._stats_time >= Options['object popup update interval']:
+                self.events.put(('stats', self.stats()))
+                self._stats_time = now_time
+                if parent is not None and not parent.is_alive():
+                    break
+            spent = time.perf_counter() - now_time
+            time.sleep(max(0, Options['update interval'] - spent))
+
+    def close(self):
+        """
+        Stops recording and any worker processes.
+        """
+        self.record(None)
+        if self.engine.tiles is not None:
+            self.engine.tiles.close()
+
+
+def simulate(ring_name, slots, max_bodies, commands, events):
+    """
+    Runs a :class:`Remote.Simulation` until it is stopped. Started by :class:`Remote.SimulationClient`, in a process
+    of its own or on a thread.
+
+    :param ring_name: :attr:`FrameRing.name` of the ring to publish into
+    :type ring_name: str
+    :param slots: :attr:`FrameRing.slots` of that ring
+    :type slots: int
+    :param max_bodies: :attr:`FrameRing.max_bodies` of that ring
+    :type max_bodies: int
+    :param commands: Queue of commands, see :class:`Remote.Simulation`
+    :type commands: queue.Queue or multiprocessing.Queue
+    :param events: Queue of events for the window
+    :type events: queue.Queue or multiprocessing.Queue
+    """
+    ring = FrameRing(slots, max_bodies, ring_name)
+    simulation = Simulation(ring, commands, events)
+    try:
+        simulation.run()
+    finally:
+        simulation.close()
+        ring.close()
+
+
+class SimulationClient:
+    """
+    The window's side: starts a :class:`Remote.Simulation`, sends it commands, and reads its frames and events.
+
+    :param in_process: Run the simulation on a thread of this process instead of a process of its own
+    :type in_process: bool
+    """
+    def __init__(self, in_process=not Options['simulation process']):
+        self.ring = FrameRing()
+        """Frames published by the simulation"""
+        self.in_process = in_process
+        if in_process:
+            self.commands = queue.Queue()
+            self.events = queue.Queue()
+            self.worker = threading.Thread(target=simulate, daemon=True,
+                                           args=(self.ring.name, self.ring.slots, self.ring.max_bodies,
+                                                 self.commands, self.events))
+        else:
+            context = multiprocessing.get_context('spawn')  # never fork the Tk process
+            self.commands = context.Queue()
+            self.events = context.Queue()
+            # not a daemon, so it may start worker processes of its own (see Parallel.py); it stops by itself if
+            # this process goes away without stopping it
+            self.worker = context.Process(target=simulate,
+                                          args=(self.ring.name, self.ring.slots, self.ring.max_bodies,
+                                                self.commands, self.events))
+        self.worker.start()
+        self.colors = []
+        """The simulation's :attr:`Substance.MaterialTable.colors`, as last sent"""
+        self.handles = {}
+        """Ref passed to :meth:`add` to the handle the simulation gave the body"""
+        self._next_ref = 0
+
+    def send(self, *command):
+        """
+        Queues a command for the simulation; never waits.
+
+        :param command: One of the commands listed in :class:`Remote.Simulation`
+        """
+        self.commands.put(command)
+
+    def add(self, physics_object):
+        """
+        Has the simulation add a body in the state of `physics_object`, which isn't in any engine.
+
+        :param physics_object: A new PhysicsObject of one of :data:`Substance.MATERIALS`
+        :type physics_object: :class:`Physics.PhysicsObject`
+        :return: A ref for :meth:`handle_of`
+        :rtype: int
+        """
+        ref = self._next_ref
+        self._next_ref += 1
+        displacement = physics_object.displacement
+        velocity = physics_object.velocity
+        self.send('add', ref, physics_object.material.name, physics_object.mass, displacement.x, displacement.y,
+                  velocity.x, velocity.y)
+        return ref
+
+    def handle_of(self, ref):
+        """
+        :param ref: Returned by :meth:`add`
+        :type ref: int
+        :return: The handle of the body added, or None if the simulation hasn't added it yet
+        :rtype: tuple
+        """
+        return self.handles.get(ref)
+
+    def latest(self):
+        """
+        :return: The newest complete frame, or None
+        :rtype: :class:`Remote.RingFrame`
+        """
+        return self.ring.latest()
+
+    def take_events(self):
+        """
+        Takes every event that has arrived, without waiting for more. Colors and added handles are kept here.
+
+        :return: The events, oldest first
+        :rtype: list
+        """
+        events = []
+        while True:
+            try:
+                event = self.events.get_nowait()
+            except queue.Empty:
+                return events
+            if event[0] == 'colors':
+                self.colors = event[1]
+            elif event[0] == 'added':
+                self.handles[event[1]] = tuple(event[2])
+            events.append(event)
+
+    def alive(self):
+        """
+        :return: Whether the simulation is still running
+        :rtype: bool
+        """
+        return self.worker.is_alive()
+
+    def close(self):
+        """
+        Stops the simulation and frees the frame ring.
+        """
+        self.send('stop')
+        self.worker.join(5)
+        if not self.in_process and self.worker.is_alive():
+            self.worker.terminate()
+        self.ring.close()
@@ -1,23 +1,146 @@
 """
 Classes related to material properties
+
+Every :class:`Substance.Material` is a row of a :class:`Substance.MaterialTable`, :data:`Substance.TABLE` unless
+given another. Bodies store the row number of their material (see `World.WorldState.material_ids`), so the engine
+looks up the restitution, friction or drag coefficient of every body at once by indexing a column of the table with
+those row numbers, e.g. ``TABLE.column('restitution')[world.material_ids[:n]]``.
 """
 
+import numpy
+
+MATERIAL_DTYPE = numpy.dtype([
+    ('density', numpy.float64),
+    ('restitution', numpy.float64),
+    ('friction', numpy.float64),
+    ('drag_coefficient', numpy.float64),
+    ('color', numpy.int32)
+])
+"""One row of a :class:`Substance.MaterialTable`. 'color' is an index into `MaterialTable.colors`"""
+
+
+class MaterialTable:
+    """
+    Every material, as a structured array with one row per material.
+
+    Adding a material appends a row, so row numbers never change and bodies that already hold one are unaffected.
+    The array grows by doubling, so a reference to `rows` should not be kept across calls to :meth:`add` - use
+    :meth:`column` each time instead.
+
+    :param capacity: Number of rows to preallocate
+    :type capacity: int
+    """
+    def __init__(self, capacity=16):
+        self.rows = numpy.zeros(max(1, capacity), dtype=MATERIAL_DTYPE)
+        """The materials, see :data:`Substance.MATERIAL_DTYPE`; only the first `self.count` rows are in use"""
+        self.count = 0
+        """Number of rows in use"""
+        self.materials = []
+        """The :class:`Substance.Material` of each row"""
+        self.colors = []
+        """Every distinct color, in the order first used"""
+        self._color_indices = {}
+
+    def add(self, material, density, color, restitution, friction, drag_coefficient):
+        """
+        Appends a row.
+
+        :param material: The material the row belongs to
+        :type material: :class:`Substance.Material`
+        :return: The row number
+        :rtype: int
+        """
+        if self.count == len(self.rows):
+            rows = numpy.zeros(2 * len(self.rows), dtype=MATERIAL_DTYPE)
+            rows[:self.count] = self.rows[:self.count]
+            self.rows = rows
+        index = self.count
+        self.rows[index] = (density, restitution, friction, drag_coefficient, self.color_index(color))
+        self.materials.append(material)
+        self.count += 1
+        return index
+
+    def color_index(self, color):
+        """
+        :param color: A color string
+        :type color: str
+        :return: The index of `color` in self.colors, added if it isn't there yet
+        :rtype: int
+        """
+        index = self._color_indices.get(color)
+        if index is None:
+            index = self._color_indices[color] = len(self.colors)
+            self.colors.append(color)
+        return index
+
+    def column(self, name):
+        """
+        Returns the in-use part of a column as a NumPy view (no copy).
+
+        :param name: One of the fields of :data:`Substance.MATERIAL_DTYPE`
+        :type name: str
+        :rtype: numpy.ndarray
+        """
+        return self.rows[name][:self.count]
+
+
+TABLE = MaterialTable()
+"""The table every material is added to unless told otherwise"""
+
+
+def _material_property(name, doc):
+    """A property reading and writing the material's row of its table"""
+    def get(self):
+        return float(self.table.rows[name][self.index])
+
+    def set(self, value):
+        self.table.rows[name][self.index] = value
+    return property(get, set, doc=doc)
+
 
 class Material:
     """
     A material is a broad reference to a material type
 
+    The numbers are stored in a row of `table`; the Material is a handle to that row.
+
     :param density: The density, in kg / m^3
     :type density: number
     :param color: The color the material should render as
     :type color: color string
     :param name: The name of the material
     :type name: str
+    :param restitution: Share of the speed along the line of impact kept after a collision; 1 is perfectly elastic
+    :type restitution: number
+    :param friction: Coefficient of friction between sliding bodies
+    :type friction: number
+    :param drag_coefficient: Drag coefficient in air; 0.8 is a cube
+    :type drag_coefficient: number
+    :param table: The table to add the material to, :data:`Substance.TABLE` if None
+    :type table: :class:`Substance.MaterialTable`
     """
-    def __init__(self, density=1, color='#bf40b3', name='unnamed'):
-        self.density = density
-        self.color = color  # pink debug color for blank materials
+    density = _material_property('density', "The density, in kg / m^3")
+    restitution = _material_property('restitution', "Share of the speed along the line of impact kept after a "
+                                                     "collision")
+    friction = _material_property('friction', "Coefficient of friction between sliding bodies")
+    drag_coefficient = _material_property('drag_coefficient', "Drag coefficient in air")
+
+    def __init__(self, density=1, color='#bf40b3', name='unnamed', restitution=1.0, friction=0.0,
+                 drag_coefficient=0.8, table=None):
         self.name = name
+        self.table = TABLE if table is None else table
+        """The :class:`Substance.MaterialTable` holding this material's row"""
+        self.index = self.table.add(self, density, color, restitution, friction, drag_coefficient)
+        """This material's row in self.table"""
+
+    @property
+    def color(self):
+        """The color the material should render as"""
+        return self.table.colors[self.table.rows['color'][self.index]]
+
+    @color.setter
+    def color(self, value):
+        self.table.rows['color'][self.index] = self.table.color_index(value)
 
 
 MATERIALS = {
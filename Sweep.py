@@ -0,0 +1,294 @@
+"""Parameter sweeps.
+
+Runs one scenario headlessly for every combination of a grid of parameters, spread over all cores with a
+ProcessPoolExecutor, and collects a row of summary numbers for each case into one table::
+
+    python Sweep.py collision --grid '{"mass_1": [1e6, 1e7], "speed_1": [10, 20, 40]}' --steps 500 --out sweep.csv
+
+Every finished case is saved in the cache directory under a hash of its scenario, parameters and step settings, the
+Options that change the physics (:data:`PHYSICS_OPTIONS`) and the source of the modules that do it. Running the same
+sweep again - e.g. after it was interrupted - only runs the cases that aren't cached yet; changing an option or the
+engine's code runs them all again.
+
+There are no UI components in this module.
+"""
+
+import argparse
+import concurrent.futures
+import csv
+import hashlib
+import itertools
+import json
+import math
+import os
+import time
+
+from Options import Options
+import Substance
+import Physics
+import Engine
+
+
+def collision_scenario(material_1='chalk', material_2='maple', mass_1=Options['default mass'],
+                       mass_2=Options['default mass']*2/3, x_1=-200, x_2=200, y_1=50, y_2=15, speed_1=22,
+                       speed_2=20, horizontal=False):
+    """
+    Two objects thrown at each other, as in :meth:`DebugTab.ForceObjectAdder.add_test_collision`. The starting x of
+    each object is a parameter instead of random.
+
+    :rtype: :class:`Engine.Engine`
+    """
+    engine = Engine.Engine()
+    ob1 = Physics.PhysicsObject(Substance.MATERIALS[material_1], mass_1)
+    ob2 = Physics.PhysicsObject(Substance.MATERIALS[material_2], mass_2)
+    ob1.displacement = Physics.Vector.make_vector_from_components(x_1, y_1)
+    ob2.displacement = Physics.Vector.make_vector_from_components(x_2, y_2)
+    if not horizontal:
+        ob1.velocity = Physics.Vector.make_directional_vector('NE', speed_1)
+        ob1.velocity.rotate(-1.3)
+        ob2.velocity = Physics.Vector.make_directional_vector('NW', speed_2)
+    else:
+        ob1.velocity = Physics.Vector.make_directional_vector('E', speed_1)
+    engine.add(ob1)
+    engine.add(ob2)
+    return engine
+
+
+def orbiter_scenario(material='silver', mass=Options['default mass'], moon_ratio=100, orbital_radius=100,
+                     orbital_velocity=10):
+    """
+    A planet and a moon joined by a :class:`Physics.GravitationalForceGenerator`, as made by
+    :meth:`PhysicsWindow.InspectorRow.orbiter_button`.
+
+    :rtype: :class:`Engine.Engine`
+    """
+    engine = Engine.Engine()
+    planet = Physics.PhysicsObject(Substance.MATERIALS[material], mass)
+    moon = Physics.PhysicsObject(Substance.MATERIALS[material], mass/moon_ratio)
+    moon.displacement = Physics.Vector.make_vector_from_components(0, -orbital_radius)
+    moon.velocity = Physics.Vector.make_directional_vector('W', orbital_velocity)
+    engine.add(planet)
+    engine.add(moon)
+    engine.add_interacting_force(Physics.GravitationalForceGenerator(planet, moon))
+    return engine
+
+
+SCENARIOS = {
+    'collision': collision_scenario,
+    'orbiter': orbiter_scenario
+}
+"""Scenario name to a function taking the case parameters as keywords and returning a ready Engine"""
+
+
+def expand(grid):
+    """
+    Every combination of a parameter grid.
+
+    :param grid: Parameter name to a list of values
+    :type grid: dict
+    :return: One dict of parameters per case, in a fixed order
+    :rtype: list
+    """
+    names = sorted(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+
+
+CACHE_VERSION = 2
+"""Bump when what is stored for a case changes"""
+
+PHYSICS_OPTIONS = (
+    'gravity', 'air resistance', 'air density', 'n-body gravity', 'n-body gravitational constant', 'n-body softening',
+    'n-body exact threshold', 'barnes hut theta', 'canvas height', 'canvas width', 'update interval',
+    'default mass', 'canvas left physics adjustment', 'canvas right physics adjustment',
+    'canvas top physics adjustment', 'canvas bottom physics adjustment', 'velocity zero limit',
+    'net force zero limit', 'sleep delay', 'sleeping', 'integrator', 'adaptive steps', 'step tolerance',
+    'min step ticks', 'max step ticks', 'narrow phase', 'contact iterations', 'contact tolerance',
+    'restitution threshold'
+)
+"""Options a case's results depend on; they are part of its key"""
+
+PHYSICS_MODULES = ('Physics', 'Substance', 'World', 'Engine', 'Integrators', 'Broadphase', 'Collision',
+                   'BarnesHut', 'Registry', 'Sweep')
+"""Modules whose source a case's results depend on; it is part of its key"""
+
+_source_digest = None
+
+
+def source_digest():
+    """
+    :return: A hash of the source of :data:`PHYSICS_MODULES`, worked out once per process
+    :rtype: str
+    """
+    global _source_digest
+    if _source_digest is None:
+        digest = hashlib.sha256()
+        here = os.path.dirname(os.path.abspath(__file__))
+        for module in PHYSICS_MODULES:
+            with open(os.path.join(here, module + '.py'), 'rb') as f:
+                digest.update(f.read())
+        _source_digest = digest.hexdigest()
+    return _source_digest
+
+
+def case_key(scenario, parameters, steps, dt):
+    """
+    :return: A hash identifying a case; cases with equal keys give equal results
+    :rtype: str
+    """
+    options = {name: Options[name] for name in PHYSICS_OPTIONS}
+    text = json.dumps([CACHE_VERSION, source_digest(), scenario, parameters, steps, dt, options], sort_keys=True)
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()[:24]
+
+
+def run_case(scenario, parameters, steps, dt):
+    """
+    Builds and runs one case, and sums it up.
+
+    The first two bodies are treated as the pair of interest: the table records how close they got and how far
+    apart they ended.
+
+    :param scenario: Key of :data:`SCENARIOS`
+    :type scenario: str
+    :param parameters: Keywords for the scenario
+    :type parameters: dict
+    :param steps: Number of steps to run
+    :type steps: int
+    :param dt: Seconds per step
+    :type dt: number
+    :return: Summary numbers
+    :rtype: dict
+    """
+    start = time.perf_counter()
+    engine = SCENARIOS[scenario](**parameters)
+    world = engine.world
+
+    def kinetic_energy():
+        n = world.count
+        speeds = world.velocities[:n, 0]**2 + world.velocities[:n, 1]**2
+        return float(0.5 * (world.masses[:n] * speeds).sum())
+
+    def separation():
+        if world.count < 2:
+            return math.nan
+        return math.dist(world.positions[0], world.positions[1])
+
+    initial_energy = kinetic_energy()
+    contacts = 0
+    min_separation = separation()
+    max_speed = 0
+    for i in range(steps):
+        engine.step(dt)
+        contacts += engine.narrow_phase.contact_count
+        min_separation = min(min_separation, separation())
+        n = world.count
+        max_speed = max(max_speed, float(((world.velocities[:n]**2).sum(axis=1)**0.5).max(initial=0)))
+    momentum = (world.masses[:world.count, None] * world.velocities[:world.count]).sum(axis=0)
+    return {
+        'contacts': contacts,
+        'initial kinetic energy': initial_energy,
+        'final kinetic energy': kinetic_energy(),
+        'final momentum x': float(momentum[0]),
+        'final momentum y': float(momentum[1]),
+        'max speed': max_speed,
+        'min separation': min_separation,
+        'final separation': separation(),
+        'seconds': time.perf_counter() - start
+    }
+
+
+def _save(path, record):
+    temporary = path + '.tmp'
+    with open(temporary, 'w') as f:
+        json.dump(record, f)
+    os.replace(temporary, path)  # a case is either cached completely or not at all
+
+
+def run_sweep(scenario, grid, steps=500, dt=Options['update interval'], cache_dir='.sweep_cache', workers=None,
+              log=print):
+    """
+    Runs every case of a grid that isn't cached yet in a process pool, and returns all cases.
+
+    :param scenario: Key of :data:`SCENARIOS`
+    :type scenario: str
+    :param grid: Parameter name to a list of values; see :func:`expand`
+    :type grid: dict
+    :param steps: Steps per case
+    :type steps: int
+    :param dt: Seconds per step
+    :type dt: number
+    :param cache_dir: Directory holding finished cases
+    :type cache_dir: str
+    :param workers: Number of processes; one per core if None
+    :type workers: int
+    :param log: Called with a line of text as cases finish
+    :type log: function
+    :return: One dict per case, its parameters followed by its results, in grid order
+    :rtype: list
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    cases = expand(grid)
+    keys = [case_key(scenario, parameters, steps, dt) for parameters in cases]
+    results = {}
+    for key in keys:
+        path = os.path.join(cache_dir, key + '.json')
+        if os.path.exists(path):
+            with open(path) as f:
+                results[key] = json.load(f)['results']
+    todo = [(key, parameters) for key, parameters in zip(keys, cases) if key not in results]
+    log(f"{len(cases)} cases, {len(cases) - len(todo)} cached, {len(todo)} to run")
+
+    if todo:
+        with concurrent.futures.ProcessPoolExecutor(workers) as pool:
+            futures = {pool.submit(run_case, scenario, parameters, steps, dt): (key, parameters)
+                       for key, parameters in todo}
+            for done, future in enumerate(concurrent.futures.as_completed(futures), 1):
+                key, parameters = futures[future]
+                results[key] = future.result()
+                _save(os.path.join(cache_dir, key + '.json'),
+                      {'scenario': scenario, 'parameters': parameters, 'steps': steps, 'dt': dt,
+                       'results': results[key]})
+                log(f"{done}/{len(todo)} {parameters}")
+
+    return [dict(parameters, **results[key]) for key, parameters in zip(keys, cases)]
+
+
+def write_table(rows, path):
+    """
+    Writes sweep rows as CSV.
+
+    :param rows: Output of :func:`run_sweep`
+    :type rows: list
+    :param path: File to write
+    :type path: str
+    """
+    columns = list(rows[0]) if rows else []
+    with open(path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, columns)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description='Run a scenario over a grid of parameters.')
+    parser.add_argument('scenario', choices=sorted(SCENARIOS))
+    parser.add_argument('--grid', default='{}', help='JSON object of parameter name to list of values')
+    parser.add_argument('--grid-file', help='JSON file holding the grid instead')
+    parser.add_argument('--steps', type=int, default=500)
+    parser.add_argument('--dt', type=float, default=Options['update interval'])
+    parser.add_argument('--workers', type=int, help='processes to use; one per core by default')
+    parser.add_argument('--cache', default='.sweep_cache', help='directory of finished cases')
+    parser.add_argument('--out', default='sweep.csv', help='CSV file to write')
+    args = parser.parse_args(arguments)
+
+    if args.grid_file:
+        with open(args.grid_file) as f:
+            grid = json.load(f)
+    else:
+        grid = json.loads(args.grid)
+    rows = run_sweep(args.scenario, grid, args.steps, args.dt, args.cache, args.workers)
+    write_table(rows, args.out)
+    print(f"wrote {len(rows)} rows to {args.out}")
+
+
+if __name__ == '__main__':
+    main()
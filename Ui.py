@@ -1,11 +1,18 @@
 from tkinter import *
 from tkinter import ttk
+from tkinter import filedialog
 
-import threading
+import os
 import time
 
+import numpy
+
 from Options import Options
-import Physics
+import Registry
+import Integrators
+import Collision
+import Remote
+import Recorder
 import DebugTab
 import Utility
 
@@ -15,13 +22,21 @@ import PhysicsWindow
 class MainWindow:
     """
     MainWindow serves as the entry point to the application. It builds the PhysicsCanvas, the right side Notebook, and the tabs in that notebook. Many other objects contain references to MainWindow (usually simply as self.window) in order that they can access all other parts of the application.
+
+    The physics runs apart from the window, in a :class:`Remote.Simulation` started through self.simulation. Every
+    part of the window sends it commands and draws what it publishes; see :mod:`Remote`.
+
+    :param in_process: Step the physics on a thread of this process instead of a process of its own
+    :type in_process: bool
     """
-    def __init__(self):
+    def __init__(self, in_process=not Options['simulation process']):
         self.root = Tk()  # start tkinter
         """The Tkinter root"""
         self.root.title = '2d Physics Simulator'
         self.root_frame = ttk.Frame(self.root)
         """The root frame"""
+        self.simulation = Remote.SimulationClient(in_process)
+        """Runs the physics of everything drawn on the canvas"""
 
         # physics canvas will create and grid the canvas
         self.center_frame = ttk.Frame(self.root_frame)
@@ -36,18 +51,21 @@ class MainWindow:
         self.environment_tab = EnvironmentTab(self.right_notebook, self)
         self.debug_tab = DebugTab.DebugTab(self.right_notebook, self)
         self.log_tab = DebugTab.LogTab(self.right_notebook, self)
+        self.inspector = PhysicsWindow.InspectorTab(self.right_notebook, self)
+        """Shows the PhysicsObjects picked with Info from the canvas menu"""
         self.log = self.log_tab.log
         """Simply call window.log(message) to log directly to the log tab"""
         self.right_notebook.add(self.options_tab, text='Options')
         self.right_notebook.add(self.environment_tab, text='Environment')
         self.right_notebook.add(self.debug_tab, text='Debug')
         self.right_notebook.add(self.log_tab, text='Log')
+        self.right_notebook.add(self.inspector, text='Inspect')
 
         # time selector handles play/pause
         self.bottom_time_frame = ttk.Frame(self.root_frame)
         self.time_selector = TimeSelector(self, self.bottom_time_frame)
 
-        # additional windows for vector popups
+        # additional windows, e.g. for adding objects
         self.additional_windows = []
         """Extant instances from PhysicsWindows module"""
 
@@ -55,15 +73,46 @@ class MainWindow:
         self.center_frame.grid(row=0, column=1)
         self.right_notebook.grid(row=0, column=2, sticky=N)
         self.bottom_time_frame.grid(row=1, column=1)
+        self.root.protocol("WM_DELETE_WINDOW", self.close)
         Utility.center(self.root)
         self.root.mainloop()
 
+    def take_events(self):
+        """
+        Hands everything the simulation has sent since the last frame to the part of the window it is for. Called by
+        :meth:`TimeSelector.draw_frame`.
+        """
+        for event in self.simulation.take_events():
+            kind = event[0]
+            if kind == 'log':
+                self.log(event[1], 'simulation')
+            elif kind == 'environment':
+                self.environment_tab.show_environment(event[1])
+            elif kind == 'inspected':
+                self.inspector.show(event[1])
+            elif kind == 'recording':
+                self.time_selector.recording_changed(event[1])
+            elif kind == 'stats':
+                self.debug_tab.show_stats(event[1])
+                self.time_selector.show_recorded(event[1]['recorded'])
+
+    def close(self):
+        """
+        Stops the simulation, then closes the window.
+        """
+        self.simulation.close()
+        self.root.destroy()
+
 
 class PhysicsCanvas:
     """
     Controls the drawing of PhysicsObjects and inheriting classes on a canvas
 
     Sets origin to center and calculates actual pixel coordinates from object displacement vectors.
+
+    The bodies are simulated by window.simulation, apart from the window (see :mod:`Remote`). The canvas asks it to
+    add and remove bodies, and draws the frames it publishes with :meth:`render` (see
+    :meth:`TimeSelector.draw_frame`). Bodies are known here by their `PhysicsObject.handle` in the simulation.
     """
     def __init__(self, window, parent_frame):
         self.window = window
@@ -89,14 +138,29 @@ class PhysicsCanvas:
         # set click handlers
         self.canvas.bind("<Button-3>", self.context_popup)
 
-        self.physics_objects = []
-        """Instances from e.g., :class:`Physics.ForceObject` that need to be have update called"""
-        self.interacting_forces = []
-        """Instances from, e.g. :class:`Physics.GravitationalForceGenerator` that need to be have update called"""
-        self.particles = []
+        self.simulation = window.simulation
+        """The :class:`Remote.SimulationClient` running everything drawn on this canvas"""
+        self.live_frame = None
+        """The newest :class:`Remote.RingFrame` taken from the simulation"""
+        self.render_stats = {'frames': 0, 'moved': 0, 'unchanged': 0, 'culled': 0, 'frame time': 0,
+                             'average frame time': 0}
+        """Counters from :meth:`render`; times are seconds, the average is a moving average over recent frames"""
+        self._drawn_version = None
+        self._drawn_ids = []
+        self._drawn_pixels = numpy.zeros((0, 2))
+        self._drawn_visible = numpy.zeros(0, dtype=bool)
+        self.replay_tick = None
+        """The recorded tick being shown by :meth:`show_replay`, or None when showing the live simulation"""
+        self.particles = Registry.HandleRegistry()
+        """Every :class:`Particle.Particle` on the canvas"""
+        self.items = {}
+        """`PhysicsObject.handle` of each drawn body to its canvas id"""
+        self.canvas_handles = {}
+        """Canvas id of each drawn body to its `PhysicsObject.handle`"""
         self.new_physics_object_plugins = []
-        """These are functions. Each will have func(physics_object) called on it when a new object is added.
-            You can generate a callback to go in this list to add functionality to new objects that are added
+        """These are functions. Each will have func(handle) called on it when a new object is first drawn, with the
+            object's `PhysicsObject.handle`. You can generate a callback to go in this list to add functionality to
+            new objects that are added
         """
         self.canvas.grid()
         self.draw_cartesian()
@@ -113,109 +177,159 @@ class PhysicsCanvas:
         """
         This replaced redundant methods add_force_object, add_vector_object, etc. in the refactor. Those classes were also all merged into PhysicsObject.
 
-        Draws a rectangle to represent the physicsObject on the canvas.
-
-        Adds a reference to the new PhysicsObject in self.physicsObjects
-
-        Sets physics_object.canvas_id to the canvas id (integer) resulting from drawing a shape
+        Has the simulation add a body in the state of physics_object. It is drawn by :meth:`render` once the
+        simulation has published a frame with it.
 
-        Sets physics_object.physics_canvas to a reference to this PhysicsCanvas
-
-        :param physics_object: A physics object to draw on the canvas
+        :param physics_object: A new physics object, not added to any engine
         :type physics_object: :class:`Physics.PhysicsObject`
+        :return: A ref for :meth:`Remote.SimulationClient.handle_of`
+        :rtype: int
         """
-        if hasattr(physics_object, 'material'):
-            color = physics_object.material.color
-        else:
-            color = 'blue'
-        x0 = physics_object.displacement.x - physics_object.side + self.origin_x
-        x1 = physics_object.displacement.x + physics_object.side + self.origin_x
-        y0 = physics_object.displacement.y - physics_object.side + self.origin_y
-        y1 = physics_object.displacement.y + physics_object.side + self.origin_y
-        # down the line, the physics object should draw itself
-        physics_object.canvas_id = self.canvas.create_rectangle(x0, y0, x1, y1, fill=color)
-        physics_object.physics_canvas = self
-        self.physics_objects.append(physics_object)
-
-        for plugin in self.new_physics_object_plugins:
-            plugin(physics_object)
-
-        self.move_physics_object(physics_object)
+        return self.simulation.add(physics_object)
 
-    def update(self, interval):
+    def update_particles(self, interval):
         """
-        Passes update to interval to self.physics_objects and self.interacting_forces
+        Passes the update to self.particles. Tk thread only.
+
         :param interval: time in seconds
         :type interval: number
         """
-        for o in self.physics_objects:
-            o.update(interval)
-        for f in self.interacting_forces:
-            f.update(interval)
-        for p in self.particles:
+        for p in list(self.particles):  # particles remove themselves when they expire
             p.update(interval)
 
-    def move_physics_object(self, physics_object):
-        """
-        Called by :class:`Physics.ForceObject` when they need to move.
-
-        Checks the displacement vector of the parameter object, calculates where that should appear on the canvas,
-        then moves the rendering to the appropriate pixel x,y.
-
-        Currently, this is a little buggy and needs to be reworked. Positive and negative y are not accounted for correctly.
-
-        :param physics_object: An object with a displacement vector that wants to move
-        :type physics_object: extends :class:`Physics.PhysicsObject`
-        """
-        velocity = physics_object.velocity
-        acceleration = physics_object.acceleration
-        dx = physics_object.displacement.x
-        dy = physics_object.displacement.y
-        side = physics_object.side
-        x0 = dx - side
-        x1 = dx + side
-        y0 = dy - side
-        y1 = dy + side
-        if x0 < self.min_x + Options['canvas left physics adjustment'] and velocity.x < 0.001:
-            velocity.x *= -1
-        elif x1 > self.max_x + Options['canvas right physics adjustment'] and velocity.x > 0.001:
-            velocity.x *= -1
-        if y0 < self.min_y + Options['canvas top physics adjustment'] and velocity.y < 0.001:
-            velocity.y *= -1
-        elif y1 > self.max_y - Options['canvas bottom physics adjustment'] and velocity.y > 0.001:
-            velocity.y *= -1
-        velocity.calculate_angles()
-        acceleration.calculate_angles()
-        new_x = physics_object.displacement.x + self.origin_x - side
-        new_y = self.origin_y - (physics_object.displacement.y + side)
-        self.canvas.moveto(physics_object.canvas_id, new_x, new_y)
-
-    def get_physics_object_from_id(self, id):
-        """
-        Returns the object with canvas id equal to id
+    def render(self, frame, alpha=1):
+        """
+        Moves the rendering of the bodies in a frame to their displacement, in one pass. Tk thread only.
+
+        Draws anything shaped like a :class:`Remote.RingFrame`: a version, and the handles, colors, sides and
+        displacements of its bodies. That covers live frames and the recorded ticks of :meth:`show_replay`. When
+        the version differs from the last frame drawn, :meth:`match_items` makes and deletes rectangles to match.
+
+        Pixel positions for every body are worked out at once with NumPy. A body is only moved on the canvas if its
+        rounded pixel position changed since it was last drawn, and only if it is inside the visible canvas now or
+        was last time (so it is moved out of view once, then left alone). Counts and timings are kept in
+        self.render_stats.
+
+        :param frame: A frame published by the simulation, or a recorded one
+        :type frame: :class:`Remote.RingFrame` or :class:`Recorder.ReplayFrame`
+        :param alpha: Fraction of the way from the displacement before the last step to the one after it, see
+            :meth:`Remote.RingFrame.interpolate`
+        :type alpha: number
+        """
+        start = time.perf_counter()
+        n = len(frame.sides)
+        if frame.version != self._drawn_version or len(self._drawn_ids) != n:
+            # bodies were added, removed or reordered - forget what was drawn for each row
+            self._drawn_ids = self.match_items(frame)
+            self._drawn_pixels = numpy.full((n, 2), numpy.nan)
+            self._drawn_visible = numpy.ones(n, dtype=bool)
+            self._drawn_version = frame.version
+        positions = frame.interpolate(alpha)
+        sides = frame.sides
+        pixels = numpy.empty((n, 2))
+        numpy.rint(positions[:, 0] - sides + self.origin_x, out=pixels[:, 0])
+        numpy.rint(self.origin_y - (positions[:, 1] + sides), out=pixels[:, 1])
+        size = 2 * sides
+        visible = ((pixels[:, 0] + size >= 0) & (pixels[:, 0] <= self.width) &
+                   (pixels[:, 1] + size >= 0) & (pixels[:, 1] <= self.height))
+        changed = numpy.any(pixels != self._drawn_pixels, axis=1)  # NaN never compares equal, so new rows draw
+        dirty = changed & (visible | self._drawn_visible)
+        rows = numpy.flatnonzero(dirty)
+
+        moveto = self.canvas.moveto
+        ids = self._drawn_ids
+        for row, (x, y) in zip(rows.tolist(), pixels[rows].tolist()):
+            moveto(ids[row], x, y)
+        self._drawn_pixels[rows] = pixels[rows]
+        self._drawn_visible[rows] = visible[rows]
+
+        stats = self.render_stats
+        elapsed = time.perf_counter() - start
+        stats['frames'] += 1
+        stats['moved'] = len(rows)
+        stats['unchanged'] = int(n - numpy.count_nonzero(changed))
+        stats['culled'] = int(numpy.count_nonzero(changed & ~dirty))
+        stats['frame time'] = elapsed
+        stats['average frame time'] += (elapsed - stats['average frame time']) * 0.05
+
+    def match_items(self, frame):
+        """
+        Draws a rectangle for each body in the frame that isn't drawn yet and deletes those of bodies no longer in
+        it, matched by handle. Calls the plugins in self.new_physics_object_plugins on each new body.
+
+        :param frame: The frame about to be drawn, see :meth:`render`
+        :type frame: :class:`Remote.RingFrame` or :class:`Recorder.ReplayFrame`
+        :return: The canvas id of the body in each row of the frame
+        :rtype: list
+        """
+        colors = self.simulation.colors
+        items = {}
+        new = []
+        for handle, color, side in zip(map(tuple, frame.handles.tolist()), frame.colors.tolist(),
+                                       frame.sides.tolist()):
+            item = self.items.pop(handle, None)
+            if item is None:
+                fill = colors[color] if color < len(colors) else 'blue'
+                item = self.canvas.create_rectangle(0, 0, 2 * side, 2 * side, fill=fill)
+                new.append(handle)
+            items[handle] = item
+        for item in self.items.values():
+            self.canvas.delete(item)
+        self.items = items
+        self.canvas_handles = {item: handle for handle, item in items.items()}
+        for handle in new:
+            for plugin in self.new_physics_object_plugins:
+                plugin(handle)
+        return list(items.values())
+
+    def show_replay(self, tick, recorder):
+        """
+        Draws a recorded tick instead of the live simulation. Nothing is simulated, so any recorded tick can be
+        shown in any order. Tk thread only.
+
+        :param tick: The tick to show
+        :type tick: int
+        :param recorder: Where the tick was recorded
+        :type recorder: :class:`Recorder.TrajectoryRecorder`
+        :return: Whether the tick was recorded and is now shown
+        :rtype: bool
+        """
+        if self.live_frame is None:
+            return False
+        frame = recorder.frame(tick, self.live_frame)
+        if frame is None:
+            return False
+        self.render(frame)
+        self.replay_tick = tick
+        return True
+
+    def end_replay(self):
+        """
+        Goes back to drawing the live simulation.
+        """
+        self.replay_tick = None
+        self._drawn_version = None  # redraw every body from the live frame
+
+    def get_handle_from_id(self, id):
+        """
+        Returns the handle of the body drawn with canvas id equal to id, or None if there is none.
         :param id: A canvas id
         :type id: int
-        :return: :class:`Physics.PhysicsObject`
+        :return: `PhysicsObject.handle` in the simulation
+        :rtype: tuple
         """
-        for p in self.physics_objects:
-            if p.canvas_id == id:
-                return p
+        return self.canvas_handles.get(id)
 
-    def delete_physics_object(self, physics_object):
+    def delete_physics_object(self, handle):
         """
-        Deletes an object and removes its rendering from the canvas.
+        Has the simulation delete a body and the interacting forces on it. Its rendering goes with the first frame
+        published without it.
 
-        :param physics_object: Object to delete
-        :type physics_object: extends :class:`Physics.PhysicsObject`
-        :return:
+        :param handle: `PhysicsObject.handle` of the body
+        :type handle: tuple
         """
-        delete_id = physics_object.canvas_id
-        for i in range(0, len(self.physics_objects)-1):
-            phys_object = self.physics_objects[i]
-            if phys_object == physics_object:
-                self.physics_objects.pop(i)
-        self.canvas.delete(delete_id)
-        self.window.log(f"deleted physics object {delete_id}")
+        self.simulation.send('remove', handle)
+        self.window.log(f"deleted physics object {self.items.get(handle)}", 'delete')
 
     def context_popup(self, event):
         """
@@ -233,17 +347,13 @@ class PhysicsCanvas:
         bottom = event.y + radius
         results = self.canvas.find_overlapping(left, top, right, bottom)
 
-        found_match = ''
-        for i in range(0, len(self.physics_objects)):
-            phys_obj = self.physics_objects[i]
-            for j in range(0, len(results)):
-                if phys_obj.canvas_id == results[j]:
-                    found_match = phys_obj
-                    break
-            if type(found_match) != str:
+        found_match = None
+        for canvas_id in reversed(results):  # topmost first
+            found_match = self.get_handle_from_id(canvas_id)
+            if found_match is not None:
                 break
 
-        if type(found_match) == str:
+        if found_match is None:
             cb = self.popup_add(event)
             self.context_menu.add_command(label='Add', command=cb)
         else:
@@ -265,30 +375,27 @@ class PhysicsCanvas:
         return callb
 
 
-    def popup_info(self, force_object, event):
+    def popup_info(self, handle, event):
         """
-        Generates a callback function for use with the context menu, so the ForceObject is linked to the PhysicsObjectWindow when it is created.
+        Generates a callback function for use with the context menu, so the body is shown in
+        :class:`PhysicsWindow.InspectorTab` when it is picked.
 
-        :param force_object: The physics object to link
-        :type force_object: :class:`Physics.ForceObject`
+        :param handle: `PhysicsObject.handle` of the body to link
+        :type handle: tuple
         :param event: Mouse click event
         :return: A callback to pass to the menu entry as the command
         :rtype: Function
         """
-        self.window.log('window popup called')
-        po = force_object
-
         def callb():
-            if type(po) == Physics.PhysicsObject:
-                fow = PhysicsWindow.PhysicsObjectWindow(self.window, po, event.x, event.y)
+            self.window.inspector.inspect(handle)
         return callb
 
 
 class TimeSelector:
     """
-    Handles pause, step, and play buttons at the bottom of the UI.
+    Handles pause, step, and play buttons at the bottom of the UI, and recording and replaying ticks.
 
-    Calculates update time and sends it to window.physics_canvas for updating.
+    Time runs in the simulation (see :meth:`Remote.Simulation.run`); the buttons start, pause and step it there.
 
     :param window: The main entry of the application
     :type window: :class:`Ui.Window`
@@ -298,12 +405,26 @@ class TimeSelector:
     def __init__(self, window, parent_frame):
         self.window = window
         self.frame = parent_frame
-        self.pause_button = Button(self.frame, text='Pause', command=self.stop_thread)
-        self.start_button = Button(self.frame, text='Play', command=self.start_thread)
+        self.drawn_frame = None
+        """The last :class:`Remote.RingFrame` drawn by draw_frame"""
+        self.drawn_alpha = 1
+        self.drawn_time = 0
+        """Simulated time of self.drawn_frame"""
+        self.stats_shown_time = 0
+        self.recording_path = None
+        """The file the simulation last recorded to with the Record check box"""
+        self.recorder = None
+        """That file, opened as a :class:`Recorder.TrajectoryRecorder` for replay"""
+        self.profiler = None
+        """A :class:`Profiler.TickProfiler` timing draw_frame, set by the debug tab"""
+        self.pause_button = Button(self.frame, text='Pause', command=self.pause)
+        self.start_button = Button(self.frame, text='Play', command=self.start)
         self.step_button = Button(self.frame, text='Step', command=self.step)
-
-        self.run_thread = threading.Thread(target=self.run, daemon=True)
-        """Main program time loop"""
+        self.is_recording = BooleanVar()
+        self.record_check = ttk.Checkbutton(self.frame, text='Record', variable=self.is_recording,
+                                            command=self.toggle_recording)
+        self.replay_scale = Scale(self.frame, orient=HORIZONTAL, length=300, showvalue=True, label='replay tick',
+                                  command=self.seek)
 
         self.running = False
         """Set True when program is running"""
@@ -311,7 +432,10 @@ class TimeSelector:
         self.pause_button.grid(column=0, row=0)
         self.start_button.grid(column=1, row=0)
         self.step_button.grid(column=2, row=0)
+        self.record_check.grid(column=3, row=0)
+        self.replay_scale.grid(column=4, row=0)
         self.window.root.bind('<Return>', self.toggle_run_button)
+        self.window.root.after(round(Options['render interval']*1000), self.draw_frame)
 
     def toggle_run_button(self, event):
         """
@@ -319,64 +443,138 @@ class TimeSelector:
         :param event: Key event, not used
         """
         if not self.running:
-            self.start_thread()
+            self.start()
         else:
-            self.stop_thread()
+            self.pause()
 
-    def run(self):
+    def toggle_recording(self):
+        """
+        Has the simulation start recording every tick into a :class:`Recorder.TrajectoryRecorder` at
+        `Options['recorder path']`, or stop recording. The recording stays available for replay after it's stopped.
         """
-        Run by the program thread(s), not called directly!
+        if self.is_recording.get():  # checkbox changes before command is called
+            self.window.simulation.send('record', Options['recorder path'])
+        else:
+            self.window.simulation.send('record', None)
 
-        Sleeps for approximately `Options.Options['update interval']` seconds, then calls self.update(interval) with
-        the interval being the actual time passed since the last update was called. :return:
+    def recording_changed(self, path):
         """
-        last_time = time.time()
-        while self.running:
-            now_time = time.time()
-            interval = now_time - last_time
-            last_time = now_time
-            self.update(interval)
-            time.sleep(Options['update interval'])
+        Called when the simulation has made or rewritten the recording file; it is opened again on the next seek.
 
-    def start_thread(self):
+        :param path: The recording file
+        :type path: str
         """
-        Stops the old thread in case it's running, then sets self.run_thread to a new thread and starts it.
+        self.recording_path = path
+        self.recorder = None
+
+    def show_recorded(self, recorded):
         """
-        self.stop_thread()
-        self.running = True
-        self.run_thread = threading.Thread(target=self.run, daemon=True)
-        self.run_thread.start()
+        Sets the replay slider's range.
 
-    def update(self, interval):
+        :param recorded: The first and last recorded tick, or None
+        :type recorded: tuple
         """
-        Tells :class:`Ui.PhysicsWindow` to update with interval amount.
+        if recorded is not None:
+            self.replay_scale.configure(from_=recorded[0], to=recorded[1])
 
-        Also tells each window in `MainWindow.additional_windows` to update by interval amount.
+    def seek(self, value):
+        """
+        Called when the replay slider moves. While paused, shows the recorded tick under the slider.
 
-        :param interval: Time to update in seconds
-        :type interval: number
+        :param value: The slider position
+        :type value: str
         """
-        self.window.physics_canvas.update(interval)
-        for i in range(0, len(self.window.additional_windows)):
-            window = self.window.additional_windows[i]
-            window.update(interval)
+        if self.running or self.recording_path is None:
+            return
+        if self.recorder is None:
+            try:
+                self.recorder = Recorder.TrajectoryRecorder.open(self.recording_path)
+            except (OSError, ValueError) as e:
+                self.window.log(f"couldn't open {self.recording_path}: {e}")
+                return
+        self.window.physics_canvas.show_replay(int(float(value)), self.recorder)
 
-    def stop_thread(self):
+    def start(self):
+        """
+        Starts time in the simulation. Ends any replay.
         """
-        Stops the current self.run_thread and joins it (if its alive)
+        self.window.physics_canvas.end_replay()
+        self.drawn_frame = None
+        self.running = True
+        self.window.simulation.send('run', True)
 
-        Also sets self.running to false
-        :return:
+    def pause(self):
+        """
+        Pauses time in the simulation.
         """
         self.running = False
-        if self.run_thread.is_alive():
-            self.run_thread.join()
+        self.window.simulation.send('run', False)
+
+    def draw_frame(self):
+        """
+        Runs on the Tk thread every `Options['render interval']` seconds, via root.after.
+
+        Hands the events sent by the simulation to the window, then takes the newest frame it published and draws
+        it. While running, the drawing is interpolated by how far the wall clock has got towards the next step. The
+        particles and each window in `MainWindow.additional_windows` are then updated by the simulated time since
+        the last frame, new log entries are shown, and the render counters are shown on the debug tab about once a
+        second. Nothing live is drawn while a recorded tick is shown. While self.profiler is set, events, drawing,
+        particles and windows are timed.
+        """
+        physics_canvas = self.window.physics_canvas
+        profiler = self.profiler
+        if profiler is not None:
+            profiler.begin_capture()
+            start = t = time.perf_counter()
+        self.window.take_events()
+        if profiler is not None:
+            t = profiler.lap('events', t)
+        frame = self.window.simulation.latest()
+        if frame is not None:
+            physics_canvas.live_frame = frame
+        if physics_canvas.replay_tick is not None:
+            frame = None  # a recorded tick is on show; see seek
+        if frame is not None:
+            alpha = 1
+            if self.running and frame.dt > 0:
+                alpha = min(1, (time.perf_counter() - frame.wall_time) / frame.dt)
+            new = self.drawn_frame is None or frame.frame != self.drawn_frame.frame
+            if new or alpha != self.drawn_alpha:
+                physics_canvas.render(frame, alpha)
+                self.drawn_alpha = alpha
+                if profiler is not None:
+                    t = profiler.lap('render', t)
+            if new:
+                elapsed = frame.time - self.drawn_time
+                self.drawn_frame = frame
+                self.drawn_time = frame.time
+                if elapsed > 0:
+                    physics_canvas.update_particles(elapsed)
+                    if profiler is not None:
+                        t = profiler.lap('particles', t)
+                    for window in list(self.window.additional_windows):
+                        window.update(elapsed)
+                    if profiler is not None:
+                        t = profiler.lap('additional windows', t)
+        self.window.log_tab.flush()
+        now = time.perf_counter()
+        if profiler is not None:
+            profiler.record('frame', now - start)
+            profiler.end_capture(tick=True)
+        if now - self.stats_shown_time >= Options['object popup update interval']:
+            self.window.debug_tab.show_render_stats(physics_canvas.render_stats)
+            self.stats_shown_time = now
+        if not self.window.simulation.alive():
+            self.window.log('the simulation has stopped')
+            self.window.log_tab.flush()
+            return
+        self.window.root.after(round(Options['render interval']*1000), self.draw_frame)
 
     def step(self):
         """
-        Calls self.update(Options['update interval']), 'stepping' the time that would pass in 1 'frame'
+        Has the simulation take one step of Options['update interval'], the time that would pass in 1 'frame'
         """
-        self.update(Options['update interval'])
+        self.window.simulation.send('step')
 
 
 class EnvironmentTab(ttk.Frame):
@@ -387,6 +585,8 @@ class EnvironmentTab(ttk.Frame):
         ttk.Frame.__init__(self, parent)
         self.window = window
         self.clear_button = ttk.Button(self, text="Clear", command=self.clear_press)
+        self.save_button = ttk.Button(self, text="Save", command=self.save_press)
+        self.load_button = ttk.Button(self, text="Load", command=self.load_press)
 
         self.is_gravity = BooleanVar()
         gravity_check = ttk.Checkbutton(self, text="gravity", variable=self.is_gravity, command=self.toggle_gravity)
@@ -398,109 +598,198 @@ class EnvironmentTab(ttk.Frame):
         air_check = ttk.Checkbutton(self, text="air resistance", variable=self.is_air, command=self.toggle_air)
         self.is_air.set(Options['air resistance'])
 
+        self.is_n_body = BooleanVar()
+        n_body_check = ttk.Checkbutton(self, text="n-body gravity", variable=self.is_n_body,
+                                       command=self.toggle_n_body_gravity)
+        self.is_n_body.set(Options['n-body gravity'])
+        self.theta = DoubleVar()
+        self.theta.set(Options['barnes hut theta'])
+        theta_frame = ttk.Frame(self)
+        theta_label = ttk.Label(theta_frame, text="\u03b8")
+        theta_spinbox = ttk.Spinbox(theta_frame, from_=0, to=2, increment=0.1, width=5, textvariable=self.theta,
+                                    command=self.set_theta)
+        theta_spinbox.bind('<Return>', lambda e: self.set_theta())
+
+        self.integrator = StringVar()
+        self.integrator.set(Options['integrator'])
+        integrator_frame = ttk.Frame(self)
+        integrator_label = ttk.Label(integrator_frame, text="integrator")
+        integrator_spinbox = ttk.Spinbox(integrator_frame, values=list(Integrators.INTEGRATORS), width=9,
+                                         state='readonly', textvariable=self.integrator, command=self.set_integrator)
+        self.is_adaptive = BooleanVar()
+        adaptive_check = ttk.Checkbutton(self, text="adaptive steps", variable=self.is_adaptive,
+                                         command=self.toggle_adaptive)
+        self.is_adaptive.set(Options['adaptive steps'])
+        self.narrow_phase = StringVar()
+        self.narrow_phase.set(Options['narrow phase'])
+        narrow_phase_frame = ttk.Frame(self)
+        narrow_phase_label = ttk.Label(narrow_phase_frame, text="collisions")
+        narrow_phase_spinbox = ttk.Spinbox(narrow_phase_frame, values=list(Collision.NARROW_PHASES), width=9,
+                                           state='readonly', textvariable=self.narrow_phase,
+                                           command=self.set_narrow_phase)
+        self.workers = IntVar()
+        self.workers.set(Options['worker processes'])
+        workers_frame = ttk.Frame(self)
+        workers_label = ttk.Label(workers_frame, text="processes")
+        workers_spinbox = ttk.Spinbox(workers_frame, from_=0, to=os.cpu_count() or 1, width=5,
+                                      textvariable=self.workers, command=self.set_workers)
+        workers_spinbox.bind('<Return>', lambda e: self.set_workers())
+
         self.clear_button.grid(column=0, row=0)
+        self.save_button.grid(column=1, row=0)
+        self.load_button.grid(column=2, row=0)
         gravity_check.grid(column=0, row=1,sticky=W)
         air_check.grid(column=0,row=2, sticky=W)
+        n_body_check.grid(column=0, row=3, sticky=W)
+        theta_frame.grid(column=0, row=4, sticky=W)
+        theta_label.grid(column=0, row=0)
+        theta_spinbox.grid(column=1, row=0)
+        integrator_frame.grid(column=0, row=5, sticky=W)
+        integrator_label.grid(column=0, row=0)
+        integrator_spinbox.grid(column=1, row=0)
+        adaptive_check.grid(column=0, row=6, sticky=W)
+        narrow_phase_frame.grid(column=0, row=7, sticky=W)
+        narrow_phase_label.grid(column=0, row=0)
+        narrow_phase_spinbox.grid(column=1, row=0)
+        workers_frame.grid(column=0, row=8, sticky=W)
+        workers_label.grid(column=0, row=0)
+        workers_spinbox.grid(column=1, row=0)
 
     def toggle_air(self):
         """
-        Creates drag forces for objects
+        Turns air resistance on or off for every object, including ones added later.
 
-        Drag acts opposite to the direction of motion
+        Drag acts opposite to the direction of motion; the engine applies it as a global field (see
+        :meth:`World.WorldState.sum_forces`).
         """
-        physics_canvas = self.window.physics_canvas
-        if self.is_air.get(): # checkbox changes before command is called
-            for p_object in physics_canvas.physics_objects:
-                # make a drag force
-                p_object._drag = Physics.DragForce(p_object)
-                p_object.forces.append(p_object._drag)
-            physics_canvas.new_physics_object_plugins.append(self.set_drag_for_new_physics_object)
+        if self.is_air.get():  # checkbox changes before command is called
+            self.window.simulation.send('air density', Options['air density'])
         else:
-            for p_object in physics_canvas.physics_objects:
-                if hasattr(p_object, '_drag'):
-                    drag_force = p_object._drag
-                    for f in p_object.forces:
-                        if f == drag_force:  # remove
-                            i = p_object.forces.index(f)
-                            p_object.forces.pop(i)
-                            break
-            for plug in physics_canvas.new_physics_object_plugins:
-                if plug == self.set_drag_for_new_physics_object:
-                    i = physics_canvas.new_physics_object_plugins.index(plug)
-                    physics_canvas.new_physics_object_plugins.pop(i)
+            self.window.simulation.send('air density', 0)
 
     def toggle_gravity(self):
-        physics_canvas = self.window.physics_canvas
-        if self.is_gravity.get(): # checkbox changes before command is called
-            for p_object in physics_canvas.physics_objects:
-                p_object._grav_force = Physics.Force.make_directional_force('S', self.gravity_accel.get()*p_object.mass)
-                p_object._grav_force.constant = True
-                p_object.forces.append(p_object._grav_force)
-            physics_canvas.new_physics_object_plugins.append(self.set_grav_for_new_physics_object)
+        """
+        Turns gravity on or off for every object, including ones added later. The engine applies it as a global
+        field (see :meth:`World.WorldState.sum_forces`).
+        """
+        if self.is_gravity.get():  # checkbox changes before command is called
+            self.window.simulation.send('gravity', self.gravity_accel.get())
         else:
-            for p_object in physics_canvas.physics_objects:
-                if hasattr(p_object, '_grav_force'):
-                    grav_force = p_object._grav_force
-                    for f in p_object.forces:
-                        if f == grav_force:
-                            i = p_object.forces.index(f)
-                            p_object.forces.pop(i)
-                            break
-            for plug in physics_canvas.new_physics_object_plugins:
-                if plug == self.set_grav_for_new_physics_object:
-                    i = physics_canvas.new_physics_object_plugins.index(plug)
-                    physics_canvas.new_physics_object_plugins.pop(i)
+            self.window.simulation.send('gravity', 0)
+
+    def toggle_n_body_gravity(self):
+        """
+        Turns gravity between every pair of objects on or off. The engine sums it exactly for a few objects and with
+        a Barnes-Hut quadtree for many (see :class:`BarnesHut.NBodyGravity`).
+        """
+        if self.is_n_body.get():  # checkbox changes before command is called
+            self.window.simulation.send('n-body gravity', self.get_theta())
+        else:
+            self.window.simulation.send('n-body gravity', None)
+
+    def get_theta(self):
+        """
+        :return: The opening angle in the spinbox, or the default from Options if it isn't a number
+        :rtype: float
+        """
+        try:
+            return max(0.0, float(self.theta.get()))
+        except (TclError, ValueError):
+            return Options['barnes hut theta']
+
+    def set_theta(self):
+        """
+        Hands the opening angle in the spinbox to the running n-body gravity, if any.
+        """
+        self.window.simulation.send('theta', self.get_theta())
 
-    def set_grav_for_new_physics_object(self, physics_object):
+    def set_integrator(self):
         """
-        Append this function to :class:`PhysicsCanvas.new_physics_object_plugins`
+        Switches the engine to the integrator in the spinbox (see :mod:`Integrators`).
+        """
+        self.window.simulation.send('integrator', self.integrator.get())
 
-        :param physics_object: A new physics object
-        :type :class:`Physics.PhysicsObject`
+    def toggle_adaptive(self):
+        """
+        Lets the engine choose the length of each step, or goes back to steps of `Options['update interval']` (see
+        :class:`Integrators.StepController`).
         """
-        if self.is_gravity.get():
-            physics_object._grav_force = Physics.Force.make_directional_force('S', self.gravity_accel.get()*physics_object.mass)
-            physics_object._grav_force.constant = True
-            physics_object.forces.append(physics_object._grav_force)
+        self.window.simulation.send('adaptive', self.is_adaptive.get())  # checkbox changes before command is called
 
-    def set_drag_for_new_physics_object(self, physics_object):
+    def set_narrow_phase(self):
         """
-        Append this function to :class:`PhysicsCanvas.new_physics_object_plugins`
+        Switches the engine to the narrow phase in the spinbox (see :data:`Collision.NARROW_PHASES`).
+        """
+        self.window.simulation.send('narrow phase', self.narrow_phase.get())
 
-        :param physics_object: A new physics object
-        :type :class:`Physics.PhysicsObject`
+    def set_workers(self):
+        """
+        Spreads each step over the number of worker processes in the spinbox, or steps on one core for 0 (see
+        :mod:`Parallel`).
+        """
+        try:
+            workers = max(0, int(self.workers.get()))
+        except (TclError, ValueError):
+            return
+        self.window.simulation.send('workers', workers)
 
+    def show_environment(self, settings):
         """
-        if self.is_air.get():
-            physics_object._drag = Physics.DragForce(physics_object)
-            physics_object.forces.append(physics_object._drag)
+        Sets every control to match the simulation, e.g. after a checkpoint was loaded.
 
+        :param settings: From :meth:`Remote.Simulation.environment`
+        :type settings: dict
+        """
+        self.is_gravity.set(bool(settings['gravity']))
+        self.is_air.set(bool(settings['air density']))
+        self.is_n_body.set(settings['n-body gravity'] is not None)
+        if settings['n-body gravity'] is not None:
+            self.theta.set(settings['n-body gravity'])
+        self.integrator.set(settings['integrator'])
+        self.is_adaptive.set(settings['adaptive'])
+        self.narrow_phase.set(settings['narrow phase'])
+        self.workers.set(settings['workers'])
 
+    def save_press(self):
+        """
+        Asks for a file name and has the simulation save itself there as a checkpoint (see :func:`Checkpoint.save`).
+        """
+        path = filedialog.asksaveasfilename(defaultextension='.ckpt', filetypes=[('checkpoints', '*.ckpt')])
+        if not path:
+            return
+        self.window.simulation.send('save', path)
+
+    def load_press(self):
+        """
+        Asks for a checkpoint file, clears the canvas and has the simulation load the checkpoint in its place (see
+        :func:`Checkpoint.load`). The environment check boxes are set to match once it has, see
+        :meth:`show_environment`.
+        """
+        path = filedialog.askopenfilename(filetypes=[('checkpoints', '*.ckpt'), ('all files', '*')])
+        if not path:
+            return
+        self.clear_press()
+        self.window.simulation.send('load', path)
 
     def clear_press(self):
         """
-        Deletes all refs in physics Canvas
         Closes all hanging windows
 
-        Clears canvas of extant physics objects
+        Has the simulation remove every physics object and interacting force; their renderings go with the next
+        frame
 
-        Removes interacting forces
+        Clears canvas of particles
         """
 
-        for win in self.window.additional_windows:
+        for win in list(self.window.additional_windows):
             win.del_win()
+        self.window.inspector.clear()
 
-        pos = self.window.physics_canvas.physics_objects
-        self.window.physics_canvas.physics_objects = []
-
-        for obj in pos:
-            self.window.physics_canvas.canvas.delete(obj.canvas_id)
-
-        for force in self.window.physics_canvas.interacting_forces:
-            force.remove()
+        self.window.simulation.send('clear')
 
         for particle in self.window.physics_canvas.particles:
             self.window.physics_canvas.canvas.delete(particle.canvas_id)
+        self.window.physics_canvas.particles.clear()
 
 
 class OptionsTab(ttk.Frame):
@@ -0,0 +1,652 @@
+"""World contains the array-backed storage that sits behind every :class:`Physics.PhysicsObject`.
+
+Instead of each PhysicsObject holding its own Vectors, the state of every body lives in a :class:`World.WorldState`:
+one contiguous NumPy column per quantity (positions, velocities, accelerations, net forces, masses and sides), with
+one row per body. A PhysicsObject is only a handle - it remembers which WorldState it lives in and which row it owns.
+
+The forces currently acting on bodies live in a :class:`World.ForceTable` owned by the WorldState, one row per
+:class:`Physics.Force`, so the net force on every body is a single scatter-add.
+
+This lets integration, force summation and boundary bounces run as whole-array operations over every body at once
+instead of as per-object method calls.
+
+There are no UI components in this module.
+"""
+
+import numpy
+
+import Substance
+
+
+def delivered_fraction(interval, remaining):
+    """
+    How much of a force's per-second magnitude is delivered in one update, and taken off its remaining duration,
+    exactly as :meth:`Physics.Force.update` works it out. Works on numbers or arrays.
+
+    :param interval: Time since last update, in seconds
+    :type interval: number
+    :param remaining: Seconds the force has left
+    :type remaining: number or numpy.ndarray
+    """
+    return numpy.where(interval < remaining, remaining - interval, interval)
+
+
+class ForceTable:
+    """
+    The forces acting on the bodies of a :class:`World.WorldState`, one row per force.
+
+    Each row holds the row of the body the force pushes (target), the x and y of the force in Newtons per second,
+    the seconds it has left, and whether it is constant (never depletes).
+
+    :param capacity: Number of rows to preallocate
+    :type capacity: int
+    """
+    def __init__(self, capacity=16):
+        self.capacity = max(1, capacity)
+        self.count = 0
+        """Number of rows in use"""
+        self.targets = numpy.zeros(self.capacity, dtype=numpy.int64)
+        self.vectors = numpy.zeros((self.capacity, 2), dtype=numpy.float64)
+        self.remaining = numpy.zeros(self.capacity, dtype=numpy.float64)
+        self.constant = numpy.zeros(self.capacity, dtype=bool)
+
+    def _grow(self, needed):
+        capacity = self.capacity
+        while capacity < needed:
+            capacity *= 2
+        for name in ('targets', 'vectors', 'remaining', 'constant'):
+            old = getattr(self, name)
+            new = numpy.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:self.count] = old[:self.count]
+            setattr(self, name, new)
+        self.capacity = capacity
+
+    def add(self, target, x, y, remaining=1.0, constant=False):
+        """
+        Appends a force.
+
+        :param target: Row of the body to push
+        :type target: int
+        :param x: x component, Newtons per second
+        :param y: y component, Newtons per second
+        :param remaining: Seconds the force acts for
+        :param constant: If True the force never depletes
+        """
+        if self.count >= self.capacity:
+            self._grow(self.count + 1)
+        i = self.count
+        self.targets[i] = target
+        self.vectors[i] = (x, y)
+        self.remaining[i] = remaining
+        self.constant[i] = constant
+        self.count += 1
+
+    def extend(self, targets, vectors, remaining, constant):
+        """
+        Appends many forces at once.
+
+        :param targets: Row of the body each force pushes
+        :type targets: numpy.ndarray
+        :param vectors: x and y of each force, Newtons per second
+        :type vectors: numpy.ndarray
+        :param remaining: Seconds each force acts for
+        :type remaining: numpy.ndarray
+        :param constant: Whether each force never depletes
+        :type constant: numpy.ndarray
+        """
+        k = len(targets)
+        if self.count + k > self.capacity:
+            self._grow(self.count + k)
+        rows = slice(self.count, self.count + k)
+        self.targets[rows] = targets
+        self.vectors[rows] = vectors
+        self.remaining[rows] = remaining
+        self.constant[rows] = constant
+        self.count += k
+
+    def keep(self, mask):
+        """
+        Compacts the table down to the rows where mask is True.
+
+        :param mask: One bool per row in use
+        :type mask: numpy.ndarray
+        """
+        kept = int(numpy.count_nonzero(mask))
+        for name in ('targets', 'vectors', 'remaining', 'constant'):
+            column = getattr(self, name)
+            column[:kept] = column[:self.count][mask]
+        self.count = kept
+
+    def rows_for(self, target):
+        """
+        :param target: A body row
+        :type target: int
+        :return: Indices of the forces pushing that body
+        :rtype: numpy.ndarray
+        """
+        return numpy.flatnonzero(self.targets[:self.count] == target)
+
+    def sum_into(self, net_forces, interval, deplete=True):
+        """
+        Adds this update's share of every force to `net_forces` with one scatter-add per axis, then takes the share
+        off each force's remaining time and drops the forces that ran out. Constant forces are topped back up to 1
+        second, matching :meth:`Physics.Force.update`.
+
+        :param net_forces: One row per body, added to in place
+        :type net_forces: numpy.ndarray
+        :param interval: Time since last update, in seconds
+        :type interval: number
+        :param deplete: If False, the forces are left as they were, to see what an update would deliver
+        :type deplete: bool
+        """
+        n = self.count
+        if n == 0:
+            return
+        targets = self.targets[:n]
+        remaining = self.remaining[:n]
+        fraction = delivered_fraction(interval, remaining)
+        bodies = len(net_forces)
+        net_forces[:, 0] += numpy.bincount(targets, self.vectors[:n, 0] * fraction, bodies)
+        net_forces[:, 1] += numpy.bincount(targets, self.vectors[:n, 1] * fraction, bodies)
+        if not deplete:
+            return
+        remaining -= fraction
+        remaining[self.constant[:n]] = 1
+        self.keep(remaining > 0)
+
+
+class WorldState:
+    """
+    Structure-of-arrays storage for PhysicsObjects.
+
+    Every column has one row per body; only the first `self.count` rows are in use. The arrays grow by doubling, so
+    a reference to a column should not be kept across calls to :meth:`add` or :meth:`adopt` - read it from the
+    WorldState again instead.
+
+    Removal is a swap-remove: the last row is moved into the hole, so row order is not stable but add and remove are
+    both O(1).
+
+    :param capacity: Number of rows to preallocate
+    :type capacity: int
+    """
+    VECTOR_COLUMNS = ('positions', 'velocities', 'accelerations', 'net_forces')
+    """Columns holding an x and a y for each body"""
+    SCALAR_COLUMNS = ('masses', 'sides')
+    """Columns holding one number for each body"""
+    SLEEP_COLUMNS = {'awake': bool, 'still_times': numpy.float64, 'islands': numpy.int64}
+    """Columns tracking which bodies are asleep, and their types; see :meth:`update_sleep`"""
+    MATERIAL_COLUMNS = {'material_ids': numpy.int32}
+    """Column holding the row of each body's material in self.materials"""
+    COLUMNS = VECTOR_COLUMNS + SCALAR_COLUMNS + tuple(SLEEP_COLUMNS) + tuple(MATERIAL_COLUMNS)
+    """Every column"""
+
+    def __init__(self, capacity=64):
+        self.capacity = max(1, capacity)
+        """Number of allocated rows"""
+        self.count = 0
+        """Number of rows in use"""
+        self.bodies = []
+        """The handle object for each row in use, in row order"""
+        self.version = 0
+        """Incremented whenever rows are added, removed or reordered"""
+        self.forces = ForceTable()
+        """The forces currently acting on bodies in this world"""
+        for name in self.VECTOR_COLUMNS:
+            setattr(self, name, numpy.zeros((self.capacity, 2), dtype=numpy.float64))
+        for name in self.SCALAR_COLUMNS:
+            setattr(self, name, numpy.zeros(self.capacity, dtype=numpy.float64))
+        for name, dtype in (self.SLEEP_COLUMNS | self.MATERIAL_COLUMNS).items():
+            setattr(self, name, numpy.zeros(self.capacity, dtype=dtype))
+        self.materials = Substance.TABLE
+        """The :class:`Substance.MaterialTable` that self.material_ids index into"""
+        self.next_island = 0
+        """Island number handed to the next group of bodies put to sleep together"""
+
+    @classmethod
+    def from_columns(cls, columns, materials=None):
+        """
+        A WorldState over arrays that already hold its bodies, e.g. rows a worker process gathered from shared memory
+        (see :mod:`Parallel`). The arrays are used as they are, not copied, and every row is in use. There are no
+        handle objects; self.bodies holds None for each row.
+
+        :param columns: Names in `COLUMNS` to an array with one entry per body; columns not given are zeroed
+        :type columns: dict
+        :param materials: The table self.material_ids index into, :data:`Substance.TABLE` if None
+        :type materials: :class:`Substance.MaterialTable`
+        :rtype: :class:`World.WorldState`
+        """
+        count = len(columns['positions'])
+        world = cls(count)
+        for name, column in columns.items():
+            setattr(world, name, column)
+        world.count = count
+        world.bodies = [None] * count
+        if materials is not None:
+            world.materials = materials
+        return world
+
+    def _grow(self, needed):
+        """
+        Reallocates every column so at least `needed` rows fit, doubling the capacity.
+
+        :param needed: Minimum number of rows required
+        :type needed: int
+        """
+        capacity = self.capacity
+        while capacity < needed:
+            capacity *= 2
+        for name in self.COLUMNS:
+            old = getattr(self, name)
+            new = numpy.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:self.count] = old[:self.count]
+            setattr(self, name, new)
+        self.capacity = capacity
+
+    def add(self, body, mass=0.0, side=0.0, material_id=0):
+        """
+        Appends a zeroed row for `body`, sets `body.world` and `body.index`.
+
+        :param body: The handle that will own the new row
+        :type body: :class:`Physics.PhysicsObject`
+        :param mass: Mass in kg
+        :type mass: number
+        :param side: Length of a side in m
+        :type side: number
+        :param material_id: Row of the body's material in self.materials
+        :type material_id: int
+        :return: The index of the new row
+        :rtype: int
+        """
+        if self.count >= self.capacity:
+            self._grow(self.count + 1)
+        index = self.count
+        for name in self.VECTOR_COLUMNS:
+            getattr(self, name)[index] = 0
+        self.masses[index] = mass
+        self.sides[index] = side
+        self.material_ids[index] = material_id
+        self._set_awake(index)
+        self.bodies.append(body)
+        self.count += 1
+        self.version += 1
+        body.world = self
+        body.index = index
+        return index
+
+    def extend(self, bodies, columns):
+        """
+        Appends a row for each of `bodies` in one go, filled from `columns`, and sets each body's `world` and
+        `index`.
+
+        :param bodies: Handles without a row, e.g. from :meth:`Physics.PhysicsObject.without_row`
+        :type bodies: list
+        :param columns: Column name to an array with one entry per body. Missing columns are zeroed, and the bodies
+            are awake unless 'awake' is given
+        :type columns: dict
+        :return: The index of the first new row
+        :rtype: int
+        """
+        k = len(bodies)
+        start = self.count
+        if start + k > self.capacity:
+            self._grow(start + k)
+        rows = slice(start, start + k)
+        for name in self.COLUMNS:
+            getattr(self, name)[rows] = columns[name] if name in columns else 0
+        if 'awake' not in columns:
+            self._set_awake(rows)
+        if k and 'islands' in columns:
+            self.next_island = max(self.next_island, int(self.islands[rows].max()) + 1)
+        for index, body in enumerate(bodies, start):
+            body.world = self
+            body.index = index
+        self.bodies.extend(bodies)
+        self.count += k
+        self.version += 1
+        return start
+
+    def adopt(self, body):
+        """
+        Moves a body out of whatever WorldState it currently lives in and into this one, keeping its state.
+
+        :param body: The body to move
+        :type body: :class:`Physics.PhysicsObject`
+        :return: The index of the body's new row
+        :rtype: int
+        """
+        old_world = body.world
+        old_index = body.index
+        if old_world is self:
+            return old_index
+        if self.count >= self.capacity:
+            self._grow(self.count + 1)
+        index = self.count
+        for name in self.VECTOR_COLUMNS + self.SCALAR_COLUMNS + tuple(self.MATERIAL_COLUMNS):
+            getattr(self, name)[index] = getattr(old_world, name)[old_index]
+        self._set_awake(index)
+        old_forces = old_world.forces
+        for row in old_forces.rows_for(old_index).tolist():
+            self.forces.add(index, old_forces.vectors[row, 0], old_forces.vectors[row, 1],
+                            old_forces.remaining[row], old_forces.constant[row])
+        self.bodies.append(body)
+        self.count += 1
+        self.version += 1
+        old_world._release(old_index)
+        body.world = self
+        body.index = index
+        return index
+
+    def remove(self, body):
+        """
+        Takes a body out of this WorldState. The body is given a private single-row WorldState holding its last
+        state, so any remaining references to it (e.g. an open window) still read sensible values.
+
+        :param body: The body to remove
+        :type body: :class:`Physics.PhysicsObject`
+        """
+        if body.world is not self:
+            return
+        WorldState(1).adopt(body)
+
+    def _release(self, index):
+        """
+        Swap-removes row `index`: the last row is copied into it and its owner's index is updated. Forces on the
+        freed row are dropped and forces on the last row follow it.
+
+        :param index: Row to free
+        :type index: int
+        """
+        last = self.count - 1
+        forces = self.forces
+        if forces.count:
+            forces.keep(forces.targets[:forces.count] != index)
+            forces.targets[:forces.count][forces.targets[:forces.count] == last] = index
+        if index != last:
+            for name in self.COLUMNS:
+                column = getattr(self, name)
+                column[index] = column[last]
+            moved = self.bodies[last]
+            self.bodies[index] = moved
+            moved.index = index
+        self.bodies.pop()
+        self.count = last
+        self.version += 1
+
+    def clear(self):
+        """
+        Removes every body. Each one is detached exactly as in :meth:`remove`.
+        """
+        while self.count > 0:
+            self.remove(self.bodies[self.count - 1])
+
+    def column(self, name):
+        """
+        Returns the in-use part of a column as a NumPy view (no copy).
+
+        :param name: One of `COLUMNS`
+        :type name: str
+        :rtype: numpy.ndarray
+        """
+        return getattr(self, name)[:self.count]
+
+    def _set_awake(self, rows):
+        self.awake[rows] = True
+        self.still_times[rows] = 0
+        self.islands[rows] = -1
+
+    @property
+    def sleeping_count(self):
+        """Number of bodies asleep"""
+        return self.count - int(numpy.count_nonzero(self.awake[:self.count]))
+
+    def wake(self, rows):
+        """
+        Wakes bodies, along with every body that fell asleep in the same island as a sleeping one, and restarts
+        their still time. Awake bodies only have their still time restarted.
+
+        :param rows: A row or an array of rows
+        :type rows: int or numpy.ndarray
+        """
+        n = self.count
+        rows = numpy.atleast_1d(rows)
+        asleep = self.islands[rows][~self.awake[rows]]
+        self._set_awake(rows)
+        if asleep.size:
+            self._set_awake(numpy.flatnonzero(~self.awake[:n] & numpy.isin(self.islands[:n], asleep)))
+
+    def wake_all(self):
+        """
+        Wakes every body.
+        """
+        self._set_awake(slice(0, self.count))
+
+    def update_sleep(self, pairs, interval, speed_limit, force_limit, delay, floor_y, gravity=0, fraction=None):
+        """
+        Puts resting bodies to sleep and wakes sleeping bodies whose support moved.
+
+        A body is still while it is slower than `speed_limit` and the net force on it, leaving out the global
+        gravity field, is weaker than `force_limit`. Bodies whose boxes touch form an island; once every awake
+        body of an island has been still for `delay` seconds the island is put to sleep - velocities are zeroed
+        and the bodies are skipped by integration and the broad phase. Only supported islands sleep: ones holding
+        a body on the floor or one already asleep, so a slow body drifting on its own keeps drifting. A sleeping
+        body touching an awake body that isn't ready to sleep is woken, so a pile wakes up when something
+        underneath it moves.
+
+        :param pairs: Pairs of rows that may touch, e.g. :attr:`Broadphase.SpatialHashGrid.pairs`
+        :type pairs: numpy.ndarray
+        :param interval: Time of the update, seconds
+        :type interval: number
+        :param speed_limit: m/s
+        :type speed_limit: number
+        :param force_limit: Newtons
+        :type force_limit: number
+        :param delay: Seconds a body has to stay still
+        :type delay: number
+        :param floor_y: The lowest y a body can rest at, see :meth:`airborne`
+        :type floor_y: number
+        :param gravity: The gravity field that was included in the net force, m/s^2
+        :type gravity: number
+        :param fraction: Share of the gravity field that was included, if not :func:`World.delivered_fraction` of
+            the interval
+        :type fraction: number
+        """
+        n = self.count
+        if n == 0:
+            return
+        awake = self.awake[:n]
+        velocities = self.velocities[:n]
+        forces = self.net_forces[:n].copy()
+        if fraction is None:
+            fraction = delivered_fraction(interval, 1.0)
+        forces[:, 1] += (gravity * fraction) * self.masses[:n]
+        still = ((numpy.hypot(velocities[:, 0], velocities[:, 1]) < speed_limit * interval)
+                 & (numpy.hypot(forces[:, 0], forces[:, 1]) < force_limit))
+        still_times = self.still_times[:n]
+        still_times[:] = numpy.where(still, still_times + interval, 0)
+
+        labels = numpy.arange(n)
+        if len(pairs):
+            a = pairs[:, 0]
+            b = pairs[:, 1]
+            positions = self.positions[:n]
+            reach = (self.sides[a] + self.sides[b])[:, None] + 0.5
+            touching = numpy.all(numpy.abs(positions[a] - positions[b]) <= reach, axis=1)
+            a = a[touching]
+            b = b[touching]
+            while len(a):  # label propagation with pointer jumping until every island has one label
+                low = numpy.minimum(labels[a], labels[b])
+                new = labels.copy()
+                numpy.minimum.at(new, a, low)
+                numpy.minimum.at(new, b, low)
+                new = new[new]
+                if numpy.array_equal(new, labels):
+                    break
+                labels = new
+
+        restless = numpy.zeros(n, dtype=bool)
+        restless[labels[awake & (still_times < delay)]] = True
+        supported = numpy.zeros(n, dtype=bool)
+        supported[labels[~self.airborne(floor_y)]] = True  # on the floor, or asleep
+        falling_asleep = awake & ~restless[labels] & supported[labels]
+        if falling_asleep.any():
+            awake[falling_asleep] = False
+            velocities[falling_asleep] = 0
+            self.islands[:n][falling_asleep] = self.next_island + labels[falling_asleep]
+            self.next_island += n
+        disturbed = ~awake & restless[labels]
+        if disturbed.any():
+            self.wake(numpy.flatnonzero(disturbed))
+
+    def sum_forces(self, interval, gravity=0, air_density=0):
+        """
+        Works out the net force on every body for this update: the share of each force in self.forces, plus the
+        global gravity and air resistance fields (see :meth:`add_field_forces`).
+
+        :param interval: Time since last update, in seconds
+        :type interval: number
+        :param gravity: Downward acceleration in m/s^2, 0 for none
+        :type gravity: number
+        :param air_density: Air density in kg/m^3, 0 for no air resistance
+        :type air_density: number
+        """
+        n = self.count
+        net_forces = self.net_forces[:n]
+        net_forces[:] = 0
+        self.forces.sum_into(net_forces, interval)
+        self.add_field_forces(net_forces, self.velocities[:n], gravity, air_density,
+                              delivered_fraction(interval, 1.0))
+
+    def table_forces(self, interval):
+        """
+        :param interval: Length of an update, in seconds
+        :type interval: number
+        :return: The share of every force in self.forces each body would get over an update that long, without
+            using any of it up
+        :rtype: numpy.ndarray
+        """
+        forces = numpy.zeros((self.count, 2))
+        self.forces.sum_into(forces, interval, deplete=False)
+        return forces
+
+    def add_field_forces(self, net_forces, velocities, gravity=0, air_density=0, fraction=1.0):
+        """
+        Adds the global gravity and air resistance fields for bodies moving at `velocities`.
+
+        Gravity pulls each body down with :math:`F = mg`. Drag pushes against the velocity with
+        :math:`F = \\frac{1}{2}\\rho C_d A v^2`, using the drag coefficient of each body's material and the face of
+        the body as the area. Both are treated like constant forces, so they deliver the same share per update that
+        :meth:`Physics.Force.update` gives a constant force.
+
+        :param net_forces: One row per body, added to in place
+        :type net_forces: numpy.ndarray
+        :param velocities: One row per body
+        :type velocities: numpy.ndarray
+        :param gravity: Downward acceleration in m/s^2, 0 for none
+        :type gravity: number
+        :param air_density: Air density in kg/m^3, 0 for no air resistance
+        :type air_density: number
+        :param fraction: Share of a constant force delivered per update, see :func:`World.delivered_fraction`
+        :type fraction: number
+        """
+        n = self.count
+        if gravity:
+            net_forces[:, 1] -= (gravity * fraction) * self.masses[:n]
+        if air_density:
+            sides = self.sides[:n]
+            speeds = numpy.hypot(velocities[:, 0], velocities[:, 1])
+            coefficients = self.materials.rows['drag_coefficient'][self.material_ids[:n]]
+            drag = -0.5 * coefficients * air_density * fraction * sides * sides * speeds
+            net_forces += drag[:, None] * velocities
+
+    def acceleration(self, table_forces, gravity=0, air_density=0, fraction=1.0, n_body_gravity=None):
+        """
+        The acceleration function handed to an integrator for one step: `table_forces`, held steady through the
+        step, plus gravity, air resistance and n-body gravity worked out at whatever displacement and velocity the
+        integrator asks about.
+
+        :param table_forces: Force on each body from self.forces, per tick
+        :type table_forces: numpy.ndarray
+        :param gravity: Downward acceleration in m/s^2, 0 for none
+        :type gravity: number
+        :param air_density: Air density in kg/m^3, 0 for no air resistance
+        :type air_density: number
+        :param fraction: Share of the fields delivered per tick, see :func:`World.delivered_fraction`
+        :type fraction: number
+        :param n_body_gravity: A :class:`BarnesHut.NBodyGravity`, or None
+        :return: Function of (positions, velocities) returning the acceleration of every body, m per tick^2
+        :rtype: function
+        """
+        masses = self.masses[:self.count]
+
+        def acceleration(positions, velocities):
+            forces = table_forces.copy()
+            self.add_field_forces(forces, velocities, gravity, air_density, fraction)
+            if n_body_gravity is not None:
+                forces += n_body_gravity.forces(positions, masses) * fraction
+            return forces / masses[:, None]
+        return acceleration
+
+    def integrate(self, integrator, acceleration, ticks, floor_y):
+        """
+        Lets `integrator` work out the new velocity of every awake body that is above the floor, and how far every
+        body moves during the step. The bodies are not moved; that is left to the narrow phase.
+
+        The acceleration of the first evaluation is kept in self.accelerations, and the net force it came from in
+        self.net_forces.
+
+        :param integrator: How to integrate, e.g. :class:`Integrators.EulerIntegrator`
+        :type integrator: :class:`Integrators.Integrator`
+        :param acceleration: Function of (positions, velocities) returning the acceleration of every body, m per
+            tick^2
+        :type acceleration: function
+        :param ticks: Length of the step in ticks
+        :type ticks: number
+        :param floor_y: The lowest y a body can rest at
+        :type floor_y: number
+        :return: How far each body moves during the step
+        :rtype: numpy.ndarray
+        """
+        n = self.count
+        velocities = self.velocities[:n]
+        motions, new_velocities, first = integrator.step(self.positions[:n], velocities, acceleration, ticks)
+        self.accelerations[:n] = first
+        numpy.multiply(first, self.masses[:n, None], out=self.net_forces[:n])
+        airborne = self.airborne(floor_y)
+        velocities[airborne] = new_velocities[airborne]
+        grounded = ~airborne
+        motions[grounded] = velocities[grounded] * ticks
+        return motions
+
+    def airborne(self, floor_y):
+        """
+        :param floor_y: The lowest y a body can rest at
+        :type floor_y: number
+        :return: Boolean mask of the awake bodies that are above the floor, which are the ones that get accelerated
+        :rtype: numpy.ndarray
+        """
+        n = self.count
+        sides = self.sides[:n]
+        return (self.positions[:n, 1] - sides > floor_y + sides) & self.awake[:n]
+
+    def bounce(self, min_x, max_x, min_y, max_y):
+        """
+        Whole-array boundary check. Reverses the x or y velocity of every body whose edge is past a boundary and
+        which is still moving towards it.
+
+        :param min_x: Left boundary
+        :param max_x: Right boundary
+        :param min_y: Bottom boundary
+        :param max_y: Top boundary
+        """
+        n = self.count
+        positions = self.positions[:n]
+        velocities = self.velocities[:n]
+        sides = self.sides[:n]
+        vx = velocities[:, 0]
+        vy = velocities[:, 1]
+        left = (positions[:, 0] - sides < min_x) & (vx < 0.001)
+        right = ~left & (positions[:, 0] + sides > max_x) & (vx > 0.001)
+        bottom = (positions[:, 1] - sides < min_y) & (vy < 0.001)
+        top = ~bottom & (positions[:, 1] + sides > max_y) & (vy > 0.001)
+        vx[left | right] *= -1
+        vy[bottom | top] *= -1
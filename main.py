@@ -1,2 +1,9 @@
+import sys
+
 import Ui
-Ui.MainWindow()
\ No newline at end of file
+
+if __name__ == '__main__':  # worker processes (see Parallel.py and Remote.py) import this module too
+    if '--in-process' in sys.argv[1:]:  # step the physics on a thread of this process, see Remote.py
+        Ui.MainWindow(in_process=True)
+    else:
+        Ui.MainWindow()